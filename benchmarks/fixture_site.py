@@ -0,0 +1,132 @@
+"""A local stand-in for a startup's website, served from a background thread.
+
+Pages, with the recorded page snapshot as their text:
+
+- ``/``: a static page with an ``ETag`` and ``Last-Modified``, answering
+  conditional requests with ``304 Not Modified``;
+- ``/pricing``: a static page without validators;
+- ``/gzip``: the same page sent with ``Content-Encoding: gzip``, as most
+  real sites send theirs;
+- ``/app``: an empty shell that a script renders, like a single-page app;
+- ``/blocked``: refuses clients that are not browsers with ``403``;
+- ``/offline``: also ``403``, and the stub browser cannot load it either;
+- ``/slow``: a static page that takes ``slow_seconds`` to answer.
+
+``requests`` counts requests per path and ``max_concurrent`` the most that
+were in flight at once.
+"""
+
+import collections
+import gzip
+import hashlib
+import html
+import http.server
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate
+
+
+def _page(title: str, body: str) -> bytes:
+    return (
+        f"<!doctype html><html><head><title>{html.escape(title)}</title>"
+        "<style>body { font-family: sans-serif; }</style></head>"
+        f"<body><nav><a href='/'>Home</a> <a href='/pricing'>Pricing</a></nav><main>{body}</main>"
+        "<script>window.analytics = [];</script></body></html>"
+    ).encode("utf-8")
+
+
+class FixtureSite:
+    """Serves pages with ``snapshot`` as their text on ``http://127.0.0.1:<port>``."""
+
+    def __init__(self, snapshot: str, slow_seconds: float = 0.2):
+        paragraphs = "".join(f"<p>{html.escape(line)}</p>" for line in snapshot.split(". ") if line)
+        # Long enough to count as a real page rather than an app shell.
+        about = "<p>" + html.escape(" ".join([snapshot] * 3)) + "</p>"
+        self.pages = {
+            "/": _page("Acme Robotics", f"<h1>Acme Robotics</h1>{paragraphs}{about}"),
+            "/pricing": _page("Pricing - Acme Robotics", f"<h1>Pricing</h1>{paragraphs}{about}"),
+            "/gzip": _page("Acme Robotics", f"<h1>Acme Robotics</h1>{paragraphs}{about}"),
+            "/slow": _page("Acme Robotics", f"<h1>Acme Robotics</h1>{paragraphs}{about}"),
+            "/offline": _page("Acme Robotics", ""),
+            "/blocked": _page("Acme Robotics", f"<h1>Acme Robotics</h1>{paragraphs}{about}"),
+            "/app": (
+                "<!doctype html><html><head><title>Acme</title></head>"
+                "<body><div id='root'></div><noscript>Enable JavaScript.</noscript>"
+                "<script src='/static/app.js'></script></body></html>"
+            ).encode("utf-8"),
+        }
+        self.etag = '"' + hashlib.sha256(self.pages["/"]).hexdigest()[:16] + '"'
+        self.last_modified = formatdate(time.time() - 86400, usegmt=True)
+        self.slow_seconds = slow_seconds
+        self.requests: collections.Counter = collections.Counter()
+        self.max_concurrent = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def local_url(self, url: str) -> str:
+        """``url`` with its scheme and host replaced by this site's."""
+        parts = urllib.parse.urlsplit(url)
+        return self.base_url + (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.max_concurrent = 0
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        site = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = urllib.parse.urlsplit(self.path).path
+                with site._lock:
+                    site.requests[path] += 1
+                    site._in_flight += 1
+                    site.max_concurrent = max(site.max_concurrent, site._in_flight)
+                try:
+                    self._respond(path)
+                finally:
+                    with site._lock:
+                        site._in_flight -= 1
+
+            def _respond(self, path: str):
+                body = site.pages.get(path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                if path in ("/blocked", "/offline"):
+                    self.send_error(403)
+                    return
+                if path == "/slow":
+                    time.sleep(site.slow_seconds)
+                validated = path == "/"
+                if validated and self.headers.get("If-None-Match") == site.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", site.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if path == "/gzip":
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                if validated:
+                    self.send_header("ETag", site.etag)
+                    self.send_header("Last-Modified", site.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,255 @@
+"""Offline benchmark of the real agent graph, with a checked-in baseline.
+
+Runs the sequential and parallel graphs from ``startup_investor_agent.agent``
+on the offline stand-ins (see ``benchmarks/offline.py``), and runs the
+configured ``root_agent`` through ``main.py``'s FastAPI app as well. It reports:
+
+- end-to-end latency of a single session, and each agent's share of it;
+- throughput with ``--sessions`` sessions running at once;
+- memory per session: allocations retained by a finished session and the peak
+  while the sessions run.
+
+The results are compared with ``benchmarks/baseline.json``. Any metric that is
+worse by more than ``--threshold`` makes the command exit with status 1.
+``--update-baseline`` rewrites the file, so the change shows up in review.
+
+    python -m benchmarks.harness
+    python -m benchmarks.harness --update-baseline
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Cached briefings would skip the work being measured.
+os.environ["RESEARCH_CACHE"] = "off"
+# Keep the benchmark's sessions, memos and jobs out of the real stores: the
+# app would otherwise serve the fixture's memos as memo-refresh hits.
+_STORE_DIR = tempfile.mkdtemp()
+os.environ.setdefault("SESSION_STORE_PATH", os.path.join(_STORE_DIR, "sessions.sqlite3"))
+os.environ.setdefault("MEMO_STORE_PATH", os.path.join(_STORE_DIR, "memo_store.sqlite3"))
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(_STORE_DIR, "jobs.sqlite3"))
+
+import httpx
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from startup_investor_agent import agent as investor
+from startup_investor_agent.batch import APP_NAME, percentile
+from startup_investor_agent.mcp_pool import close_pools
+from startup_investor_agent.pipeline import build_parallel_pipeline
+from startup_investor_agent.search_index import search_run_callbacks
+
+from .offline import OfflineProfile, offline_copy
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PROMPT = "Evaluate Acme Robotics (https://acme.example)."
+USER_ID = "bench"
+
+# Metrics where a higher value is better; every other metric is a cost.
+HIGHER_IS_BETTER = ("sessions_per_minute",)
+
+
+def agent_graphs() -> dict[str, BaseAgent]:
+    begin_search_run, end_search_run = search_run_callbacks()
+    return {
+        "sequential": investor.orchestrator_agent,
+        "parallel": build_parallel_pipeline(
+            data_analyst=investor.data_analyst_agent,
+            product_analyst=investor.product_and_tech_analyst,
+            risk_analyst=investor.risk_analyst_agent,
+            synthesizer=investor.memo_synthesizer_agent,
+            branch_timeout=investor.BRANCH_TIMEOUT_SECONDS,
+            stage_timeout=investor.STAGE_TIMEOUT_SECONDS,
+            before_agent_callback=begin_search_run,
+            after_agent_callback=end_search_run,
+        ),
+    }
+
+
+def _message() -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=PROMPT)])
+
+
+async def _run_session(runner: Runner) -> float:
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+    started = time.perf_counter()
+    async for _ in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=_message()):
+        pass
+    return time.perf_counter() - started
+
+
+def _latency_metrics(latencies: list[float]) -> dict:
+    return {
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p90": round(percentile(latencies, 90), 3),
+    }
+
+
+async def measure_runner(agent: BaseAgent, profile: OfflineProfile, repeats: int, sessions: int) -> dict:
+    """Drives ``agent`` directly through a ``Runner``."""
+    runner = Runner(app_name=APP_NAME, agent=agent, session_service=InMemorySessionService())
+    # The first run pays for spawning stub MCP servers and lazy imports.
+    await _run_session(runner)
+
+    profile.reset_timings()
+    latencies = [await _run_session(runner) for _ in range(repeats)]
+    result = _latency_metrics(latencies)
+    result["agents"] = {
+        name: round(statistics.median(seconds), 3) for name, seconds in sorted(profile.agent_timings.items())
+    }
+    result["search_calls_per_session"] = profile.search_calls / repeats
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_run_session(runner) for _ in range(sessions)))
+    result["sessions_per_minute"] = round(sessions / (time.perf_counter() - started) * 60, 1)
+
+    # A fresh session service, so only these sessions are counted as retained.
+    runner = Runner(app_name=APP_NAME, agent=agent, session_service=InMemorySessionService())
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await asyncio.gather(*(_run_session(runner) for _ in range(sessions)))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["retained_kib_per_session"] = round((current - before) / sessions / 1024, 1)
+    result["peak_kib_per_session"] = round((peak - before) / sessions / 1024, 1)
+    return result
+
+
+async def measure_http(agent: BaseAgent, repeats: int, sessions: int) -> dict:
+    """Drives ``agent`` as ``root_agent`` through ``main.py``'s FastAPI app."""
+    # The ADK agent loader reads root_agent from the already imported module.
+    investor.root_agent = agent
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+        async def run_session() -> float:
+            response = await client.post(f"/apps/{APP_NAME}/users/{USER_ID}/sessions")
+            response.raise_for_status()
+            started = time.perf_counter()
+            response = await client.post(
+                "/run",
+                json={
+                    "app_name": APP_NAME,
+                    "user_id": USER_ID,
+                    "session_id": response.json()["id"],
+                    "new_message": _message().model_dump(mode="json", exclude_none=True),
+                },
+            )
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        await run_session()
+        result = _latency_metrics([await run_session() for _ in range(repeats)])
+        started = time.perf_counter()
+        await asyncio.gather(*(run_session() for _ in range(sessions)))
+        result["sessions_per_minute"] = round(sessions / (time.perf_counter() - started) * 60, 1)
+    return result
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Prints a metric table and returns the metrics that regressed."""
+    regressions = []
+    base, now = flatten(baseline), flatten(current)
+    print(f"{'metric':<62} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(now):
+        value = now[name]
+        if name not in base or not base[name]:
+            print(f"{name:<62} {'-':>10} {value:>10}")
+            continue
+        change = (value - base[name]) / base[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        print(f"{name:<62} {base[name]:>10} {value:>10} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    profile = OfflineProfile(
+        model_latency=args.model_latency,
+        search_latency=args.search_latency,
+        mcp_latency=args.mcp_latency,
+        mcp_pool_size=args.sessions,
+    )
+    results = {"runner": {}}
+    try:
+        # Like main.py's lifespan, warm the servers before any session needs one.
+        await profile.mcp_pool.start()
+        for mode, graph in agent_graphs().items():
+            results["runner"][mode] = await measure_runner(
+                offline_copy(graph, profile), profile, args.repeats, args.sessions
+            )
+        results["http"] = {
+            investor.ORCHESTRATION_MODE: await measure_http(
+                offline_copy(investor.root_agent, profile), args.repeats, args.sessions
+            )
+        }
+    finally:
+        await close_pools()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Seconds per stub model call.")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Seconds per stub search.")
+    parser.add_argument("--mcp-latency", type=float, default=0.02, help="Seconds per stub MCP tool call.")
+    parser.add_argument("--repeats", type=int, default=3, help="Single-session runs per graph.")
+    parser.add_argument("--sessions", type=int, default=8, help="Sessions run at once for throughput.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    config = {
+        key: getattr(args, key)
+        for key in ("model_latency", "search_latency", "mcp_latency", "repeats", "sessions")
+    }
+    results = asyncio.run(run(args))
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "metrics": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {args.baseline}")
+        print(json.dumps(results, indent=2))
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["config"] != config:
+        print(f"Baseline was recorded with {baseline['config']}; comparison may not be meaningful.")
+    regressions = compare(baseline["metrics"], results, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
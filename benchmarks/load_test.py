@@ -0,0 +1,197 @@
+"""Load-tests the job queue with 1, 2 and 4 uvicorn workers on the offline graph.
+
+For each worker count, serves ``benchmarks.offline_app`` (the real app with
+a replayed model, see ``offline_app.py``) with fresh SQLite stores, then:
+
+- creates ``--sessions`` sessions and queues a memo job for each through
+  ``POST /jobs``, polling ``GET /jobs/{job_id}`` until all are finished;
+- queues a follow-up turn in every session. Each worker count shows how many
+  were run by a different worker than the session's first turn, and that
+  those sessions carry both turns;
+- meanwhile requests ``GET /`` every 50 ms, to show the HTTP side stays
+  responsive while jobs run.
+
+It reports jobs per minute, job latency, the probe's latency and how the
+jobs spread over the workers. Throughput scales with workers only as far as
+there are cores for them.
+
+    python -m benchmarks.load_test --workers 1 2 4 --sessions 24
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from startup_investor_agent.batch import APP_NAME
+
+from .harness import PROMPT
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER_ID = "load"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def serve(workers: int, port: int, store_dir: str, latency: float, job_concurrency: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SESSION_STORE_PATH": os.path.join(store_dir, "sessions.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(store_dir, "jobs.sqlite3"),
+        "MEMO_STORE_PATH": os.path.join(store_dir, "memo_store.sqlite3"),
+        "RESEARCH_CACHE": "off",
+        "SEARCH_INDEX": "off",
+        "OFFLINE_MODEL_LATENCY": str(latency),
+        "JOB_CONCURRENCY": str(job_concurrency),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.offline_app:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=REPO_DIR,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60) -> None:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if (await client.get("/debug/jobs")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("The app did not start")
+
+
+async def run_jobs(client: httpx.AsyncClient, session_ids: list[str], text: str) -> list[dict]:
+    """Queues one job per session and polls until every job is finished."""
+    jobs = []
+    for session_id in session_ids:
+        response = await client.post(
+            "/jobs",
+            json={
+                "app_name": APP_NAME,
+                "user_id": USER_ID,
+                "session_id": session_id,
+                "new_message": {"role": "user", "parts": [{"text": text}]},
+            },
+        )
+        response.raise_for_status()
+        jobs.append(response.json())
+    pending = {job["job_id"] for job in jobs}
+    finished = {}
+    while pending:
+        await asyncio.sleep(0.2)
+        for job_id in list(pending):
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] in ("done", "failed", "cancelled"):
+                finished[job_id] = job
+                pending.discard(job_id)
+    return [finished[job["job_id"]] for job in jobs]
+
+
+async def probe(client: httpx.AsyncClient, latencies: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        (await client.get("/")).raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+async def measure(workers: int, sessions: int, latency: float, job_concurrency: int) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as store_dir:
+        server = serve(workers, port, store_dir, latency, job_concurrency)
+        try:
+            limits = httpx.Limits(max_connections=64)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+                await wait_ready(client)
+                # Let every worker finish starting before the clock starts.
+                await asyncio.sleep(2)
+                session_ids = []
+                for _ in range(sessions):
+                    response = await client.post(f"/apps/{APP_NAME}/users/{USER_ID}/sessions")
+                    response.raise_for_status()
+                    session_ids.append(response.json()["id"])
+
+                latencies: list[float] = []
+                stop = asyncio.Event()
+                prober = asyncio.create_task(probe(client, latencies, stop))
+                started = time.perf_counter()
+                first = await run_jobs(client, session_ids, PROMPT)
+                elapsed = time.perf_counter() - started
+                stop.set()
+                await prober
+
+                follow_up = await run_jobs(client, session_ids, "Summarise the recommendation in one sentence.")
+                moved = sum(a["worker"] != b["worker"] for a, b in zip(first, follow_up))
+                both_turns = 0
+                for session_id in session_ids:
+                    session = (await client.get(f"/apps/{APP_NAME}/users/{USER_ID}/sessions/{session_id}")).json()
+                    user_turns = [
+                        event for event in session["events"]
+                        if event["author"] == "user" and any(part.get("text") for part in event["content"]["parts"])
+                    ]
+                    both_turns += len(user_turns) == 2
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    run_seconds = [job["finished_at"] - job["created_at"] for job in first]
+    return {
+        "done": sum(job["status"] == "done" for job in first + follow_up),
+        "jobs": len(first) + len(follow_up),
+        "jobs_per_minute": len(first) / elapsed * 60,
+        "job_p50": statistics.median(run_seconds),
+        "job_p95": percentile(run_seconds, 0.95),
+        "probe_p50_ms": statistics.median(latencies) * 1000,
+        "probe_p95_ms": percentile(latencies, 0.95) * 1000,
+        "per_worker": sorted(collections.Counter(job["worker"] for job in first).values(), reverse=True),
+        "moved": moved,
+        "both_turns": both_turns,
+    }
+
+
+async def main(worker_counts: list[int], sessions: int, latency: float, job_concurrency: int) -> None:
+    print(f"{os.cpu_count()} CPUs; {sessions} memo jobs; {latency}s per model call; JOB_CONCURRENCY={job_concurrency}")
+    print(
+        f"{'workers':>7} {'jobs/min':>9} {'job p50':>8} {'job p95':>8} {'GET / p50':>10} {'GET / p95':>10}"
+        f"  {'jobs per worker':<16} {'turn 2 on another worker':>25}"
+    )
+    for workers in worker_counts:
+        r = await measure(workers, sessions, latency, job_concurrency)
+        print(
+            f"{workers:>7} {r['jobs_per_minute']:>9.1f} {r['job_p50']:>7.2f}s {r['job_p95']:>7.2f}s"
+            f" {r['probe_p50_ms']:>8.1f}ms {r['probe_p95_ms']:>8.1f}ms  {str(r['per_worker']):<16}"
+            f" {r['moved']:>10} ({r['both_turns']}/{sessions} with both turns)"
+            + ("" if r["done"] == r["jobs"] else f"  {r['jobs'] - r['done']} not done")
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare.")
+    parser.add_argument("--sessions", type=int, default=24, help="Memo jobs per worker count.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per stub model call.")
+    parser.add_argument("--job-concurrency", type=int, default=4, help="JOB_CONCURRENCY of each worker.")
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.sessions, args.latency, args.job_concurrency))
@@ -0,0 +1,119 @@
+"""Measures an incremental memo refresh against a full evaluation.
+
+Runs the parallel pipeline offline three times for the same startup:
+
+1. a first evaluation, which stores every section;
+2. a refresh with nothing stale, which returns the stored memo;
+3. a refresh after the market data has aged out and new funding news appeared,
+   which reruns the data analyst, the risk analyst that reads its output, and
+   the synthesis, but keeps the product analysis.
+
+It then runs the sequential graph for a session with a follow-up question,
+and exits non-zero if the short reply to it replaced the stored memo.
+
+    python -m benchmarks.memo_refresh --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from startup_investor_agent import memo_store
+from startup_investor_agent.mcp_pool import close_pools
+from startup_investor_agent.memo_store import REFRESH_STATE, get_memo_store
+
+from .harness import PROMPT, agent_graphs
+from .offline import OfflineProfile, offline_copy
+
+SUBJECT = "site:acme.example"
+
+
+async def run(runner: Runner, profile: OfflineProfile, state: dict) -> tuple[float, int, str]:
+    session = await runner.session_service.create_session(app_name="benchmark", user_id="bench", state=state)
+    calls = profile.model_calls
+    started = time.perf_counter()
+    message = types.Content(role="user", parts=[types.Part(text=PROMPT)])
+    async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+        pass
+    elapsed = time.perf_counter() - started
+    # Agents answered from the store end before their after-callbacks, so only
+    # the ones that actually ran have a timing.
+    agents = ", ".join(sorted(set(profile.agent_timings) - {"startup_investor_pipeline", "parallel_research"}))
+    profile.reset_timings()
+    return elapsed, profile.model_calls - calls, agents
+
+
+async def follow_up_keeps_memo(latency: float) -> bool:
+    """Asks a follow-up question in an evaluated session; the stored memo must not change."""
+    profile = OfflineProfile(model_latency=latency, search_latency=latency / 2, mcp_latency=latency / 4)
+    agent = offline_copy(agent_graphs()["sequential"], profile)
+    runner = Runner(app_name="benchmark", agent=agent, session_service=InMemorySessionService())
+    session = await runner.session_service.create_session(app_name="benchmark", user_id="bench")
+    turns = [PROMPT, "Thanks! What is the biggest risk?"]
+    memos = []
+    for turn, text in enumerate(turns):
+        if turn:
+            profile.fixture["responses"][agent.name] = "The biggest risk is competition."
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            pass
+        memos.append(get_memo_store().memo(SUBJECT))
+    kept = memos[0] is not None and memos[1] == memos[0]
+    print(
+        f"follow-up question: stored memo has {len(memos[1]['sections']) if memos[1] else 0} sections,"
+        f" {'unchanged' if kept else 'REPLACED'} by the reply"
+    )
+    return kept
+
+
+async def main(latency: float) -> int:
+    os.environ["RESEARCH_CACHE"] = "off"
+    with tempfile.TemporaryDirectory() as store_dir:
+        os.environ["MEMO_STORE_PATH"] = os.path.join(store_dir, "memo_store.sqlite3")
+        memo_store.reset_memo_store()
+        profile = OfflineProfile(model_latency=latency, search_latency=latency / 2, mcp_latency=latency / 4)
+        agent = offline_copy(agent_graphs()["parallel"], profile)
+        runner = Runner(app_name="benchmark", agent=agent, session_service=InMemorySessionService())
+        try:
+            results = [("full evaluation", await run(runner, profile, {}))]
+            results.append(("refresh, nothing stale", await run(runner, profile, dict(REFRESH_STATE))))
+
+            before = get_memo_store().memo(SUBJECT)["sections"]
+            get_memo_store().expire(SUBJECT, "market_data_analysis_output")
+            profile.fixture["responses"]["data_analyst_agent"] += (
+                "\n   *   Series B, October 2026, $40M led by Summit Partners.\n"
+            )
+            results.append(("refresh, market data stale", await run(runner, profile, dict(REFRESH_STATE))))
+            after = get_memo_store().memo(SUBJECT)["sections"]
+        finally:
+            await close_pools()
+
+        full_seconds, full_calls, _ = results[0][1]
+        for label, (seconds, calls, agents) in results:
+            print(
+                f"{label:<28} {seconds:>7.3f}s ({seconds / full_seconds:>4.0%})"
+                f"  {calls:>3} model calls ({calls / full_calls:>4.0%})  ran: {agents or '-'}"
+            )
+        changed = [new["number"] for old, new in zip(before, after) if old["input_hash"] != new["input_hash"]]
+        print(f"memo sections with new inputs after the last refresh: {changed} of {len(after)}")
+
+        memo_store.reset_memo_store()
+        os.environ["MEMO_STORE_PATH"] = os.path.join(store_dir, "follow_up.sqlite3")
+        try:
+            kept = await follow_up_keeps_memo(latency)
+        finally:
+            await close_pools()
+    return 0 if kept else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stub model call.")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.latency)))
@@ -0,0 +1,168 @@
+"""Offline stand-ins for the services behind ``root_agent``.
+
+``offline_copy`` clones a real agent graph from ``startup_investor_agent``,
+keeping its prompts, callbacks, orchestration agents and ``AgentTool`` wiring.
+It swaps the live services for local stand-ins:
+
+- every model becomes a ``ReplayModel`` that replays the recorded fixture;
+- ``google_search`` (built in, or wrapped in ``GoogleSearchAgentTool``) becomes
+  a local function returning recorded results;
+- pooled MCP toolsets run on a pool of ``stub_mcp_server.py`` processes, served
+  by the real ``McpServerPool``;
+- ``fetch_page`` runs the real ``PageFetcher``, with a fresh cache, against a
+  local ``FixtureSite`` in place of the startup's website, and the stub MCP
+  pool as its browser.
+
+Each copied agent also records how long it ran, in ``OfflineProfile.agent_timings``.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import FunctionTool
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.google_search_agent_tool import GoogleSearchAgentTool
+from google.adk.tools.google_search_tool import GoogleSearchTool
+
+from startup_investor_agent.mcp_pool import McpServerPool, PooledMcpToolset
+from startup_investor_agent.page_fetch import PageFetcher, fetch_page_tool
+
+from .fixture_site import FixtureSite
+from .stub_model import ReplayModel
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PATH = os.path.join(BENCHMARKS_DIR, "fixtures", "recorded_responses.json")
+STUB_MCP_SERVER = os.path.join(BENCHMARKS_DIR, "stub_mcp_server.py")
+
+# The order the root prompt asks for; any other agent tools follow in tool order.
+SPECIALIST_ORDER = ["data_analyst_agent", "product_and_tech_analyst", "risk_analyst_agent"]
+
+
+def load_fixture(path: str = FIXTURE_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def stub_search_tool(profile: "OfflineProfile") -> FunctionTool:
+    async def google_search(query: str) -> dict:
+        """Searches the web and returns the top results."""
+        profile.search_calls += 1
+        await asyncio.sleep(profile.search_latency)
+        return {"query": query, "results": profile.fixture.get("search_results", [])}
+
+    return FunctionTool(google_search)
+
+
+def stub_fetch_tool(profile: "OfflineProfile") -> FunctionTool:
+    async def fetch_page(url: str) -> dict:
+        """Reads a web page and returns its title and text."""
+        return await profile.page_fetcher.fetch(profile.site.local_url(url))
+
+    return FunctionTool(fetch_page)
+
+
+class OfflineProfile:
+    """Latencies and recorded data for one offline benchmark configuration."""
+
+    def __init__(
+        self,
+        fixture: Optional[dict] = None,
+        model_latency: float = 0.2,
+        agent_latency: Optional[dict[str, float]] = None,
+        search_latency: float = 0.1,
+        mcp_latency: float = 0.05,
+        mcp_pool_size: int = 4,
+    ):
+        self.fixture = fixture or load_fixture()
+        self.model_latency = model_latency
+        self.agent_latency = agent_latency or {}
+        self.search_latency = search_latency
+        self.search_calls = 0
+        self.models: list[ReplayModel] = []
+        self.agent_timings: dict[str, list[float]] = defaultdict(list)
+        self._started: dict[tuple[str, str], float] = {}
+        self.search_tool = stub_search_tool(self)
+        self.mcp_pool = McpServerPool(
+            name="stub_playwright",
+            command=sys.executable,
+            args=[STUB_MCP_SERVER, "--latency", str(mcp_latency)],
+            timeout=30,
+            min_size=mcp_pool_size,
+            max_size=mcp_pool_size,
+        )
+        self.site = FixtureSite(self.fixture.get("page_snapshot", ""))
+        self.page_fetcher = PageFetcher(cache_dir=tempfile.mkdtemp(prefix="pages-"), browser_pool=self.mcp_pool)
+        self.fetch_tool = stub_fetch_tool(self)
+
+    def model(self, tool_sequence: list[str]) -> ReplayModel:
+        model = ReplayModel(
+            fixture=self.fixture,
+            latency=self.model_latency,
+            agent_latency=self.agent_latency,
+            tool_sequence=tool_sequence,
+        )
+        self.models.append(model)
+        return model
+
+    @property
+    def model_calls(self) -> int:
+        return sum(model.calls for model in self.models)
+
+    def start_timer(self, callback_context: CallbackContext) -> None:
+        self._started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+        return None
+
+    def stop_timer(self, callback_context: CallbackContext) -> None:
+        started = self._started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is not None:
+            self.agent_timings[callback_context.agent_name].append(time.perf_counter() - started)
+        return None
+
+    def reset_timings(self) -> None:
+        self.agent_timings.clear()
+        self._started.clear()
+        self.search_calls = 0
+
+
+def _as_list(callback) -> list:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+def _offline_tool(tool, profile: OfflineProfile):
+    if isinstance(tool, (GoogleSearchTool, GoogleSearchAgentTool)):
+        return profile.search_tool
+    if tool is fetch_page_tool:
+        return profile.fetch_tool
+    if isinstance(tool, AgentTool):
+        return AgentTool(agent=offline_copy(tool.agent, profile), skip_summarization=tool.skip_summarization)
+    if isinstance(tool, PooledMcpToolset):
+        return PooledMcpToolset(pool=profile.mcp_pool, tool_filter=tool.tool_filter)
+    return tool
+
+
+def offline_copy(agent: BaseAgent, profile: OfflineProfile) -> BaseAgent:
+    """Clones ``agent`` and everything below it onto the offline stand-ins."""
+    update = {
+        "sub_agents": [offline_copy(sub_agent, profile) for sub_agent in agent.sub_agents],
+        # Timing wraps the agent's own callbacks, so cache lookups and lease
+        # releases count towards its latency.
+        "before_agent_callback": [profile.start_timer, *_as_list(agent.before_agent_callback)],
+        "after_agent_callback": [*_as_list(agent.after_agent_callback), profile.stop_timer],
+    }
+    if isinstance(agent, LlmAgent):
+        tools = [_offline_tool(tool, profile) for tool in agent.tools]
+        agent_tools = [tool.name for tool in tools if isinstance(tool, AgentTool)]
+        order = [name for name in SPECIALIST_ORDER if name in agent_tools]
+        update["tools"] = tools
+        update["model"] = profile.model(order + [name for name in agent_tools if name not in order])
+    return agent.clone(update=update)
@@ -0,0 +1,20 @@
+"""``main.app`` serving the offline agent graph, for uvicorn with several workers.
+
+Each worker process imports this module and gets its own offline stand-ins
+(see ``offline.py``), with ``OFFLINE_MODEL_LATENCY`` seconds (default 0.05)
+per model call.
+
+    uvicorn benchmarks.offline_app:app --workers 2
+"""
+
+import os
+
+from startup_investor_agent import agent as investor
+
+from .offline import OfflineProfile, offline_copy
+
+_latency = float(os.getenv("OFFLINE_MODEL_LATENCY", "0.05"))
+profile = OfflineProfile(model_latency=_latency, search_latency=_latency / 2, mcp_latency=_latency / 4)
+investor.root_agent = offline_copy(investor.root_agent, profile)
+
+from main import app  # noqa: E402  after the root agent is replaced
@@ -0,0 +1,99 @@
+"""Measures the tiers of ``fetch_page`` against rendering every page in a browser.
+
+Fetches the pages of a local ``FixtureSite`` with the real ``PageFetcher``,
+using the stub Playwright MCP pool as its browser, and reports per page:
+
+- cold: the first fetch, by plain HTTP (``/gzip`` compressed) or, for the script-rendered ``/app``
+  and the ``/blocked`` page, in the browser;
+- warm: again within ``PAGE_CACHE_FRESH_SECONDS``, from the cache;
+- stale: after the cache went stale, revalidated with a conditional request
+  where the site supports it;
+- browser: the same page through ``browser_navigate`` and ``browser_snapshot``,
+  as the agents fetched every page before.
+
+It then fetches ``/offline``, which the browser fails to load, twice: both
+fetches must fail, since a failed render is not cached. Last, it fetches
+``/slow`` many times at once to show the per-host limit.
+
+    python -m benchmarks.page_fetch --browser-latency 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+from startup_investor_agent.mcp_pool import McpServerPool
+from startup_investor_agent.page_fetch import PageFetcher
+
+from .fixture_site import FixtureSite
+from .offline import STUB_MCP_SERVER, load_fixture
+
+PAGES = ["/", "/pricing", "/gzip", "/app", "/blocked"]
+
+
+async def timed(fetch) -> tuple[float, dict]:
+    started = time.perf_counter()
+    page = await fetch
+    return time.perf_counter() - started, page
+
+
+async def browse(pool: McpServerPool, url: str) -> dict:
+    async with pool.session() as session:
+        await session.call_tool("browser_navigate", arguments={"url": url})
+        result = await session.call_tool("browser_snapshot", arguments={})
+    return {"tier": "browser", "text": "\n".join(item.text for item in result.content if getattr(item, "text", None))}
+
+
+async def main(browser_latency: float, concurrent: int) -> None:
+    site = FixtureSite(load_fixture().get("page_snapshot", ""))
+    pool = McpServerPool(
+        name="stub_playwright",
+        command=sys.executable,
+        args=[STUB_MCP_SERVER, "--latency", str(browser_latency)],
+        timeout=30,
+        min_size=2,
+        max_size=2,
+    )
+    await pool.start()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = PageFetcher(cache_dir=cache_dir, browser_pool=pool)
+            print(f"{'page':<10} {'cold':>16} {'warm':>16} {'stale':>18} {'browser':>9} {'chars':>6}")
+            for path in PAGES:
+                url = site.base_url + path
+                cold_s, cold = await timed(fetcher.fetch(url))
+                warm_s, warm = await timed(fetcher.fetch(url))
+                fetcher.fresh_seconds = 0
+                stale_s, stale = await timed(fetcher.fetch(url))
+                fetcher.fresh_seconds = 3600
+                browser_s, _ = await timed(browse(pool, url))
+                print(
+                    f"{path:<10} {cold['tier']:>8} {cold_s:>6.3f}s {warm['tier']:>8} {warm_s:>6.3f}s"
+                    f" {stale['tier']:>11} {stale_s:>5.3f}s {browser_s:>8.3f}s {len(cold.get('text', '')):>6}"
+                )
+            offline = [await fetcher.fetch(site.base_url + "/offline") for _ in range(2)]
+            print(f"/offline   {', '.join(page['tier'] for page in offline)}: {offline[-1].get('error', '')}")
+            print("\nTiers:", fetcher.metrics())
+            await fetcher.aclose()
+
+            fetcher = PageFetcher(cache_dir=cache_dir, browser_pool=pool, fresh_seconds=0, per_host=2)
+            site.reset()
+            elapsed, _ = await timed(asyncio.gather(*(fetcher.fetch(f"{site.base_url}/slow") for _ in range(concurrent))))
+            print(
+                f"\n{concurrent} concurrent fetches of /slow ({site.slow_seconds}s each, {fetcher.per_host} per host):"
+                f" {elapsed:.2f}s, at most {site.max_concurrent} in flight at the site"
+            )
+            await fetcher.aclose()
+    finally:
+        await pool.close()
+        site.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--browser-latency", type=float, default=0.5, help="Seconds per stub browser tool call.")
+    parser.add_argument("--concurrent", type=int, default=8, help="Concurrent fetches of one slow page.")
+    args = parser.parse_args()
+    asyncio.run(main(args.browser_latency, args.concurrent))
@@ -0,0 +1,102 @@
+"""Compares end-to-end latency of the sequential and parallel orchestration modes.
+
+Every model call goes to a local ``StubModel`` with a fixed latency, so the
+difference between the two runs is purely the orchestration overhead.
+
+    python -m benchmarks.parallel_latency --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# The stub memos stay out of the real memo store.
+os.environ.setdefault("MEMO_STORE_PATH", os.path.join(tempfile.mkdtemp(), "memo_store.sqlite3"))
+
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from startup_investor_agent import agent as investor
+from startup_investor_agent.pipeline import STAGE_TIMINGS_KEY, build_parallel_pipeline
+
+from .stub_model import StubModel
+
+SPECIALIST_ORDER = ["data_analyst_agent", "product_and_tech_analyst", "risk_analyst_agent"]
+
+
+def stub_specialists(latency: float) -> dict:
+    return {
+        name: getattr(investor, attr).clone(update={"model": StubModel(latency=latency), "tools": []})
+        for name, attr in [
+            ("data_analyst_agent", "data_analyst_agent"),
+            ("product_and_tech_analyst", "product_and_tech_analyst"),
+            ("risk_analyst_agent", "risk_analyst_agent"),
+        ]
+    }
+
+
+def build_sequential(latency: float) -> LlmAgent:
+    specialists = stub_specialists(latency)
+    return investor.orchestrator_agent.clone(
+        update={
+            "model": StubModel(latency=latency, tool_sequence=SPECIALIST_ORDER),
+            "tools": [AgentTool(agent=specialists[name]) for name in SPECIALIST_ORDER],
+        }
+    )
+
+
+def build_parallel(latency: float, branch_timeout: float):
+    specialists = stub_specialists(latency)
+    synthesizer = investor.memo_synthesizer_agent.clone(
+        update={"model": StubModel(latency=latency), "tools": []}
+    )
+    return build_parallel_pipeline(
+        data_analyst=specialists["data_analyst_agent"],
+        product_analyst=specialists["product_and_tech_analyst"],
+        risk_analyst=specialists["risk_analyst_agent"],
+        synthesizer=synthesizer,
+        branch_timeout=branch_timeout,
+    )
+
+
+async def run_once(agent, prompt: str) -> tuple[float, dict]:
+    session_service = InMemorySessionService()
+    runner = Runner(app_name="benchmark", agent=agent, session_service=session_service)
+    session = await session_service.create_session(app_name="benchmark", user_id="bench")
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+
+    started = time.perf_counter()
+    async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+        pass
+    elapsed = time.perf_counter() - started
+
+    session = await session_service.get_session(
+        app_name="benchmark", user_id="bench", session_id=session.id
+    )
+    return elapsed, session.state.get(STAGE_TIMINGS_KEY, {})
+
+
+async def main(latency: float, branch_timeout: float) -> None:
+    # Cached briefings would hide the orchestration cost being measured.
+    os.environ["RESEARCH_CACHE"] = "off"
+    prompt = "Evaluate Acme Robotics (https://acme.example)."
+    sequential, _ = await run_once(build_sequential(latency), prompt)
+    parallel, timings = await run_once(build_parallel(latency, branch_timeout), prompt)
+
+    print(f"sequential end-to-end: {sequential:.3f}s")
+    print(f"parallel end-to-end:   {parallel:.3f}s ({1 - parallel / sequential:.0%} faster)")
+    for stage, timing in timings.items():
+        print(f"  {stage:<55} {timing['seconds']:>7.3f}s  {timing['status']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per stub model call.")
+    parser.add_argument("--branch-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.branch_timeout))
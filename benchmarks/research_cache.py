@@ -0,0 +1,36 @@
+"""Measures a cold run against a warm research-cache hit for the specialist agents.
+
+    python -m benchmarks.research_cache --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from startup_investor_agent import research_cache
+
+from .parallel_latency import build_parallel, run_once
+
+
+async def main(latency: float) -> None:
+    prompt = "Evaluate Acme Robotics (https://www.acme.example/)."
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["RESEARCH_CACHE"] = "on"
+        os.environ["RESEARCH_CACHE_PATH"] = os.path.join(cache_dir, "research_cache.sqlite3")
+        research_cache.reset_cache()
+
+        cold, cold_timings = await run_once(build_parallel(latency, branch_timeout=300), prompt)
+        warm, warm_timings = await run_once(build_parallel(latency, branch_timeout=300), prompt)
+
+    print(f"cold run: {cold:.3f}s")
+    print(f"warm run: {warm:.3f}s (only the memo synthesis calls the model)")
+    for stage, timing in warm_timings.items():
+        print(f"  {stage:<55} {cold_timings[stage]['seconds']:>7.3f}s -> {timing['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per stub model call.")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,88 @@
+"""Measures how many external searches the shared search index saves per memo.
+
+Runs both orchestration graphs offline with the recorded search queries, which
+overlap across specialists the way live ones do (founders, competitors), with:
+
+- ``SEARCH_INDEX=off``: every search is external;
+- ``run``: searches are shared within the evaluation;
+- ``shared``: also across evaluations of the same startup, so the second
+  evaluation in a row is shown too.
+
+For each it reports external and local searches, the hit rate, model calls
+and latency.
+
+    python -m benchmarks.search_index --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from startup_investor_agent import search_index
+from startup_investor_agent.mcp_pool import close_pools
+from startup_investor_agent.search_index import SEARCH_INDEX_STATE_KEY
+
+from .harness import PROMPT, agent_graphs
+from .offline import OfflineProfile, offline_copy
+
+CONFIGURATIONS = [("off", 1), ("run", 1), ("shared", 2)]
+
+
+async def evaluate(runner: Runner, profile: OfflineProfile) -> dict:
+    session = await runner.session_service.create_session(app_name="benchmark", user_id="bench")
+    searches, calls = profile.search_calls, profile.model_calls
+    started = time.perf_counter()
+    message = types.Content(role="user", parts=[types.Part(text=PROMPT)])
+    async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+        pass
+    elapsed = time.perf_counter() - started
+    session = await runner.session_service.get_session(app_name="benchmark", user_id="bench", session_id=session.id)
+    stats = session.state.get(SEARCH_INDEX_STATE_KEY, {})
+    return {
+        "seconds": elapsed,
+        "external": profile.search_calls - searches,
+        "local": stats.get("local", 0),
+        "hit_rate": stats.get("hit_rate", 0.0),
+        "kinds": stats.get("local_by_kind", {}),
+        "model_calls": profile.model_calls - calls,
+    }
+
+
+async def main(latency: float) -> None:
+    os.environ["RESEARCH_CACHE"] = "off"
+    os.environ["MEMO_STORE_PATH"] = os.path.join(tempfile.mkdtemp(), "memo_store.sqlite3")
+    graphs = agent_graphs()
+    print(f"{'graph':<11} {'SEARCH_INDEX':<13} {'eval':>4} {'external':>9} {'local':>6} {'hit rate':>9} {'model calls':>12} {'seconds':>8}  answered locally")
+    try:
+        for graph_name, graph in graphs.items():
+            for mode, evaluations in CONFIGURATIONS:
+                with tempfile.TemporaryDirectory() as index_dir:
+                    os.environ["SEARCH_INDEX"] = mode
+                    os.environ["SEARCH_INDEX_PATH"] = os.path.join(index_dir, "search_index.sqlite3")
+                    search_index.reset_search_index()
+                    profile = OfflineProfile(model_latency=latency, search_latency=latency / 2, mcp_latency=latency / 4)
+                    runner = Runner(
+                        app_name="benchmark", agent=offline_copy(graph, profile), session_service=InMemorySessionService()
+                    )
+                    for n in range(1, evaluations + 1):
+                        r = await evaluate(runner, profile)
+                        kinds = ", ".join(f"{kind} {count}" for kind, count in sorted(r["kinds"].items())) or "-"
+                        print(
+                            f"{graph_name:<11} {mode:<13} {n:>4} {r['external']:>9} {r['local']:>6} {r['hit_rate']:>9.0%}"
+                            f" {r['model_calls']:>12} {r['seconds']:>8.2f}  {kinds}"
+                        )
+    finally:
+        await close_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stub model call.")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,186 @@
+"""Soak test of the session backends: RSS and stored bytes over thousands of sessions.
+
+Each session gets ``--turns`` evaluations replayed straight into the session
+service, one event at a time as the runner would append them: the user's
+message, a call and a response per specialist with its recorded output, and
+the final memo with the specialists' outputs in its state delta. ``--users``
+clients run at once, and each pauses ``--think`` seconds between turns. A
+bounded backend sweeps idle sessions every second, like ``main.py`` does.
+
+Every backend runs in a fresh interpreter so its RSS is measured on its own:
+
+- ``adk-memory``: ADK's ``InMemorySessionService``, which the app used to
+  fall back to;
+- ``memory`` and ``sqlite``: ``BoundedSessionService`` on an in-memory
+  database and on a file.
+
+    python -m benchmarks.session_soak --sessions 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from startup_investor_agent.session_store import BoundedSessionService
+
+from .harness import PROMPT
+from .offline import load_fixture
+
+APP_NAME = "soak"
+BACKENDS = ("adk-memory", "memory", "sqlite")
+SPECIALISTS = {
+    "data_analyst_agent": "market_data_analysis_output",
+    "product_and_tech_analyst": "final_product_and_tech_output",
+    "risk_analyst_agent": "final_risk_assessment_output",
+}
+
+
+def rss_mib() -> float:
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def turn_events(fixture: dict, turn: int) -> list[Event]:
+    invocation = f"e-{turn}-{time.monotonic_ns()}"
+    root = "startup_investor_agent"
+
+    def event(author: str, actions: EventActions = None, **parts) -> Event:
+        return Event(
+            invocation_id=invocation,
+            author=author,
+            content=types.Content(role="user" if author == "user" else "model", parts=[types.Part(**parts)]),
+            actions=actions or EventActions(),
+        )
+
+    events = [event("user", text=f"{PROMPT} (turn {turn})")]
+    for name in SPECIALISTS:
+        events.append(event(root, function_call=types.FunctionCall(id=f"{invocation}-{name}", name=name, args={"request": PROMPT})))
+        events.append(
+            event(
+                root,
+                function_response=types.FunctionResponse(
+                    id=f"{invocation}-{name}", name=name, response={"result": fixture["responses"][name]}
+                ),
+            )
+        )
+    memo = fixture["responses"]["investment_memo_synthesizer"]
+    state = {key: fixture["responses"][name] for name, key in SPECIALISTS.items()}
+    events.append(event(root, EventActions(state_delta={**state, "investment_memo": memo}), text=memo))
+    return events
+
+
+async def soak(args: argparse.Namespace) -> dict:
+    fixture = load_fixture()
+    if args.backend == "adk-memory":
+        service = InMemorySessionService()
+    else:
+        path = ":memory:" if args.backend == "memory" else os.path.join(args.store_dir, "sessions.sqlite3")
+        service = BoundedSessionService(path, max_turns=args.max_turns, max_bytes=args.max_bytes, idle_ttl=args.idle_ttl)
+
+    async def sweep() -> None:
+        while isinstance(service, BoundedSessionService):
+            await asyncio.sleep(1)
+            await service.evict_idle()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for n in range(args.sessions):
+        queue.put_nowait(n)
+
+    async def client() -> None:
+        while not queue.empty():
+            n = queue.get_nowait()
+            session = await service.create_session(app_name=APP_NAME, user_id=f"user-{n % 50}")
+            for turn in range(args.turns):
+                if turn:
+                    await asyncio.sleep(args.think)
+                for event in turn_events(fixture, turn):
+                    await service.append_event(session, event)
+            if n % 250 == 0:
+                samples.append((n, round(rss_mib(), 1)))
+
+    samples: list[tuple[int, float]] = []
+    start_rss = rss_mib()
+    started = time.perf_counter()
+    sweeper = asyncio.create_task(sweep())
+    await asyncio.gather(*(client() for _ in range(args.users)))
+    elapsed = time.perf_counter() - started
+    sweeper.cancel()
+
+    result = {
+        "backend": args.backend,
+        "seconds": round(elapsed, 1),
+        "rss_start_mib": round(start_rss, 1),
+        "rss_end_mib": round(rss_mib(), 1),
+        "rss_peak_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_samples": samples,
+    }
+    if isinstance(service, BoundedSessionService):
+        metrics = await service.metrics()
+        result.update(
+            sessions_kept=metrics["sessions"],
+            stored_mib=round(metrics["stored_bytes"] / 2**20, 1),
+            compactions=metrics["compactions"],
+            evictions=metrics["evictions"],
+        )
+    else:
+        sessions = service.sessions.get(APP_NAME, {})
+        kept = [session for user in sessions.values() for session in user.values()]
+        result.update(
+            sessions_kept=len(kept),
+            stored_mib=round(sum(len(s.model_dump_json()) for s in kept) / 2**20, 1),
+        )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=BACKENDS, help="Run one backend in this process.")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=4, help="Evaluations per session.")
+    parser.add_argument("--users", type=int, default=50, help="Sessions in progress at once.")
+    parser.add_argument("--think", type=float, default=0.5, help="Seconds between a session's turns.")
+    parser.add_argument("--max-turns", type=int, default=2, help="Turns kept whole by the bounded backends.")
+    parser.add_argument("--max-bytes", type=int, default=2_000_000)
+    parser.add_argument("--idle-ttl", type=float, default=5.0, help="Seconds before an idle session is evicted.")
+    parser.add_argument("--store-dir", default=None)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(asyncio.run(soak(args))))
+        return
+
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.users} at once")
+    print(f"{'backend':<12} {'seconds':>8} {'kept':>6} {'stored MiB':>11} {'RSS start':>10} {'RSS end':>8} {'RSS peak':>9}")
+    options = [arg for arg in sys.argv[1:]]
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as store_dir:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.session_soak", "--backend", backend, "--store-dir", store_dir, *options],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{backend:<12} {r['seconds']:>8} {r['sessions_kept']:>6} {r['stored_mib']:>11}"
+            f" {r['rss_start_mib']:>10} {r['rss_end_mib']:>8} {r['rss_peak_mib']:>9}"
+        )
+        print(f"{'':<12} RSS by sessions started: {', '.join(f'{n}: {mib}' for n, mib in r['rss_samples'])}")
+
+
+if __name__ == "__main__":
+    main()
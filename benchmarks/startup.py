@@ -0,0 +1,183 @@
+"""Checks a worker's startup time and memory against a budget.
+
+Imports ``main`` in fresh interpreters (``-X importtime``) and reports:
+
+- the median import time and resident memory after importing ``main``;
+- what is deliberately left for first use: the MCP client libraries and the
+  agent graph must not be loaded by the import;
+- the time and memory the agent graph adds when it is first used;
+- the slowest imports, by cumulative time;
+- with ``--workers N``, the resident memory of each ``uvicorn main:app
+  --workers N`` worker once the app has started.
+
+Exits non-zero when the import takes longer than ``--budget-seconds``, uses
+more than ``--budget-mib``, or loads what should be lazy.
+
+    python -m benchmarks.startup --runs 5 --workers 2
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter, with -X importtime writing to stderr.
+PROBE = """
+import json, sys, time
+def rss_mib():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+result = {
+    "import_seconds": imported - started,
+    "rss_mib": rss_mib(),
+    "modules": len(sys.modules),
+    "mcp_loaded": "mcp" in sys.modules,
+    "graph_built": "startup_investor_agent.data_analyst.agent" in sys.modules,
+}
+from startup_investor_agent import agent
+agent.root_agent
+result["first_use_seconds"] = time.perf_counter() - imported
+result["first_use_rss_mib"] = rss_mib()
+print(json.dumps(result))
+"""
+
+
+def probe() -> tuple[dict, str]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def slowest_imports(importtime: str, top: int) -> list[tuple[str, float]]:
+    """The ``top`` imports with the longest cumulative time."""
+    imports = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            depth = (len(name) - len(name.lstrip())) // 2
+            imports.append((name.strip(), int(cumulative) / 1e6, depth))
+    # Only main and the modules it imports directly, so the libraries nested
+    # under them do not crowd the list.
+    direct = [(name, seconds) for name, seconds, depth in imports if depth <= 1]
+    return sorted(direct, key=lambda item: -item[1])[:top]
+
+
+def rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def children(pid: int) -> list[int]:
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    return pids
+
+
+def _is_resource_tracker(pid: int) -> bool:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return b"resource_tracker" in f.read()
+
+
+def worker_rss(workers: int, timeout: float = 60) -> dict:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_DIR,
+    )
+    try:
+        started = time.perf_counter()
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/debug/mcp_pools", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.1)
+        ready = time.perf_counter() - started
+        # Every worker has to be up, not just the one that answered.
+        while len(children(server.pid)) < workers and time.perf_counter() - started < timeout:
+            time.sleep(0.1)
+        time.sleep(1.0)
+        worker_pids = [pid for pid in children(server.pid) if not _is_resource_tracker(pid)]
+        return {
+            "ready_seconds": round(ready, 2),
+            "supervisor_mib": round(rss_mib(server.pid), 1),
+            "worker_mib": [round(rss_mib(pid), 1) for pid in worker_pids],
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(runs: int, budget_seconds: float, budget_mib: float, workers: int, top: int) -> int:
+    results, importtime = [], ""
+    for _ in range(runs):
+        result, importtime = probe()
+        results.append(result)
+    import_seconds = statistics.median(r["import_seconds"] for r in results)
+    rss = statistics.median(r["rss_mib"] for r in results)
+    first_use = statistics.median(r["first_use_seconds"] for r in results)
+    first_use_rss = statistics.median(r["first_use_rss_mib"] for r in results)
+    print(f"import main:       {import_seconds:.2f}s, {rss:.0f} MiB resident, {results[-1]['modules']} modules (median of {runs})")
+    print(f"first use of root_agent: +{first_use:.3f}s, {first_use_rss - rss:+.1f} MiB")
+    print(f"MCP client loaded by import: {results[-1]['mcp_loaded']}; agent graph built by import: {results[-1]['graph_built']}")
+    print("\nSlowest imports (cumulative):")
+    for name, seconds in slowest_imports(importtime, top):
+        print(f"  {seconds:>6.3f}s  {name}")
+    if workers:
+        print(f"\nuvicorn --workers {workers}:", worker_rss(workers))
+
+    failures = []
+    if import_seconds > budget_seconds:
+        failures.append(f"import took {import_seconds:.2f}s, budget {budget_seconds:.2f}s")
+    if rss > budget_mib:
+        failures.append(f"import used {rss:.0f} MiB, budget {budget_mib:.0f} MiB")
+    if any(r["mcp_loaded"] for r in results):
+        failures.append("importing main loaded the MCP client libraries")
+    if any(r["graph_built"] for r in results):
+        failures.append("importing main built the agent graph")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"\nWithin budget ({budget_seconds:.2f}s, {budget_mib:.0f} MiB).")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to import main in.")
+    parser.add_argument("--budget-seconds", type=float, default=2.5, help="Median import time allowed.")
+    parser.add_argument("--budget-mib", type=float, default=140, help="Median resident memory allowed after import.")
+    parser.add_argument("--workers", type=int, default=0, help="Also start uvicorn with this many workers and report their memory.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list.")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget_seconds, args.budget_mib, args.workers, args.top))
@@ -0,0 +1,117 @@
+"""Compares serving the browser UI with plain ``FileResponse`` and with ``StaticAssets``.
+
+For each, it loads the page like a browser would (``/`` and then every local
+script and icon it references) and reports:
+
+- bytes transferred on a first visit, with ``Accept-Encoding: gzip, br``;
+- requests and bytes on a repeat visit, where the browser revalidates what it
+  has with ``If-None-Match`` and skips what it cached as immutable;
+- requests per second for ``chat.js`` through the ASGI app.
+
+    python -m benchmarks.static_assets
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+
+from startup_investor_agent.static_assets import IMMUTABLE, StaticAssets
+
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ui", "browser")
+LOCAL_REF_RE = re.compile(r"""(?:src|href)=["']([^"'#?:]+\.(?:js|css|svg|png|ico))["']""")
+
+
+def file_response_app() -> FastAPI:
+    """The UI routes as ``main.py`` had them before ``StaticAssets``."""
+    app = FastAPI()
+
+    @app.get("/")
+    async def serve_index():
+        return FileResponse(os.path.join(UI_DIR, "index.html"))
+
+    @app.get("/{filename}")
+    async def serve_static_files(filename: str):
+        file_path = os.path.join(UI_DIR, filename)
+        if os.path.isfile(file_path):
+            return FileResponse(file_path)
+        return FileResponse(os.path.join(UI_DIR, "index.html"))
+
+    return app
+
+
+def static_assets_app() -> FastAPI:
+    """The same routes on ``StaticAssets``, as in ``main.py``."""
+    app = FastAPI()
+    assets = StaticAssets(UI_DIR)
+
+    @app.get("/assets/{path:path}")
+    async def serve_fingerprinted_asset(path: str, request: Request):
+        return assets.response(assets.get(f"/assets/{path}"), request.headers, immutable=True)
+
+    @app.get("/")
+    async def serve_index(request: Request):
+        return assets.response(assets.get("index.html"), request.headers)
+
+    @app.get("/{filename}")
+    async def serve_static_files(filename: str, request: Request):
+        return assets.response(assets.get(filename) or assets.get("index.html"), request.headers)
+
+    return app
+
+
+async def page_load(client: httpx.AsyncClient, cache: dict) -> tuple[int, int]:
+    """Loads ``/`` and its subresources; returns (requests, bytes). ``cache`` is the browser cache."""
+    requests = transferred = 0
+
+    async def fetch(url: str) -> httpx.Response:
+        nonlocal requests, transferred
+        headers = {"Accept-Encoding": "gzip, br"}
+        if url in cache:
+            headers["If-None-Match"] = cache[url][0]
+        response = await client.get(url, headers=headers)
+        requests += 1
+        transferred += response.num_bytes_downloaded
+        if response.status_code == 200:
+            cache[url] = (response.headers.get("etag", ""), response.headers.get("cache-control", ""), response.text)
+        return response
+
+    await fetch("/")
+    for ref in LOCAL_REF_RE.findall(cache["/"][2]):
+        url = ref if ref.startswith("/") else f"/{ref}"
+        if url in cache and cache[url][1] == IMMUTABLE:
+            continue
+        await fetch(url)
+    return requests, transferred
+
+
+async def requests_per_second(client: httpx.AsyncClient, url: str, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        (await client.get(url, headers={"Accept-Encoding": "gzip, br"})).raise_for_status()
+    return count / (time.perf_counter() - started)
+
+
+async def main(count: int) -> None:
+    print(f"{'':<16} {'first visit':>14} {'repeat visit':>20} {'chat.js req/s':>14}")
+    for label, app in (("FileResponse", file_response_app()), ("StaticAssets", static_assets_app())):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            cache: dict = {}
+            _, first = await page_load(client, cache)
+            repeat_requests, repeat = await page_load(client, cache)
+            chat_js = next(url for url in cache if "chat" in url)
+            rate = await requests_per_second(client, chat_js, count)
+        print(f"{label:<16} {first:>8} bytes {repeat_requests:>3} req {repeat:>6} bytes {rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests for the req/s measurement.")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,216 @@
+"""Compares ``/run``, ADK's ``/run_sse`` and the relayed ``/run_stream``.
+
+Serves ``main.py``'s app with uvicorn on the offline graph (replayed model
+with streamed text, stub search and MCP servers) and reports, per endpoint:
+
+- time to the first byte of the response and to the first progress event;
+- time to the first text of the memo, and to the end of the run;
+- how many events arrived before the memo started.
+
+It then checks the relay's guarantees:
+
+- resume: a client that disconnects part-way and reconnects with
+  ``Last-Event-ID`` gets the rest, and the run is not repeated;
+- a slow client: reading at a crawl does not delay the run, and the buffer
+  stays within ``STREAM_BUFFER_BYTES``;
+- one run per session: of several requests for one session sent at once,
+  one starts a run and the others get ``409`` with its id.
+
+    python -m benchmarks.stream_relay --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+
+os.environ["RESEARCH_CACHE"] = "off"
+_STORE_DIR = tempfile.mkdtemp()
+os.environ.setdefault("SESSION_STORE_PATH", os.path.join(_STORE_DIR, "sessions.sqlite3"))
+os.environ.setdefault("MEMO_STORE_PATH", os.path.join(_STORE_DIR, "memo_store.sqlite3"))
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(_STORE_DIR, "jobs.sqlite3"))
+os.environ.setdefault("STREAM_BUFFER_BYTES", "20000")
+
+import httpx
+import uvicorn
+
+from startup_investor_agent import agent as investor
+from startup_investor_agent.batch import APP_NAME
+from startup_investor_agent.mcp_pool import close_pools
+from startup_investor_agent.stream_relay import get_stream_relay
+
+from .harness import PROMPT
+from .offline import OfflineProfile, offline_copy
+
+USER_ID = "bench"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def body(session_id: str, streaming: bool = True) -> dict:
+    return {
+        "app_name": APP_NAME,
+        "user_id": USER_ID,
+        "session_id": session_id,
+        "new_message": {"role": "user", "parts": [{"text": PROMPT}]},
+        "streaming": streaming,
+    }
+
+
+async def new_session(client: httpx.AsyncClient) -> str:
+    response = await client.post(f"/apps/{APP_NAME}/users/{USER_ID}/sessions")
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def sse_events(response: httpx.Response):
+    """Yields ``(id, event, data)`` for each server-sent event."""
+    event_id, event, data = None, "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event_id, event, json.loads("\n".join(data))
+            event_id, event, data = None, "message", []
+        elif line.startswith("id:"):
+            event_id = int(line[3:].strip())
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+
+
+def is_memo_text(endpoint: str, event: str, data: dict) -> bool:
+    if endpoint == "/run_stream":
+        return event == "text" and data.get("answer")
+    parts = (data.get("content") or {}).get("parts") or []
+    return data.get("author") == investor.root_agent.name and any(part.get("text") for part in parts)
+
+
+async def measure(client: httpx.AsyncClient, endpoint: str) -> dict:
+    session_id = await new_session(client)
+    started = time.perf_counter()
+    marks = {}
+    events_before_memo = 0
+    if endpoint == "/run":
+        response = await client.post("/run", json=body(session_id, streaming=False))
+        response.raise_for_status()
+        marks["first_byte"] = marks["first_event"] = marks["first_memo_text"] = time.perf_counter() - started
+        events_before_memo = len(response.json()) - 1
+    else:
+        async with client.stream("POST", endpoint, json=body(session_id)) as response:
+            response.raise_for_status()
+            marks["first_byte"] = time.perf_counter() - started
+            async for _, event, data in sse_events(response):
+                marks.setdefault("first_event", time.perf_counter() - started)
+                if "first_memo_text" not in marks:
+                    if is_memo_text(endpoint, event, data):
+                        marks["first_memo_text"] = time.perf_counter() - started
+                    else:
+                        events_before_memo += 1
+    marks["done"] = time.perf_counter() - started
+    return {key: round(value, 2) for key, value in marks.items()} | {"events_before_memo": events_before_memo}
+
+
+async def resume_check(client: httpx.AsyncClient, profile: OfflineProfile, drop_after: int) -> dict:
+    session_id = await new_session(client)
+    calls = profile.model_calls
+    received: list[tuple[int, str, dict]] = []
+    async with client.stream("POST", "/run_stream", json=body(session_id)) as response:
+        run_id = response.headers["x-run-id"]
+        async for event_id, event, data in sse_events(response):
+            received.append((event_id, event, data))
+            if len(received) == drop_after:
+                break
+    # Disconnected; the run keeps going while the client is away.
+    await asyncio.sleep(1.0)
+    headers = {"Last-Event-ID": str(received[-1][0])}
+    async with client.stream("GET", f"/run_stream/{run_id}", headers=headers) as response:
+        async for event_id, event, data in sse_events(response):
+            received.append((event_id, event, data))
+    ids = [event_id for event_id, _, _ in received if event_id is not None]
+    memo = next(data["text"] for _, event, data in reversed(received) if event == "text" and data["answer"])
+    return {
+        "events": len(ids),
+        "ids_contiguous": ids == list(range(1, len(ids) + 1)),
+        "ended": received[-1][1] == "end",
+        "memo_complete": memo == profile.fixture["responses"][investor.root_agent.name],
+        "model_calls": profile.model_calls - calls,
+    }
+
+
+async def slow_client_check(client: httpx.AsyncClient, read_delay: float) -> dict:
+    session_id = await new_session(client)
+    started = time.time()
+    peak = 0
+    kinds = []
+    async with client.stream("POST", "/run_stream", json=body(session_id)) as response:
+        run = get_stream_relay().get(response.headers["x-run-id"])
+        async for _, event, _ in sse_events(response):
+            kinds.append(event)
+            peak = max(peak, run.status()["buffered_bytes"])
+            await asyncio.sleep(read_delay)
+    return {
+        "run_seconds": round(run.finished_at - started, 2),
+        "client_seconds": round(time.time() - started, 2),
+        "peak_buffered_bytes": peak,
+        "buffer_cap": int(os.environ["STREAM_BUFFER_BYTES"]),
+        "gaps": kinds.count("gap"),
+    }
+
+
+async def one_run_check(client: httpx.AsyncClient, requests: int) -> dict:
+    session_id = await new_session(client)
+    responses = await asyncio.gather(*(client.post("/run_stream", json=body(session_id)) for _ in range(requests)))
+    started = [response.headers["x-run-id"] for response in responses if response.status_code == 200]
+    conflicts = [response.json()["detail"]["run_id"] for response in responses if response.status_code == 409]
+    return {
+        "started": len(started),
+        "conflicts": len(conflicts),
+        "conflicts_name_the_run": set(conflicts) == set(started),
+    }
+
+
+async def main(latency: float) -> None:
+    profile = OfflineProfile(model_latency=latency, search_latency=latency / 2, mcp_latency=latency / 4)
+    investor.root_agent = offline_copy(investor.root_agent, profile)
+    import main as app_module
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            await measure(client, "/run")  # warm-up
+            print(f"{'endpoint':<12} {'first byte':>10} {'first event':>12} {'memo text':>10} {'done':>6} {'events before memo':>19}")
+            for endpoint in ("/run", "/run_sse", "/run_stream"):
+                calls = profile.model_calls
+                r = await measure(client, endpoint)
+                run_calls = profile.model_calls - calls
+                print(
+                    f"{endpoint:<12} {r['first_byte']:>10} {r['first_event']:>12} {r['first_memo_text']:>10}"
+                    f" {r['done']:>6} {r['events_before_memo']:>19}"
+                )
+            print(f"\nModel calls per run: {run_calls}")
+            print("Resume after disconnecting at event 10:", await resume_check(client, profile, drop_after=10))
+            print("Slow client (50 ms per event):", await slow_client_check(client, read_delay=0.05))
+            print("5 requests for one session at once:", await one_run_check(client, requests=5))
+    finally:
+        server.should_exit = True
+        await serving
+        await close_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stub model call.")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,147 @@
+"""Compares prompt tokens with Markdown and with structured specialist outputs.
+
+Uses the recorded fixtures, which hold the same findings in both forms:
+
+1. the size of each specialist's output as Markdown and as compact JSON;
+2. the memo synthesis prompt with each form of the outputs injected;
+3. offline runs of both orchestration graphs in each mode, reporting the
+   prompt tokens of the agents that read the specialist outputs.
+
+Token counts use the scheduler's estimate (about four characters per token),
+so they are comparable with each other rather than exact Gemini counts.
+
+    python -m benchmarks.structured_outputs
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from startup_investor_agent import agent as investor
+from startup_investor_agent.mcp_pool import close_pools
+from startup_investor_agent.pipeline import build_parallel_pipeline
+from startup_investor_agent.prompt import memo_synthesis_prompt
+from startup_investor_agent.structured import (
+    SCHEMAS,
+    STRUCTURED_OUTPUT_INSTRUCTION,
+    compact,
+    render_markdown,
+    search_tool,
+)
+from startup_investor_agent.tracing import TracingPlugin
+
+from .harness import PROMPT
+from .offline import OfflineProfile, load_fixture, offline_copy
+
+AGENT_OUTPUTS = {
+    "data_analyst_agent": "market_data_analysis_output",
+    "product_and_tech_analyst": "final_product_and_tech_output",
+    "risk_analyst_agent": "final_risk_assessment_output",
+}
+READERS = ("startup_investor_agent", "risk_analyst_agent", "investment_memo_synthesizer")
+
+
+def tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def structured(agent):
+    """What an agent becomes with ``STRUCTURED_OUTPUTS=on``."""
+    if agent.output_key not in SCHEMAS:
+        return agent.clone(update={"include_contents": "none"})
+    return agent.clone(
+        update={
+            "instruction": agent.instruction + STRUCTURED_OUTPUT_INSTRUCTION,
+            "output_schema": SCHEMAS[agent.output_key],
+            "tools": [search_tool(agent.model)],
+            "include_contents": "none" if agent.output_key == "final_risk_assessment_output" else "default",
+        }
+    )
+
+
+def graphs(structured_outputs: bool) -> dict:
+    variant = structured if structured_outputs else (lambda agent: agent)
+    data = variant(investor.data_analyst_agent)
+    product = variant(investor.product_and_tech_analyst)
+    risk = variant(investor.risk_analyst_agent)
+    synthesizer = variant(investor.memo_synthesizer_agent)
+    return {
+        "sequential": investor.orchestrator_agent.clone(
+            update={
+                "tools": [investor.playwright_toolset, AgentTool(agent=risk), AgentTool(agent=data), AgentTool(agent=product)]
+            }
+        ),
+        "parallel": build_parallel_pipeline(
+            data_analyst=data, product_analyst=product, risk_analyst=risk, synthesizer=synthesizer
+        ),
+    }
+
+
+async def prompt_tokens_by_agent(agent, profile: OfflineProfile) -> dict[str, int]:
+    tracing = TracingPlugin()
+    runner = Runner(
+        app_name="benchmark", agent=offline_copy(agent, profile), session_service=InMemorySessionService(), plugins=[tracing]
+    )
+    session = await runner.session_service.create_session(app_name="benchmark", user_id="bench")
+    message = types.Content(role="user", parts=[types.Part(text=PROMPT)])
+    async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+        pass
+    spans = tracing.get(tracing.recent(1)[0]["trace_id"])["span_list"]
+    totals: dict[str, int] = {}
+    for span in spans:
+        if span["kind"] == "model":
+            name = span["attributes"]["agent"]
+            totals[name] = totals.get(name, 0) + (span["attributes"].get("prompt_tokens") or 0)
+    return totals
+
+
+def change(before: int, after: int) -> str:
+    return f"{before:>7} -> {after:>6}  ({after / before - 1:+.0%})" if before else f"{before:>7} -> {after:>6}"
+
+
+async def main(latency: float) -> None:
+    os.environ["RESEARCH_CACHE"] = "off"
+    fixture = load_fixture()
+
+    print("Specialist outputs (tokens, Markdown -> compact JSON):")
+    markdown, compacted = {}, {}
+    for agent_name, output_key in AGENT_OUTPUTS.items():
+        markdown[output_key] = fixture["responses"][agent_name]
+        record = SCHEMAS[output_key].model_validate(fixture["structured_responses"][agent_name])
+        compacted[output_key] = compact(record)
+        assert render_markdown(output_key, compacted[output_key]) == record.to_markdown()
+        print(f"  {agent_name:<32} {change(tokens(markdown[output_key]), tokens(compacted[output_key]))}")
+
+    print("\nMemo synthesis prompt with the outputs injected:")
+    print(
+        f"  {'investment_memo_synthesizer':<32} "
+        f"{change(tokens(memo_synthesis_prompt.format(**markdown)), tokens(memo_synthesis_prompt.format(**compacted)))}"
+    )
+
+    print("\nOffline runs, prompt tokens summed over each agent's model calls:")
+    with tempfile.TemporaryDirectory() as store_dir:
+        os.environ["MEMO_STORE_PATH"] = os.path.join(store_dir, "memo_store.sqlite3")
+        try:
+            for mode in ("sequential", "parallel"):
+                profile = OfflineProfile(fixture=fixture, model_latency=latency, search_latency=0, mcp_latency=0)
+                before = await prompt_tokens_by_agent(graphs(False)[mode], profile)
+                after = await prompt_tokens_by_agent(graphs(True)[mode], profile)
+                for name in READERS:
+                    if name in before:
+                        print(f"  {mode + ' / ' + name:<45} {change(before[name], after[name])}")
+                print(f"  {mode + ' / all agents':<45} {change(sum(before.values()), sum(after.values()))}")
+        finally:
+            await close_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per stub model call.")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,53 @@
+"""Stdio MCP server standing in for the Playwright MCP server in benchmarks.
+
+Serves ``browser_navigate`` and ``browser_snapshot`` with a fixed delay
+(``--latency`` seconds) and the fixture's recorded page snapshot. Navigating
+to a path ending in ``/offline`` fails, as a site that is down does.
+
+    python benchmarks/stub_mcp_server.py --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import time
+
+from mcp.server.mcpserver import MCPServer
+from mcp.server.mcpserver.exceptions import ToolError
+
+parser = argparse.ArgumentParser(description="Stub Playwright MCP server.")
+parser.add_argument("--latency", type=float, default=0.05, help="Seconds per tool call.")
+parser.add_argument(
+    "--fixture",
+    default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded_responses.json"),
+)
+args = parser.parse_args()
+
+with open(args.fixture, encoding="utf-8") as f:
+    SNAPSHOT = json.load(f).get("page_snapshot", "")
+
+server = MCPServer("stub_playwright")
+page = {"url": "about:blank"}
+
+
+@server.tool()
+def browser_navigate(url: str) -> str:
+    """Navigate to a URL."""
+    time.sleep(args.latency)
+    if url.rstrip("/").endswith("/offline"):
+        raise ToolError(f"net::ERR_CONNECTION_REFUSED at {url}")
+    page["url"] = url
+    return f"Navigated to {url}"
+
+
+@server.tool()
+def browser_snapshot() -> str:
+    """Capture an accessibility snapshot of the current page."""
+    time.sleep(args.latency)
+    if page["url"] == "about:blank":
+        return ""
+    return f"Page URL: {page['url']}\n{SNAPSHOT}"
+
+
+if __name__ == "__main__":
+    server.run()
@@ -0,0 +1,130 @@
+"""Deterministic local stand-in for Gemini used by the benchmarks."""
+
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from startup_investor_agent.model_scheduler import estimate_tokens
+
+
+class StubModel(BaseLlm):
+    """Sleeps ``latency`` seconds per call, then answers without any network access.
+
+    When the request offers tools named in ``tool_sequence`` the stub calls them
+    one per turn, in order, like the root agent's prompt asks it to. Once they
+    have all returned it produces a final text answer.
+    """
+
+    model: str = "stub-model"
+    latency: float = 0.5
+    tool_sequence: list[str] = []
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+        answered = {
+            part.function_response.name
+            for content in llm_request.contents
+            for part in content.parts or []
+            if part.function_response
+        }
+        for tool_name in self.tool_sequence:
+            if tool_name in llm_request.tools_dict and tool_name not in answered:
+                call = types.FunctionCall(name=tool_name, args={"request": "Analyze the startup."})
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+                return
+
+        agent_name = (llm_request.config.labels or {}).get("adk_agent_name", "agent")
+        text = f"Stub output for {agent_name} after {len(answered)} tool calls."
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+class ReplayModel(BaseLlm):
+    """Replays recorded agent outputs from a fixture, with simulated latency.
+
+    Before answering, an agent works through the tools it was given the way the
+    live model tends to: ``google_search`` for each of ``search_queries[agent]``,
+    one ``fetch_page`` of the website, or a browser navigation and snapshot
+    when it has the Playwright tools instead,
+    then each ``AgentTool`` in ``tool_sequence``. One tool call is made per
+    turn; afterwards the agent's recorded response is returned. Agents with an
+    output schema answer through ``set_model_response`` with the fixture's
+    structured record. With ``stream=True`` (SSE streaming) the text is
+    yielded as ``chunks`` partial responses spread over the latency, then
+    whole, like Gemini streams it.
+    """
+
+    model: str = "replay-model"
+    fixture: dict
+    latency: float = 0.5
+    agent_latency: dict[str, float] = {}
+    tool_sequence: list[str] = []
+    # With stream=True, text is replayed in this many partial chunks over the same latency.
+    chunks: int = 8
+    calls: int = 0
+
+    def script(self, agent_name: str, tools: dict) -> list[tuple[str, dict]]:
+        steps = []
+        if "google_search" in tools:
+            queries = self.fixture.get("search_queries", {}).get(agent_name) or [f"{agent_name} research"]
+            steps += [("google_search", {"query": query}) for query in queries]
+        if "fetch_page" in tools:
+            steps.append(("fetch_page", {"url": self.fixture.get("website", "https://acme.example")}))
+        if "browser_navigate" in tools:
+            steps.append(("browser_navigate", {"url": self.fixture.get("website", "https://acme.example")}))
+        if "browser_snapshot" in tools:
+            steps.append(("browser_snapshot", {}))
+        steps += [(name, {"request": "Analyze the startup."}) for name in self.tool_sequence if name in tools]
+        record = self.fixture.get("structured_responses", {}).get(agent_name)
+        if "set_model_response" in tools and record is not None:
+            steps.append(("set_model_response", record))
+        return steps
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        agent_name = (llm_request.config.labels or {}).get("adk_agent_name", "agent")
+        latency = self.agent_latency.get(agent_name, self.latency)
+
+        steps = self.script(agent_name, llm_request.tools_dict)
+        done = sum(
+            1
+            for content in llm_request.contents
+            for part in content.parts or []
+            if part.function_response
+        )
+        prompt_tokens = estimate_tokens(llm_request)
+        if done < len(steps):
+            await asyncio.sleep(latency)
+            name, args = steps[done]
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+            output_tokens = 20
+        else:
+            text = self.fixture["responses"].get(agent_name, f"Recorded output for {agent_name}.")
+            part = types.Part(text=text)
+            output_tokens = len(text) // 4
+            if stream:
+                size = -(-len(text) // self.chunks)
+                for start in range(0, len(text), size):
+                    await asyncio.sleep(latency / self.chunks)
+                    yield LlmResponse(
+                        content=types.Content(role="model", parts=[types.Part(text=text[start:start + size])]),
+                        partial=True,
+                    )
+            else:
+                await asyncio.sleep(latency)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
@@ -1,8 +1,31 @@
+import asyncio
 import os
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from contextlib import asynccontextmanager
+import json
+import re
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from google.adk.cli.api_server import RunAgentRequest
 from google.adk.cli.fast_api import get_fast_api_app
+from google.adk.runners import Runner
+from startup_investor_agent.mcp_pool import all_pools, close_pools, mcp_lease_plugin, start_pools
+from startup_investor_agent.batch import APP_NAME, parse_startups, run_batch
+from startup_investor_agent.jobs import JobConflict, get_job_queue, job_concurrency
+from startup_investor_agent.memo_store import get_memo_store
+from startup_investor_agent.model_scheduler import get_scheduler
+from startup_investor_agent.page_fetch import close_page_fetcher, get_page_fetcher, page_fetch_enabled
+from startup_investor_agent.search_index import get_search_index
+from startup_investor_agent.session_store import (
+    app_session_service,
+    get_session_service,
+    session_service_uri,
+    sweep_idle_sessions,
+)
+from startup_investor_agent.static_assets import StaticAssets
+from startup_investor_agent.stream_relay import RunConflict, get_stream_relay, stream_relay_plugin
+from startup_investor_agent.structured import render_markdown
+from startup_investor_agent.tracing import tracing_plugin
+from startup_investor_agent import mcp_servers  # noqa: F401  registers the MCP server pools
 
 # Get the directory of the current script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -10,30 +33,331 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Define the path to the agents directory
 AGENTS_DIR = "."
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # MCP servers start on a worker's first MCP tool call. With
+    # MCP_POOL_WARMUP=startup the pools are warmed in the background instead,
+    # so startup is not blocked on npx and browser launches.
+    warmup = None
+    if os.getenv("MCP_POOL_WARMUP", "on_demand").lower() == "startup":
+        warmup = asyncio.create_task(start_pools())
+    sweeper = asyncio.create_task(sweep_idle_sessions(float(os.getenv("SESSION_SWEEP_SECONDS", "300"))))
+    # Each worker runs up to JOB_CONCURRENCY queued jobs in the background.
+    jobs = None
+    if job_concurrency() > 0:
+        jobs = asyncio.create_task(get_job_queue().run_worker(relay_runner, job_concurrency()))
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    sweeper.cancel()
+    if jobs is not None:
+        # Running jobs go back to the queue for the other workers.
+        jobs.cancel()
+        await asyncio.gather(jobs, return_exceptions=True)
+    await close_page_fetcher()
+    await close_pools()
+
+
 # Create the FastAPI app using the ADK's function
 # We set web=False because we are mounting the static files manually
-app = get_fast_api_app(agents_dir=AGENTS_DIR, web=False)
+app = get_fast_api_app(
+    agents_dir=AGENTS_DIR,
+    web=False,
+    lifespan=lifespan,
+    # Bounded SQLite sessions by default; see startup_investor_agent/session_store.py
+    session_service_uri=session_service_uri(),
+    # Spans for every agent, tool and model call, served at /debug/traces, and
+    # the release of a run's MCP servers however the run ends
+    extra_plugins=[
+        "startup_investor_agent.tracing.tracing_plugin",
+        "startup_investor_agent.mcp_pool.mcp_lease_plugin",
+    ],
+)
 
 # Define the path to the UI files
 UI_DIR = os.path.join(BASE_DIR, "ui", "browser")
 
-# Mount static files at /static to avoid conflicts with API routes
-app.mount("/static", StaticFiles(directory=UI_DIR), name="static")
+# The UI files, loaded once: precompressed, with ETags and fingerprinted URLs
+static_assets = StaticAssets(UI_DIR)
+
+# Pool utilisation of the shared MCP servers
+@app.get("/debug/mcp_pools")
+async def mcp_pool_metrics():
+    return [pool.metrics() for pool in all_pools()]
+
+# Queue depth, throttle time and dedup hits of the shared model scheduler
+@app.get("/debug/model_scheduler")
+async def model_scheduler_metrics():
+    return get_scheduler().metrics()
+
+# Stored sessions and bytes, and how often turns were compacted or sessions evicted
+@app.get("/debug/sessions")
+async def session_store_metrics():
+    service = get_session_service()
+    if service is None:
+        raise HTTPException(status_code=404, detail="SESSION_STORE is not a bounded backend")
+    return await service.metrics()
+
+# Searches answered from the shared search index, overall and per recent evaluation
+@app.get("/debug/search_index")
+async def search_index_metrics():
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=404, detail="SEARCH_INDEX is off")
+    return index.metrics()
+
+# Pages served per fetch tier (cache, revalidated, http, browser) and their latency
+@app.get("/debug/page_fetch")
+async def page_fetch_metrics():
+    if not page_fetch_enabled():
+        raise HTTPException(status_code=404, detail="PAGE_FETCH is off")
+    return get_page_fetcher().metrics()
+
+# Relayed runs kept for resuming, their buffered bytes and dropped events
+@app.get("/debug/streams")
+async def stream_relay_metrics():
+    return get_stream_relay().metrics()
+
+# Jobs by status, which workers are running them, and queue and run times
+@app.get("/debug/jobs")
+async def job_queue_metrics():
+    return get_job_queue().metrics()
+
+# Recent traces with their per-span timing breakdown and hot path
+@app.get("/debug/traces")
+async def recent_traces(limit: int = 20):
+    return tracing_plugin.recent(limit)
+
+@app.get("/debug/traces/{trace_id}")
+async def trace_detail(trace_id: str):
+    trace = tracing_plugin.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+# Screen a list of startups. The body is CSV (Content-Type: text/csv) or JSONL.
+# Results stream back as JSONL as each memo finishes; posting again with the
+# same job_id resumes the job instead of rerunning finished memos. With
+# ?refresh=true, stored memos are refreshed and only stale sections rerun.
+# ?rpm limits memos started per minute; model calls are limited by MODEL_RPM.
+BATCH_DIR = os.path.join(BASE_DIR, ".cache", "batches")
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+@app.post("/batch/{job_id}")
+async def run_batch_job(
+    job_id: str, request: Request, concurrency: int = 4, rpm: float | None = None, refresh: bool = False
+):
+    if not re.fullmatch(r"[\w-]{1,64}", job_id):
+        raise HTTPException(status_code=400, detail="job_id must be 1-64 letters, digits, _ or -")
+    if rpm is not None and rpm <= 0:
+        raise HTTPException(status_code=400, detail="rpm must be positive")
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    try:
+        items = parse_startups((await request.body()).decode("utf-8"), fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse startups: {e}")
+
+    from startup_investor_agent.agent import root_agent
+
+    async def stream():
+        output_path = os.path.join(BATCH_DIR, f"{job_id}.jsonl")
+        async for record in run_batch(items, output_path, root_agent, concurrency, rpm, refresh):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# Incremental, resumable streaming of a run (see startup_investor_agent/stream_relay.py).
+# Same body as /run_sse; the run continues if the client disconnects, and
+# GET /run_stream/{run_id} with Last-Event-ID picks the stream up again.
+_relay_runner: Runner | None = None
+
+def relay_runner() -> Runner:
+    global _relay_runner
+    if _relay_runner is None:
+        from startup_investor_agent.agent import root_agent
+
+        _relay_runner = Runner(
+            app_name=APP_NAME,
+            agent=root_agent,
+            session_service=app_session_service(),
+            plugins=[tracing_plugin, stream_relay_plugin, mcp_lease_plugin],
+        )
+    return _relay_runner
+
+def run_stream_backend() -> str:
+    # A relayed run lives in the worker that started it, so with several
+    # workers /run_stream runs go through the job queue, which every worker
+    # can follow and cancel. RUN_STREAM_BACKEND (relay or jobs) overrides.
+    default = "jobs" if int(os.getenv("WORKERS", "1")) > 1 else "relay"
+    return os.getenv("RUN_STREAM_BACKEND", default).lower()
+
+def _event_stream(run, after: int) -> StreamingResponse:
+    return StreamingResponse(
+        run.read(after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Run-Id": run.id},
+    )
+
+def _job_event_stream(job_id: str, after: int) -> StreamingResponse:
+    return StreamingResponse(
+        get_job_queue().stream(job_id, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Run-Id": job_id},
+    )
+
+async def _session_or_404(app_name: str, user_id: str, session_id: str):
+    # This server runs one app; its runners, sessions and jobs all use APP_NAME.
+    if app_name != APP_NAME:
+        raise HTTPException(status_code=404, detail=f"App not found: {app_name}")
+    session = await app_session_service().get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+    return session
+
+def _active_job_id(user_id: str, session_id: str) -> str | None:
+    job = get_job_queue().active_job(APP_NAME, user_id, session_id)
+    return job["job_id"] if job is not None else None
+
+async def _submit_job(req: RunAgentRequest) -> dict:
+    """Queues the request; raises RunConflict or JobConflict if the session has a run in progress."""
+    relay = get_stream_relay()
+    run = relay.active_run(req.user_id, req.session_id)
+    if run is not None:
+        raise RunConflict(run.id)
+    job = await get_job_queue().submit(APP_NAME, req.user_id, req.session_id, req.new_message, req.state_delta)
+    run = relay.active_run(req.user_id, req.session_id)
+    if run is not None:
+        # A relayed run started while the job was being queued; it keeps the session.
+        await get_job_queue().cancel(job["job_id"])
+        raise RunConflict(run.id)
+    return job
+
+@app.post("/run_stream")
+async def run_stream(req: RunAgentRequest):
+    await _session_or_404(req.app_name, req.user_id, req.session_id)
+    # One run per session; on a 409 the client resumes the run instead of starting another.
+    try:
+        if run_stream_backend() == "jobs":
+            job = await _submit_job(req)
+            return _job_event_stream(job["job_id"], 0)
+        run = get_stream_relay().start(
+            relay_runner(),
+            req.user_id,
+            req.session_id,
+            req.new_message,
+            req.state_delta,
+            busy=lambda: _active_job_id(req.user_id, req.session_id),
+        )
+    except RunConflict as e:
+        raise HTTPException(status_code=409, detail={"message": "A run is in progress", "run_id": e.run_id})
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail={"message": "A run is in progress", "run_id": e.job_id})
+    return _event_stream(run, 0)
+
+@app.get("/run_stream/{run_id}")
+async def resume_run_stream(run_id: str, request: Request, after: int | None = None):
+    if after is None:
+        after = int(request.headers.get("last-event-id") or 0)
+    run = get_stream_relay().get(run_id)
+    if run is not None:
+        return _event_stream(run, after)
+    if get_job_queue().get(run_id) is not None:
+        return _job_event_stream(run_id, after)
+    raise HTTPException(status_code=404, detail="Run not found or expired")
+
+@app.delete("/run_stream/{run_id}")
+async def cancel_run_stream(run_id: str):
+    if not get_stream_relay().cancel(run_id) and not await get_job_queue().cancel(run_id):
+        raise HTTPException(status_code=404, detail="No running run with this id")
+    return {"run_id": run_id, "cancelled": True}
+
+# Long analyses as background jobs (see startup_investor_agent/jobs.py).
+# Same body as /run_sse; returns 202 with the job at once. Any worker answers
+# GET /jobs/{job_id} (status, latest event, the memo when done) and streams
+# GET /jobs/{job_id}/events, resuming from Last-Event-ID.
+@app.post("/jobs", status_code=202)
+async def submit_job(req: RunAgentRequest):
+    await _session_or_404(req.app_name, req.user_id, req.session_id)
+    try:
+        return await _submit_job(req)
+    except RunConflict as e:
+        raise HTTPException(status_code=409, detail={"message": "A run is in progress", "run_id": e.run_id})
+    except JobConflict as e:
+        # One job per session; the client follows the running one instead.
+        raise HTTPException(status_code=409, detail={"message": "A job is in progress", "job_id": e.job_id})
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request, after: int | None = None):
+    if get_job_queue().get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if after is None:
+        after = int(request.headers.get("last-event-id") or 0)
+    return _job_event_stream(job_id, after)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if not await get_job_queue().cancel(job_id):
+        raise HTTPException(status_code=404, detail="No queued or running job with this id")
+    return {"job_id": job_id, "cancelled": True}
+
+# The stored memo of a startup, section by section with source timestamps.
+# subject is "site:<domain>" or "name:<normalized name>".
+@app.get("/memos/{subject}")
+async def stored_memo(subject: str):
+    memo = get_memo_store().memo(subject)
+    if memo is None:
+        raise HTTPException(status_code=404, detail="No stored memo for this startup")
+    return memo
+
+# A stored specialist output (e.g. final_risk_assessment_output) as Markdown.
+# Structured records are rendered to their original template on demand.
+@app.get("/memos/{subject}/research/{output_key}")
+async def stored_research(subject: str, output_key: str):
+    artifact = get_memo_store().get_artifact(subject, output_key)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="No stored output for this startup")
+    return PlainTextResponse(render_markdown(output_key, artifact["content"]), media_type="text/markdown")
+
+# Scripts, styles and icons under their fingerprinted URLs, cached for a year
+@app.get("/assets/{path:path}")
+async def serve_fingerprinted_asset(path: str, request: Request):
+    asset = static_assets.get(f"/assets/{path}")
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return static_assets.response(asset, request.headers, immutable=True)
 
 # Serve index.html at root
 @app.get("/")
-async def serve_index():
-    return FileResponse(os.path.join(UI_DIR, "index.html"))
+async def serve_index(request: Request):
+    return static_assets.response(static_assets.get("index.html"), request.headers)
 
-# Serve other static files like chat.js, favicon, etc.
+# Serve other static files like chat.js, favicon, etc. (also under /static)
+@app.get("/static/{filename:path}")
 @app.get("/{filename}")
-async def serve_static_files(filename: str):
-    file_path = os.path.join(UI_DIR, filename)
-    if os.path.isfile(file_path):
-        return FileResponse(file_path)
-    # If file doesn't exist, serve index.html for SPA routing
-    return FileResponse(os.path.join(UI_DIR, "index.html"))
+async def serve_static_files(filename: str, request: Request):
+    asset = static_assets.get(filename)
+    if asset is None:
+        # Missing files are 404s; other paths get index.html for SPA routing
+        if "." in filename.rsplit("/", 1)[-1]:
+            raise HTTPException(status_code=404, detail="Not found")
+        asset = static_assets.get("index.html")
+    return static_assets.response(asset, request.headers)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # WORKERS > 1 serves from several processes. They share sessions, memos,
+    # caches and jobs through SQLite files, so any worker can continue any
+    # session; an in-memory session store cannot be shared.
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1 and os.getenv("SESSION_STORE", "sqlite") == "memory":
+        raise SystemExit("SESSION_STORE=memory cannot be shared between workers")
+    uvicorn.run("main:app" if workers > 1 else app, host="0.0.0.0", port=8000, workers=workers)
@@ -1,69 +1,130 @@
 from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
-from mcp import StdioServerParameters
 from google.adk.tools.agent_tool import AgentTool
-from .prompt import startup_analyst_prompt
+from .prompt import startup_analyst_prompt, memo_synthesis_prompt
+from .mcp_pool import PooledMcpToolset, release_mcp_leases
+from .model_scheduler import scheduled_model
+from .page_fetch import fetch_page_tool, page_fetch_enabled
+from .mcp_servers import playwright_pool, sequential_thinking_pool
+from .memo_store import MEMO_OUTPUT_KEY, memo_callbacks
+from .research_cache import record_startup_subject
+from .search_index import search_run_callbacks
+from .structured import structured_outputs_enabled
 
+import functools
 import os
-from dotenv import load_dotenv
-load_dotenv()
-
-from .data_analyst.agent import data_analyst_agent
-from .risk_analyst.agent import risk_analyst_agent
-from .product_and_tech_analyst.agent import product_and_tech_analyst
-
-TARGET_FOLDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "./")
-
-# Define the first MCP toolset for Playwright
-playwright_toolset = McpToolset(
-    connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command='npx',
-            args=[
-                "-y",
-                "@playwright/mcp@latest",
-                "--timeout-action",
-                "300000",
-                "--timeout-navigation",
-                "300000",
-            ],
-        ),
-        working_dir=TARGET_FOLDER_PATH,
-        timeout=300,
-    ),
-    
-)
-
-# Define the second MCP toolset for sequential thinking
-sequential_thinking_toolset = McpToolset(
-    connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command='npx',
-            args=[
-                "-y",
-                "mcp-sequential-thinking@latest",
-                "--timeout-action",
-                "300000",
-                "--timeout-navigation",
-                "300000",
-            ],
-        ),
-        working_dir=TARGET_FOLDER_PATH,
-        timeout=300,
-    ),
-)
-
-
-root_agent = LlmAgent(
-    model='gemini-2.5-flash',
-    name='startup_investor_agent',
-    instruction=startup_analyst_prompt,
-    tools=[
-        playwright_toolset,
-        AgentTool(agent=risk_analyst_agent),
-        AgentTool(agent=data_analyst_agent),
-        AgentTool(agent=product_and_tech_analyst),
-    ],
-)
+from typing import Any
 
+MODEL = "gemini-2.5-flash"
+
+# "sequential" lets the root LLM call each specialist through AgentTool.
+# "parallel" runs data and product research concurrently, then risk, then synthesis.
+ORCHESTRATION_MODE = os.getenv("ORCHESTRATION_MODE", "sequential").lower()
+BRANCH_TIMEOUT_SECONDS = float(os.getenv("PARALLEL_BRANCH_TIMEOUT_SECONDS", "300"))
+STAGE_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_STAGE_TIMEOUT_SECONDS", "600"))
+
+MEMO_SOURCES = ("market_data_analysis_output", "final_product_and_tech_output", "final_risk_assessment_output")
+
+
+@functools.cache
+def _build_graph() -> dict[str, Any]:
+    """Builds the specialists, the toolsets and the root agent; once per process."""
+    from .pipeline import build_parallel_pipeline
+    from .data_analyst.agent import data_analyst_agent
+    from .risk_analyst.agent import risk_analyst_agent
+    from .product_and_tech_analyst.agent import product_and_tech_analyst
+
+    # MCP toolsets run on pools of servers shared across runs.
+    playwright_toolset = PooledMcpToolset(pool=playwright_pool)
+    sequential_thinking_toolset = PooledMcpToolset(pool=sequential_thinking_pool)
+    # fetch_page serves pages from its cache or plain HTTP and only borrows a
+    # pooled browser for pages that need JavaScript; PAGE_FETCH=off hands the
+    # agents the browser tools instead.
+    web_tools = [fetch_page_tool] if page_fetch_enabled() else [playwright_toolset]
+
+    _, _store_root_memo = memo_callbacks(startup_analyst_prompt, MEMO_SOURCES)
+    _reuse_memo, _store_memo = memo_callbacks(memo_synthesis_prompt, MEMO_SOURCES)
+    # Scopes the shared search index (SEARCH_INDEX) to one evaluation at the root.
+    _begin_search_run, _end_search_run = search_run_callbacks()
+    # Records the startup first, so every cache below keys on the same subject.
+    _begin_run = [record_startup_subject, _begin_search_run]
+
+    orchestrator_agent = LlmAgent(
+        model=scheduled_model(MODEL),
+        name='startup_investor_agent',
+        instruction=startup_analyst_prompt,
+        tools=[
+            *web_tools,
+            AgentTool(agent=risk_analyst_agent),
+            AgentTool(agent=data_analyst_agent),
+            AgentTool(agent=product_and_tech_analyst),
+        ],
+        output_key=MEMO_OUTPUT_KEY,
+        # The root agent only learns its inputs while running, so it stores the
+        # memo but cannot skip synthesis on a refresh; the parallel pipeline can.
+        before_agent_callback=_begin_run,
+        after_agent_callback=[release_mcp_leases, _store_root_memo, _end_search_run],
+    )
+
+    memo_synthesizer_agent = LlmAgent(
+        model=scheduled_model(MODEL),
+        name='investment_memo_synthesizer',
+        instruction=memo_synthesis_prompt,
+        tools=web_tools,
+        output_key=MEMO_OUTPUT_KEY,
+        # With structured outputs the instruction carries the compact records, so
+        # the specialists' turns (which repeat them in full) are left out.
+        include_contents="none" if structured_outputs_enabled() else "default",
+        before_agent_callback=_reuse_memo,
+        after_agent_callback=[release_mcp_leases, _store_memo],
+    )
+
+    if ORCHESTRATION_MODE == "parallel":
+        root_agent = build_parallel_pipeline(
+            data_analyst=data_analyst_agent,
+            product_analyst=product_and_tech_analyst,
+            risk_analyst=risk_analyst_agent,
+            synthesizer=memo_synthesizer_agent,
+            branch_timeout=BRANCH_TIMEOUT_SECONDS,
+            stage_timeout=STAGE_TIMEOUT_SECONDS,
+            before_agent_callback=_begin_run,
+            after_agent_callback=_end_search_run,
+        )
+    else:
+        root_agent = orchestrator_agent
+
+    return {
+        "root_agent": root_agent,
+        "orchestrator_agent": orchestrator_agent,
+        "memo_synthesizer_agent": memo_synthesizer_agent,
+        "data_analyst_agent": data_analyst_agent,
+        "risk_analyst_agent": risk_analyst_agent,
+        "product_and_tech_analyst": product_and_tech_analyst,
+        "playwright_toolset": playwright_toolset,
+        "sequential_thinking_toolset": sequential_thinking_toolset,
+        "web_tools": web_tools,
+    }
+
+
+_GRAPH_NAMES = {
+    "root_agent",
+    "orchestrator_agent",
+    "memo_synthesizer_agent",
+    "data_analyst_agent",
+    "risk_analyst_agent",
+    "product_and_tech_analyst",
+    "playwright_toolset",
+    "sequential_thinking_toolset",
+    "web_tools",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # root_agent, the specialists and the toolsets are built on first use,
+    # e.g. when the ADK loads the app for its first request, not on import.
+    if name not in _GRAPH_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    graph = _build_graph()
+    for key, value in graph.items():
+        # Leaves alone anything assigned to the module, such as a benchmark's root_agent.
+        globals().setdefault(key, value)
+    return globals()[name]
@@ -0,0 +1,295 @@
+"""Batch screening of many startups.
+
+Reads a CSV or JSONL list of startups (``name`` and/or ``website`` columns),
+runs a memo for each through a bounded pool of workers, and appends one JSON
+line per finished memo to the output file as soon as it completes. The output
+file doubles as the checkpoint: rerunning with the same output skips every
+startup that already has a successful result.
+
+``--refresh`` re-evaluates a portfolio incrementally: only the specialists whose
+stored outputs are stale are rerun (see ``memo_store``).
+
+    python -m startup_investor_agent.batch deals.csv -o memos.jsonl --concurrency 4 --rpm 20
+    python -m startup_investor_agent.batch portfolio.csv -o refresh-2026-10.jsonl --refresh
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+import os
+import time
+from typing import AsyncGenerator, Iterable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from .mcp_pool import mcp_lease_plugin
+from .memo_store import REFRESH_STATE
+from .model_scheduler import priority_lane
+from .research_cache import STARTUP_STATE_KEY, subject_for
+from .tracing import tracing_plugin
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "startup_investor_agent"
+BATCH_USER_ID = "batch"
+
+
+def startup_id(item: dict) -> str:
+    return subject_for(item.get("name", ""), item.get("website", ""))
+
+
+def _normalize_item(raw: dict) -> Optional[dict]:
+    row = {str(k).strip().lower(): str(v).strip() if v is not None else "" for k, v in raw.items() if k}
+    item = {"name": row.get("name", ""), "website": row.get("website") or row.get("url", "")}
+    if not item["name"] and not item["website"]:
+        return None
+    item["id"] = startup_id(item)
+    return item
+
+
+def parse_startups(text: str, fmt: str) -> list[dict]:
+    """Parses ``fmt`` ``"csv"`` (with a header row) or ``"jsonl"`` into deduplicated items.
+
+    Raises ``ValueError`` for a JSONL line that is not a JSON object.
+    """
+    if fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"line {number}: expected a JSON object with name and/or website")
+            rows.append(row)
+    items, seen = [], set()
+    for row in rows:
+        item = _normalize_item(row)
+        if item and item["id"] not in seen:
+            seen.add(item["id"])
+            items.append(item)
+    return items
+
+
+def load_startups(path: str) -> list[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        text = f.read()
+    return parse_startups(text, "jsonl" if path.endswith((".jsonl", ".json", ".ndjson")) else "csv")
+
+
+def completed_ids(output_path: str) -> set[str]:
+    """Ids that already have a successful result in ``output_path``."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that startup is simply rerun.
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def memo_request(item: dict) -> str:
+    if item["name"] and item["website"]:
+        return f"Evaluate the startup {item['name']} ({item['website']})."
+    return f"Evaluate the startup {item['name'] or item['website']}."
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, ``q`` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class RateLimiter:
+    """Allows at most ``per_minute`` starts per minute, spaced evenly."""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        agent: BaseAgent,
+        concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        memo_timeout: Optional[float] = 1800,
+        refresh: bool = False,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.initial_state = dict(REFRESH_STATE) if refresh else {}
+        self.limiter = RateLimiter(requests_per_minute)
+        self.memo_timeout = memo_timeout
+        self.session_service = InMemorySessionService()
+        self.runner = Runner(
+            app_name=APP_NAME,
+            agent=agent,
+            session_service=self.session_service,
+            plugins=[tracing_plugin, mcp_lease_plugin],
+        )
+
+    async def run_memo(self, item: dict) -> dict:
+        await self.limiter.wait()
+        # The caches and the memo store key on the item's own name and website.
+        state = {**self.initial_state, STARTUP_STATE_KEY: {"name": item["name"], "website": item["website"]}}
+        session = await self.session_service.create_session(app_name=APP_NAME, user_id=BATCH_USER_ID, state=state)
+        message = types.Content(role="user", parts=[types.Part(text=memo_request(item))])
+        record = {"id": item["id"], "name": item["name"], "website": item["website"]}
+        started = time.perf_counter()
+        memo = ""
+        try:
+            # Batch memos yield the model quota to interactive chats.
+            with priority_lane("batch"):
+                async with asyncio.timeout(self.memo_timeout):
+                    async for event in self.runner.run_async(
+                        user_id=BATCH_USER_ID, session_id=session.id, new_message=message
+                    ):
+                        if event.is_final_response() and event.content and event.content.parts:
+                            text = "".join(part.text or "" for part in event.content.parts)
+                            if text:
+                                memo = text
+            record.update(status="ok", memo=memo)
+        except Exception as e:
+            logger.warning("Memo for %s failed: %s", item["id"], e)
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        finally:
+            await self.session_service.delete_session(
+                app_name=APP_NAME, user_id=BATCH_USER_ID, session_id=session.id
+            )
+        record["latency_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+
+    async def run(self, items: Iterable[dict]) -> AsyncGenerator[dict, None]:
+        """Yields one record per item, in completion order."""
+        queue: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        pending = 0
+        for item in items:
+            queue.put_nowait(item)
+            pending += 1
+
+        async def worker() -> None:
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await results.put(await self.run_memo(item))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, pending))]
+        try:
+            for _ in range(pending):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+
+
+class BatchStats:
+    def __init__(self, skipped: int = 0):
+        self.started = time.perf_counter()
+        self.skipped = skipped
+        self.ok = 0
+        self.failed = 0
+        self.latencies: list[float] = []
+
+    def add(self, record: dict) -> None:
+        self.latencies.append(record["latency_seconds"])
+        if record["status"] == "ok":
+            self.ok += 1
+        else:
+            self.failed += 1
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "completed": self.ok,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(elapsed, 3),
+            "memos_per_minute": round(self.ok / elapsed * 60, 3) if elapsed else 0.0,
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p90": percentile(self.latencies, 90),
+            "latency_p99": percentile(self.latencies, 99),
+        }
+
+
+async def run_batch(
+    items: list[dict],
+    output_path: str,
+    agent: BaseAgent,
+    concurrency: int = 4,
+    requests_per_minute: Optional[float] = None,
+    refresh: bool = False,
+) -> AsyncGenerator[dict, None]:
+    """Runs the memos not yet in ``output_path``, appending each result as it finishes.
+
+    Yields every new record, then a final ``{"summary": ...}`` record.
+    """
+    done = completed_ids(output_path)
+    todo = [item for item in items if item["id"] not in done]
+    stats = BatchStats(skipped=len(items) - len(todo))
+    runner = BatchRunner(agent, concurrency=concurrency, requests_per_minute=requests_per_minute, refresh=refresh)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as out:
+        async for record in runner.run(todo):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            stats.add(record)
+            yield record
+    yield {"summary": stats.summary()}
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from .agent import root_agent
+
+    items = load_startups(args.input)
+    async for record in run_batch(items, args.output, root_agent, args.concurrency, args.rpm, args.refresh):
+        if "summary" in record:
+            print(json.dumps(record["summary"], indent=2))
+        else:
+            print(f"{record['status']:>5}  {record['latency_seconds']:>8.1f}s  {record['id']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen a list of startups in one run.")
+    parser.add_argument("input", help="CSV or JSONL with name and/or website columns.")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file; also the resume checkpoint.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Memos run at the same time.")
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Maximum memos started per minute. Model calls are limited separately, by MODEL_RPM.",
+    )
+    parser.add_argument("--refresh", action="store_true", help="Rerun only stale specialists of stored memos.")
+    asyncio.run(_main(parser.parse_args()))
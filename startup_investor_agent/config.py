@@ -0,0 +1,16 @@
+"""Loads ``.env`` into the environment, once per process.
+
+Settings are read from the environment when the modules that use them are
+imported, so this runs from the package's ``__init__``, before any of them.
+"""
+
+from dotenv import load_dotenv
+
+_loaded = False
+
+
+def load_config() -> None:
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
@@ -2,17 +2,50 @@
 
 from google.adk import Agent
 from google.adk.tools import google_search, url_context
-from dotenv import load_dotenv
-load_dotenv()
 
 from . import prompt
+from ..model_scheduler import scheduled_model
+from ..memo_store import section_callbacks
+from ..research_cache import cache_callbacks
+from ..structured import (
+    STRUCTURED_OUTPUT_INSTRUCTION,
+    MarketDataBriefing,
+    compact_output,
+    search_tool,
+    structured_outputs_enabled,
+)
+from ..search_index import lookup_search, release_search, search_index_mode, store_search
 
 MODEL = "gemini-2.5-flash"
 
+# STRUCTURED_OUTPUTS=on: return a compact MarketDataBriefing record instead of Markdown.
+STRUCTURED = structured_outputs_enabled()
+INSTRUCTION = prompt.DATA_ANALYST_PROMPT + STRUCTURED_OUTPUT_INSTRUCTION if STRUCTURED else prompt.DATA_ANALYST_PROMPT
+# SEARCH_INDEX=run|shared: searches go through a tool call the shared search index can answer.
+INDEXED_SEARCH = search_index_mode() != "off"
+
+_read_cache, _write_cache = cache_callbacks(
+    INSTRUCTION,
+    output_key="market_data_analysis_output",
+)
+
+# Funding, team and traction go stale quickly; a memo refresh redoes them monthly.
+_reuse_section, _store_section = section_callbacks(
+    INSTRUCTION,
+    output_key="market_data_analysis_output",
+    max_age_days=30,
+)
+
 data_analyst_agent = Agent(
-    model=MODEL,
+    model=scheduled_model(MODEL),
     name="data_analyst_agent",
-    instruction=prompt.DATA_ANALYST_PROMPT,
+    instruction=INSTRUCTION,
     output_key="market_data_analysis_output",
-    tools=[google_search],
+    output_schema=MarketDataBriefing if STRUCTURED else None,
+    tools=[search_tool(scheduled_model(MODEL))] if STRUCTURED or INDEXED_SEARCH else [google_search],
+    before_agent_callback=[_reuse_section, _read_cache],
+    after_agent_callback=[compact_output("market_data_analysis_output"), _write_cache, _store_section],
+    before_tool_callback=lookup_search,
+    after_tool_callback=store_search,
+    on_tool_error_callback=release_search,
 )
\ No newline at end of file
@@ -0,0 +1,617 @@
+"""Background job queue for long analyses, shared by every worker process.
+
+``POST /jobs`` queues a run instead of holding an HTTP request open for it.
+Jobs and their progress live in SQLite (``JOB_STORE_PATH``, default
+``.data/jobs.sqlite3``), so with several workers any of them can run a job,
+and any of them can answer for it:
+
+- every app worker runs up to ``JOB_CONCURRENCY`` (default 2) jobs in the
+  background; ``python -m startup_investor_agent.jobs`` runs a consumer
+  without an HTTP server, and ``JOB_CONCURRENCY=0`` leaves the app workers
+  to HTTP alone;
+- a worker claims the oldest queued job atomically and heartbeats it every
+  ``JOB_HEARTBEAT_SECONDS`` (default 5). A job whose worker stops
+  heartbeating for ``JOB_LEASE_SECONDS`` (default 60) is queued again and
+  rerun from the start, at most ``JOB_MAX_ATTEMPTS`` (default 2) times. A
+  worker that shuts down hands its jobs back straight away. Before a rerun,
+  the turn the earlier attempt left unfinished is dropped from the session,
+  so the job's message is not sent twice;
+- the run's agent, tool and final text events (those the stream relay
+  publishes, without partial text) are stored with the job. ``GET
+  /jobs/{job_id}`` reports the status, the latest event and, once done, the
+  turn's reply (the memo, for an evaluation); ``GET /jobs/{job_id}/events`` streams the events as server-sent
+  events and resumes from ``Last-Event-ID``;
+- one job per session runs at a time, and ``DELETE /jobs/{job_id}`` cancels.
+
+Every write runs in a thread, off the event loop, so a worker waiting on
+another one's write lock keeps serving HTTP; a run's events are written in
+batches.
+
+Finished jobs are deleted after ``JOB_RETENTION_SECONDS`` (default a day).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Optional
+
+from google.adk.runners import Runner
+from google.genai import types
+
+from .mcp_pool import release_invocation
+from .memo_store import MEMO_OUTPUT_KEY
+from .research_cache import BRIEFED_STATE_PREFIX
+from .session_store import BASE_DIR, BoundedSessionService
+from .stream_relay import KEEPALIVE_SECONDS, relay_events_to, sse_event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(BASE_DIR, ".data", "jobs.sqlite3")
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobConflict(Exception):
+    """The session already has a queued or running job."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Session already has job {job_id}")
+        self.job_id = job_id
+
+
+class JobEvents:
+    """Stores the events ``StreamRelayPlugin`` publishes for one job's run.
+
+    Events are written by one task at a time, in a thread; those published
+    while a batch is being written go out together in the next one.
+    """
+
+    def __init__(self, queue: "JobQueue", job_id: str, published: int):
+        self.queue = queue
+        self.job_id = job_id
+        self.invocation_id: Optional[str] = None
+        self.published = published
+        self.answer: Optional[str] = None
+        self._pending: list[tuple[int, dict]] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def publish(self, payload: dict) -> None:
+        if payload.get("partial"):
+            return
+        if payload["type"] == "text" and payload.get("answer"):
+            self.answer = payload["text"]
+        self.published += 1
+        self._pending.append((self.published, payload))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self.queue._append_events, self.job_id, batch)
+            except sqlite3.Error as e:
+                logger.warning("Could not store %d events of job %s: %s", len(batch), self.job_id, e)
+
+    async def flush(self) -> None:
+        """Waits until every event published so far is stored."""
+        while self._writer is not None and not self._writer.done():
+            await self._writer
+
+    def discard(self) -> None:
+        self._pending.clear()
+
+
+class JobQueue:
+    """Jobs in SQLite, claimed by whichever worker has a free slot; one connection per operation."""
+
+    def __init__(
+        self,
+        path: str,
+        heartbeat_seconds: float = 5,
+        lease_seconds: float = 60,
+        max_attempts: int = 2,
+        poll_seconds: float = 0.5,
+        retention: float = 86400,
+    ):
+        self.path = path
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.retention = retention
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._runs: dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            # Every worker process reads and writes this file at once.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    app_name TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL,
+                    result TEXT,
+                    error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+                CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_session ON jobs (app_name, user_id, session_id)
+                    WHERE status IN ('queued', 'running');
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Submitting and reading jobs; safe from any worker.
+
+    async def submit(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        new_message: Optional[types.Content],
+        state_delta: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        request = {
+            "new_message": new_message.model_dump(mode="json", exclude_none=True) if new_message else None,
+            "state_delta": state_delta,
+        }
+        try:
+            await asyncio.to_thread(self._insert, job_id, app_name, user_id, session_id, request)
+        except sqlite3.IntegrityError:
+            active = self.active_job(app_name, user_id, session_id)
+            raise JobConflict(active["job_id"] if active else "")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self.get(job_id)
+
+    def _insert(self, job_id: str, app_name: str, user_id: str, session_id: str, request: dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, app_name, user_id, session_id, request, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, app_name, user_id, session_id, json.dumps(request), time.time()),
+            )
+
+    def active_job(self, app_name: str, user_id: str, session_id: str) -> Optional[dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE app_name = ? AND user_id = ? AND session_id = ?"
+                " AND status IN ('queued', 'running')",
+                (app_name, user_id, session_id),
+            ).fetchone()
+        return self.get(row[0]) if row else None
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, app_name, user_id, session_id, status, attempts, worker, cancel_requested,"
+                " created_at, started_at, finished_at, result, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            last = conn.execute(
+                "SELECT seq, payload FROM job_events WHERE job_id = ? ORDER BY seq DESC LIMIT 1", (job_id,)
+            ).fetchone()
+            ahead = None
+            if row[4] == "queued":
+                ahead = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (row[8],)
+                ).fetchone()[0]
+        (job_id, app_name, user_id, session_id, status, attempts, worker, cancel_requested,
+         created_at, started_at, finished_at, result, error) = row
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "app_name": app_name,
+            "user_id": user_id,
+            "session_id": session_id,
+            "attempts": attempts,
+            "worker": worker,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "events": last[0] if last else 0,
+        }
+        if ahead is not None:
+            job["queued_ahead"] = ahead
+        if cancel_requested and status == "running":
+            job["cancel_requested"] = True
+        if last is not None:
+            # The latest step, without its text: the memo comes with "result".
+            job["last_event"] = {key: value for key, value in json.loads(last[1]).items() if key != "text"}
+        if status == "done":
+            job["result"] = result
+        if error:
+            job["error"] = error
+        return job
+
+    def events(self, job_id: str, after: int = 0) -> list[tuple[int, dict]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    async def stream(self, job_id: str, after: int = 0) -> AsyncIterator[bytes]:
+        """SSE bytes for the job's events after id ``after``, until the job is finished."""
+        cursor, idle = after, 0.0
+        while True:
+            events = self.events(job_id, cursor)
+            if events:
+                cursor = events[-1][0]
+                idle = 0.0
+                yield b"".join(sse_event(seq, payload) for seq, payload in events)
+                continue
+            job = self.get(job_id)
+            # A finished job has written its last event before its status.
+            if job is None or job["status"] in FINISHED:
+                return
+            await asyncio.sleep(self.poll_seconds)
+            idle += self.poll_seconds
+            if idle >= KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield b": keepalive\n\n"
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancels a queued job, or asks the worker running it to stop."""
+        cancelled = await asyncio.to_thread(self._request_cancel, job_id)
+        run = self._runs.get(job_id)
+        if run is not None:
+            run.cancel()
+        # Elsewhere, the worker running it sees the request on its next heartbeat.
+        return cancelled
+
+    def _request_cancel(self, job_id: str) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            queued = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (now, job_id),
+            ).rowcount
+            running = conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,)
+            ).rowcount
+        if queued:
+            self._append_events(job_id, [(self._last_seq(job_id) + 1, {"type": "end", "status": "cancelled"})])
+        return bool(queued or running)
+
+    # Running jobs.
+
+    def _append_events(self, job_id: str, events: list[tuple[int, dict]]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_events (job_id, seq, payload) VALUES (?, ?, ?)",
+                [(job_id, seq, json.dumps(payload, separators=(",", ":"))) for seq, payload in events],
+            )
+
+    def _last_seq(self, job_id: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+    def claim(self) -> Optional[dict[str, Any]]:
+        """Takes the oldest queued job for this worker, or ``None``."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,"
+                " started_at = ?, heartbeat_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1)"
+                " AND status = 'queued'"
+                " RETURNING id, app_name, user_id, session_id, request, attempts, created_at",
+                (self.worker_id, now, now),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, app_name, user_id, session_id, request, attempts, created_at = row
+        return {
+            "job_id": job_id,
+            "app_name": app_name,
+            "user_id": user_id,
+            "session_id": session_id,
+            "attempts": attempts,
+            "created_at": created_at,
+            **json.loads(request),
+        }
+
+    def _heartbeat(self, job_id: str) -> str:
+        """Renews this worker's lease on the job: ``"running"``, ``"cancel"`` or ``"lost"``."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, self.worker_id),
+            )
+            row = conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, self.worker_id),
+            ).fetchone()
+        if row is None:
+            return "lost"
+        return "cancel" if row[0] else "running"
+
+    def _finish(self, job_id: str, status: str, result: Optional[str], error: Optional[str]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (status, result, error, time.time(), job_id, self.worker_id),
+            )
+
+    def _release(self, job_id: str) -> None:
+        # Shutting down is not the job's fault, so the attempt does not count.
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, attempts = attempts - 1"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, self.worker_id),
+            )
+
+    def requeue_expired(self) -> int:
+        """Queues again the jobs of workers that stopped heartbeating; returns how many."""
+        now = time.time()
+        cutoff = now - self.lease_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'The worker running it stopped', finished_at = ?"
+                " WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                (now, cutoff, self.max_attempts),
+            )
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,),
+            ).rowcount
+        if requeued:
+            logger.warning("Requeued %d jobs of workers that stopped heartbeating", requeued)
+        return requeued
+
+    def purge(self) -> None:
+        cutoff = time.time() - self.retention
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM job_events WHERE job_id IN"
+                " (SELECT id FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?)",
+                (cutoff,),
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?", (cutoff,)
+            )
+
+    async def run_worker(self, runner_factory: Callable[[], Runner], concurrency: int) -> None:
+        """Runs queued jobs, ``concurrency`` at a time, until cancelled."""
+        wakeup = self._wakeup = asyncio.Event()
+        running: set[asyncio.Task] = set()
+        swept = 0.0
+        try:
+            while True:
+                if time.monotonic() - swept > self.heartbeat_seconds:
+                    swept = time.monotonic()
+                    await asyncio.to_thread(self.requeue_expired)
+                    await asyncio.to_thread(self.purge)
+                while len(running) < concurrency:
+                    job = await asyncio.to_thread(self.claim)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._execute(job, runner_factory()))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                    task.add_done_callback(lambda _: wakeup.set())
+                wakeup.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(wakeup.wait(), self.poll_seconds)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            self._wakeup = None
+
+    async def _execute(self, job: dict[str, Any], runner: Runner) -> None:
+        job_id = job["job_id"]
+        sink = JobEvents(self, job_id, await asyncio.to_thread(self._last_seq, job_id))
+        relay_events_to(sink)
+        sink.publish({"type": "job", "status": "running", "attempt": job["attempts"], "worker": self.worker_id})
+        run = asyncio.create_task(self._run(runner, job, sink))
+        self._runs[job_id] = run
+        lease = "running"
+        try:
+            while not run.done():
+                await asyncio.wait({run}, timeout=self.heartbeat_seconds)
+                if not run.done():
+                    lease = await asyncio.to_thread(self._heartbeat, job_id)
+                    if lease != "running":
+                        run.cancel()
+                        with contextlib.suppress(asyncio.CancelledError):
+                            await run
+        except asyncio.CancelledError:
+            # This worker is shutting down; another one reruns the job.
+            run.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await run
+            await sink.flush()
+            await asyncio.to_thread(self._release, job_id)
+            raise
+        finally:
+            self._runs.pop(job_id, None)
+
+        if lease == "lost":
+            # Requeued after missing heartbeats; the job is another worker's now.
+            logger.warning("Lost the lease on job %s", job_id)
+            sink.discard()
+            return
+        result = error = None
+        if run.cancelled():
+            status = "cancelled"
+            sink.publish({"type": "error", "message": "Run cancelled"})
+        elif run.exception() is not None:
+            status = "failed"
+            error = f"{type(run.exception()).__name__}: {run.exception()}"
+            logger.error("Job %s failed", job_id, exc_info=run.exception())
+            sink.publish({"type": "error", "message": str(run.exception())})
+        else:
+            status, result = "done", run.result()
+        sink.publish({"type": "end", "status": status})
+        # Readers stop at a finished status, so its events are stored first.
+        await sink.flush()
+        await asyncio.to_thread(self._finish, job_id, status, result, error)
+
+    async def _run(self, runner: Runner, job: dict[str, Any], sink: JobEvents) -> Optional[str]:
+        message = job.get("new_message")
+        new_message = types.Content.model_validate(message) if message else None
+        state_delta = job.get("state_delta")
+        if new_message is not None:
+            state_delta = await self._drop_earlier_attempt(runner, job, new_message, state_delta)
+        try:
+            async with contextlib.aclosing(
+                runner.run_async(
+                    user_id=job["user_id"],
+                    session_id=job["session_id"],
+                    new_message=new_message,
+                    state_delta=state_delta,
+                )
+            ) as events:
+                async for _ in events:
+                    pass
+        finally:
+            # A cancelled run skips the plugins' after-run callbacks.
+            if sink.invocation_id is not None:
+                await release_invocation(sink.invocation_id)
+        if sink.answer is not None:
+            # This turn's reply: the memo, or the answer to a follow-up question.
+            return sink.answer
+        session = await runner.session_service.get_session(
+            app_name=job["app_name"], user_id=job["user_id"], session_id=job["session_id"]
+        )
+        memo = session.state.get(MEMO_OUTPUT_KEY) if session is not None else None
+        return memo if isinstance(memo, str) else None
+
+    async def _drop_earlier_attempt(
+        self, runner: Runner, job: dict[str, Any], new_message: types.Content, state_delta: Optional[dict[str, Any]]
+    ) -> Optional[dict[str, Any]]:
+        """Removes the turn an earlier attempt of the job left unfinished; returns the run's state delta.
+
+        A rerun appends the job's message again, so without this the session
+        would hold the message twice, the first time without a reply.
+        """
+        service = runner.session_service
+        if not isinstance(service, BoundedSessionService):
+            return state_delta
+        session = await service.get_session(
+            app_name=job["app_name"], user_id=job["user_id"], session_id=job["session_id"]
+        )
+        if session is None:
+            return state_delta
+        dropped = await service.drop_last_turn(session, new_message, job["created_at"])
+        if not dropped:
+            return state_delta
+        logger.warning("Job %s: dropped %d events of an earlier attempt", job["job_id"], len(dropped))
+        # Agents briefed from the research cache in the dropped turn no longer
+        # have that briefing in the conversation.
+        briefed = {
+            key
+            for event in dropped
+            for key in event.actions.state_delta
+            if key.startswith(BRIEFED_STATE_PREFIX)
+        }
+        return {**{key: None for key in briefed}, **(state_delta or {})}
+
+    def metrics(self) -> dict[str, Any]:
+        since = time.time() - 3600
+        with self._connect() as conn:
+            by_status = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            by_worker = dict(
+                conn.execute("SELECT worker, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY worker").fetchall()
+            )
+            finished, wait_avg, run_avg = conn.execute(
+                "SELECT COUNT(*), AVG(started_at - created_at), AVG(finished_at - started_at)"
+                " FROM jobs WHERE status = 'done' AND finished_at >= ?",
+                (since,),
+            ).fetchone()
+        return {
+            "worker": self.worker_id,
+            "running_here": len(self._runs),
+            "jobs": by_status,
+            "running_by_worker": by_worker,
+            "done_last_hour": finished,
+            "queued_seconds_avg": round(wait_avg or 0.0, 3),
+            "run_seconds_avg": round(run_avg or 0.0, 3),
+        }
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue(
+            os.getenv("JOB_STORE_PATH", DEFAULT_STORE_PATH),
+            heartbeat_seconds=float(os.getenv("JOB_HEARTBEAT_SECONDS", "5")),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "2")),
+            retention=float(os.getenv("JOB_RETENTION_SECONDS", "86400")),
+        )
+    return _queue
+
+
+def job_concurrency() -> int:
+    """Jobs each app worker runs at once (``JOB_CONCURRENCY``)."""
+    return int(os.getenv("JOB_CONCURRENCY", "2"))
+
+
+async def _consume(concurrency: int) -> None:
+    from .agent import root_agent
+    from .batch import APP_NAME
+    from .mcp_pool import close_pools, mcp_lease_plugin
+    from .page_fetch import close_page_fetcher
+    from .session_store import app_session_service
+    from .stream_relay import stream_relay_plugin
+    from .tracing import tracing_plugin
+
+    runner = Runner(
+        app_name=APP_NAME,
+        agent=root_agent,
+        session_service=app_session_service(),
+        plugins=[tracing_plugin, stream_relay_plugin, mcp_lease_plugin],
+    )
+    try:
+        await get_job_queue().run_worker(lambda: runner, concurrency)
+    finally:
+        await close_page_fetcher()
+        await close_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queued jobs without serving HTTP.")
+    parser.add_argument("--concurrency", type=int, default=job_concurrency(), help="Jobs to run at once.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_consume(args.concurrency))
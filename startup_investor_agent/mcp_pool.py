@@ -0,0 +1,453 @@
+"""Pool of pre-warmed MCP server processes shared across agent runs.
+
+``McpToolset`` starts its stdio server lazily on the request path, and with
+``npx -y ...@latest`` that includes package resolution and a cold browser
+start. ``McpServerPool`` keeps ``min_size`` servers running and hands them
+out to invocations:
+
+- An invocation leases one server on its first tool call and keeps it until
+  ``release`` (or until the lease sits idle for ``lease_idle_seconds``), so
+  stateful servers such as Playwright see one consistent browser per memo.
+  ``mcp_lease_plugin`` releases it when the run ends, including runs that fail.
+- At most ``max_size`` servers run at once; further invocations wait.
+- Idle servers are pinged every ``health_check_interval`` seconds and
+  replaced when they stop answering.
+- A server is recycled after ``max_uses`` leases.
+
+``pool.metrics()`` reports wait, spawn and utilisation figures.
+
+The MCP client libraries are imported when the first server is spawned, not
+with this module: they make up most of a worker's import time and memory,
+and a worker that never calls an MCP tool does not need them.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_toolset import BaseToolset
+
+if TYPE_CHECKING:
+    from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager, StdioConnectionParams
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE_BIN_DIR = os.path.join(BASE_DIR, "node_modules", ".bin")
+
+_pools: dict[str, "McpServerPool"] = {}
+
+
+def resolve_server_command(package: str, bin_name: str, version: str = "") -> tuple[str, list[str]]:
+    """Returns ``(command, args)`` that start an MCP server without an ``@latest`` lookup.
+
+    A binary installed in the repo's ``node_modules`` is used directly. Otherwise
+    ``npx --prefer-offline`` runs ``package``, pinned to ``version`` when given.
+    """
+    local_bin = os.path.join(NODE_BIN_DIR, bin_name)
+    if os.path.isfile(local_bin):
+        return local_bin, []
+    if not version:
+        # npx resolves a bare package name to whatever is newest in its cache or the registry.
+        logger.info("%s is not installed in node_modules and has no pinned version", package)
+        return "npx", ["--prefer-offline", "-y", package]
+    return "npx", ["--prefer-offline", "-y", f"{package}@{version}"]
+
+
+class _PooledServer:
+    """One running MCP server process and its bookkeeping."""
+
+    def __init__(self, manager: "MCPSessionManager", spawn_seconds: float):
+        self.manager = manager
+        self.spawn_seconds = spawn_seconds
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+
+class _InvocationLease:
+    """Stands in for ``MCPSessionManager`` in ``McpTool``s built for one invocation.
+
+    The server is acquired from the pool on the first tool call only, so agents
+    that never touch the browser never hold one.
+    """
+
+    def __init__(self, pool: "McpServerPool", invocation_id: str):
+        self._pool = pool
+        self.invocation_id = invocation_id
+        self.server: Optional[_PooledServer] = None
+        self.last_used = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def create_session(self, headers: Optional[dict[str, str]] = None):
+        async with self._lock:
+            if self.server is None:
+                self.server = await self._pool.acquire()
+        self.last_used = time.monotonic()
+        return await self.server.manager.create_session(headers=headers)
+
+    def __getattr__(self, name: str) -> Any:
+        # Session bookkeeping (_begin_session_use, _discard_session, ...) goes to
+        # the leased server's own manager.
+        server = self.__dict__.get("server")
+        if server is None:
+            raise AttributeError(name)
+        return getattr(server.manager, name)
+
+
+class McpServerPool:
+    def __init__(
+        self,
+        name: str,
+        command: str,
+        args: list[str],
+        working_dir: Optional[str] = None,
+        timeout: float = 300,
+        min_size: int = 1,
+        max_size: int = 4,
+        max_uses: int = 50,
+        health_check_interval: float = 30,
+        lease_idle_seconds: float = 600,
+        warmup_tool: Optional[tuple[str, dict]] = None,
+        reset_tool: Optional[tuple[str, dict]] = None,
+    ):
+        self.name = name
+        self.command = command
+        self.args = args
+        self.working_dir = working_dir
+        self.timeout = timeout
+        self._connection_params: Optional["StdioConnectionParams"] = None
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.max_uses = max_uses
+        self.health_check_interval = health_check_interval
+        self.lease_idle_seconds = lease_idle_seconds
+        self.warmup_tool = warmup_tool
+        self.reset_tool = reset_tool
+
+        self._idle: list[_PooledServer] = []
+        self._active: set[_PooledServer] = set()
+        self._spawning = 0
+        # Idle servers taken out of ``_idle`` while the health check pings them.
+        self._checking: set[_PooledServer] = set()
+        self._leases: dict[str, _InvocationLease] = {}
+        self._tools = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._stats = {
+            "spawned": 0,
+            "spawn_seconds_total": 0.0,
+            "spawn_seconds_last": 0.0,
+            "spawn_failures": 0,
+            "acquired": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "waiting": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+        }
+        _pools[name] = self
+
+    @property
+    def _cond(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @property
+    def connection_params(self) -> "StdioConnectionParams":
+        if self._connection_params is None:
+            from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+            from mcp import StdioServerParameters
+
+            self._connection_params = StdioConnectionParams(
+                server_params=StdioServerParameters(command=self.command, args=self.args, cwd=self.working_dir),
+                timeout=self.timeout,
+            )
+        return self._connection_params
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._active) + self._spawning + len(self._checking)
+
+    async def start(self) -> None:
+        """Spawns ``min_size`` servers and starts health checks. Safe to call again."""
+        self._start_maintenance()
+        await self._fill_to_min()
+
+    def _start_maintenance(self) -> None:
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = asyncio.create_task(self._maintain())
+
+    async def close(self) -> None:
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        servers = self._idle + list(self._active) + list(self._checking)
+        self._idle, self._active, self._checking, self._leases = [], set(), set(), {}
+        for server in servers:
+            await self._close_server(server)
+
+    async def _spawn(self) -> _PooledServer:
+        from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager
+
+        started = time.perf_counter()
+        manager = MCPSessionManager(self.connection_params)
+        try:
+            session = await manager.create_session()
+            if self.warmup_tool:
+                await session.call_tool(self.warmup_tool[0], arguments=self.warmup_tool[1])
+        except Exception:
+            self._stats["spawn_failures"] += 1
+            await manager.close()
+            raise
+        seconds = time.perf_counter() - started
+        self._stats["spawned"] += 1
+        self._stats["spawn_seconds_total"] += seconds
+        self._stats["spawn_seconds_last"] = seconds
+        logger.info("Spawned %s MCP server in %.2fs", self.name, seconds)
+        return _PooledServer(manager, seconds)
+
+    async def _close_server(self, server: _PooledServer) -> None:
+        try:
+            await server.manager.close()
+        except Exception as e:
+            logger.warning("Failed to close %s MCP server: %s", self.name, e)
+
+    async def _fill_to_min(self) -> None:
+        while self.size < self.min_size:
+            self._spawning += 1
+            try:
+                server = await self._spawn()
+            except Exception as e:
+                await self._spawn_failed()
+                logger.warning("Could not pre-warm %s MCP server: %s", self.name, e)
+                return
+            async with self._cond:
+                self._spawning -= 1
+                self._idle.append(server)
+                self._cond.notify()
+
+    async def _spawn_failed(self) -> None:
+        # The slot reserved for the spawn is free again; wake a caller waiting at max_size.
+        async with self._cond:
+            self._spawning -= 1
+            self._cond.notify()
+
+    async def acquire(self) -> _PooledServer:
+        """Takes an idle server, spawning one if under ``max_size``, else waits."""
+        # A pool that was not warmed at startup starts its health checks on first use.
+        self._start_maintenance()
+        started = time.perf_counter()
+        self._stats["waiting"] += 1
+        try:
+            async with self._cond:
+                while not self._idle and self.size >= self.max_size:
+                    await self._cond.wait()
+                server = self._idle.pop() if self._idle else None
+                if server is None:
+                    self._spawning += 1
+            if server is None:
+                try:
+                    server = await self._spawn()
+                except BaseException:
+                    await self._spawn_failed()
+                    raise
+                self._spawning -= 1
+        finally:
+            self._stats["waiting"] -= 1
+
+        waited = time.perf_counter() - started
+        self._stats["acquired"] += 1
+        self._stats["wait_seconds_total"] += waited
+        self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        server.uses += 1
+        server.last_used = time.monotonic()
+        self._active.add(server)
+        return server
+
+    async def _return(self, server: _PooledServer) -> None:
+        self._active.discard(server)
+        recycle = server.uses >= self.max_uses
+        if not recycle and self.reset_tool:
+            try:
+                session = await server.manager.create_session()
+                await session.call_tool(self.reset_tool[0], arguments=self.reset_tool[1])
+            except Exception as e:
+                logger.warning("Resetting %s MCP server failed, recycling it: %s", self.name, e)
+                recycle = True
+        if recycle:
+            self._stats["recycled"] += 1
+            await self._close_server(server)
+        else:
+            server.last_used = time.monotonic()
+            self._idle.append(server)
+        async with self._cond:
+            self._cond.notify()
+        if recycle:
+            await self._fill_to_min()
+
+    def lease(self, invocation_id: str) -> _InvocationLease:
+        lease = self._leases.get(invocation_id)
+        if lease is None:
+            lease = self._leases[invocation_id] = _InvocationLease(self, invocation_id)
+        return lease
+
+    async def release(self, invocation_id: str) -> None:
+        lease = self._leases.pop(invocation_id, None)
+        if lease is not None and lease.server is not None:
+            await self._return(lease.server)
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """A session on a pooled server held only for the ``async with`` block, outside any lease."""
+        server = await self.acquire()
+        try:
+            yield await server.manager.create_session()
+        finally:
+            await self._return(server)
+
+    async def list_tools(self):
+        """The server's tool list, fetched once from a pooled server."""
+        if self._tools is None:
+            async with self.session() as session:
+                self._tools = (await session.list_tools()).tools
+        return self._tools
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._check_health()
+            except Exception as e:
+                logger.warning("Health check of %s MCP pool failed: %s", self.name, e)
+
+    async def _check_health(self) -> None:
+        now = time.monotonic()
+        for invocation_id, lease in list(self._leases.items()):
+            if now - lease.last_used > self.lease_idle_seconds:
+                logger.info("Reclaiming idle %s lease of invocation %s", self.name, invocation_id)
+                await self.release(invocation_id)
+
+        for server in list(self._idle):
+            if server not in self._idle:
+                continue
+            # Out of the idle list while pinged, so no invocation leases it meanwhile.
+            self._idle.remove(server)
+            self._checking.add(server)
+            try:
+                session = await server.manager.create_session()
+                await asyncio.wait_for(session.send_ping(), timeout=10)
+            except Exception as e:
+                self._stats["health_check_failures"] += 1
+                logger.warning("%s MCP server failed its health check: %s", self.name, e)
+                await self._close_server(server)
+                healthy = False
+            else:
+                healthy = True
+            async with self._cond:
+                self._checking.discard(server)
+                if healthy:
+                    self._idle.append(server)
+                self._cond.notify()
+        await self._fill_to_min()
+
+    def metrics(self) -> dict:
+        stats = self._stats
+        return {
+            "name": self.name,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self.size,
+            "idle": len(self._idle),
+            "active": len(self._active),
+            "spawning": self._spawning,
+            "leases": len(self._leases),
+            "waiting": stats["waiting"],
+            "acquired": stats["acquired"],
+            "wait_seconds_avg": stats["wait_seconds_total"] / stats["acquired"] if stats["acquired"] else 0.0,
+            "wait_seconds_max": stats["wait_seconds_max"],
+            "spawned": stats["spawned"],
+            "spawn_seconds_avg": stats["spawn_seconds_total"] / stats["spawned"] if stats["spawned"] else 0.0,
+            "spawn_seconds_last": stats["spawn_seconds_last"],
+            "spawn_failures": stats["spawn_failures"],
+            "recycled": stats["recycled"],
+            "health_check_failures": stats["health_check_failures"],
+        }
+
+
+class PooledMcpToolset(BaseToolset):
+    """Exposes a pool's MCP tools; calls run on the invocation's leased server.
+
+    ``close`` leaves the pool running: pools outlive individual runners and are
+    shut down with the app through ``close_pools``.
+    """
+
+    def __init__(self, pool: McpServerPool, tool_filter=None, tool_name_prefix: Optional[str] = None):
+        super().__init__(tool_filter=tool_filter, tool_name_prefix=tool_name_prefix)
+        self.pool = pool
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None):
+        from google.adk.tools.mcp_tool.mcp_tool import McpTool
+
+        invocation_id = readonly_context.invocation_id if readonly_context else "default"
+        lease = self.pool.lease(invocation_id)
+        tools = [
+            McpTool(mcp_tool=mcp_tool, mcp_session_manager=lease)
+            for mcp_tool in await self.pool.list_tools()
+        ]
+        return [tool for tool in tools if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        pass
+
+
+def all_pools() -> list[McpServerPool]:
+    return list(_pools.values())
+
+
+async def start_pools() -> None:
+    await asyncio.gather(*(pool.start() for pool in all_pools()))
+
+
+async def close_pools() -> None:
+    await asyncio.gather(*(pool.close() for pool in all_pools()))
+
+
+async def release_invocation(invocation_id: str) -> None:
+    """Returns the servers leased by an invocation to their pools."""
+    for pool in all_pools():
+        await pool.release(invocation_id)
+
+
+async def release_mcp_leases(callback_context: CallbackContext) -> None:
+    """``after_agent_callback`` returning the invocation's servers to their pools."""
+    await release_invocation(callback_context.invocation_id)
+    return None
+
+
+class McpLeasePlugin(BasePlugin):
+    """Releases a run's leases when it ends, whether it finished or raised.
+
+    ``release_mcp_leases`` only runs when its agent finishes normally.
+    Cancelled runs skip both plugin callbacks; their drivers call
+    ``release_invocation`` themselves.
+    """
+
+    def __init__(self, name: str = "mcp_leases"):
+        super().__init__(name=name)
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        await release_invocation(invocation_context.invocation_id)
+
+    async def on_run_error_callback(self, *, invocation_context: InvocationContext, error: Exception) -> None:
+        await release_invocation(invocation_context.invocation_id)
+
+
+mcp_lease_plugin = McpLeasePlugin()
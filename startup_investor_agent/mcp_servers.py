@@ -0,0 +1,67 @@
+"""MCP server pools used by the root agent.
+
+Pool sizes and pinned package versions come from the environment:
+
+- ``PLAYWRIGHT_POOL_MIN`` / ``PLAYWRIGHT_POOL_MAX`` / ``PLAYWRIGHT_POOL_MAX_USES``
+- ``SEQUENTIAL_THINKING_POOL_MIN`` / ``SEQUENTIAL_THINKING_POOL_MAX``
+- ``PLAYWRIGHT_MCP_VERSION`` (default ``PLAYWRIGHT_MCP_DEFAULT_VERSION``) /
+  ``SEQUENTIAL_THINKING_MCP_VERSION``, used only when the server is not
+  installed in ``node_modules``.
+"""
+
+import os
+
+from .mcp_pool import McpServerPool, resolve_server_command
+
+# The @playwright/mcp release npx runs when node_modules has no
+# mcp-server-playwright; bump it deliberately, together with the tool names
+# the agents and page_fetch call.
+PLAYWRIGHT_MCP_DEFAULT_VERSION = "0.0.36"
+
+TARGET_FOLDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "./")
+
+MCP_TIMEOUT_ARGS = [
+    "--timeout-action",
+    "300000",
+    "--timeout-navigation",
+    "300000",
+]
+
+_playwright_command, _playwright_args = resolve_server_command(
+    "@playwright/mcp", "mcp-server-playwright", os.getenv("PLAYWRIGHT_MCP_VERSION", PLAYWRIGHT_MCP_DEFAULT_VERSION)
+)
+
+playwright_pool = McpServerPool(
+    name="playwright",
+    command=_playwright_command,
+    # --isolated keeps each server's browser profile in memory, so pooled
+    # servers do not fight over one profile directory.
+    args=_playwright_args + ["--headless", "--isolated"] + MCP_TIMEOUT_ARGS,
+    working_dir=TARGET_FOLDER_PATH,
+    timeout=300,
+    min_size=int(os.getenv("PLAYWRIGHT_POOL_MIN", "1")),
+    max_size=int(os.getenv("PLAYWRIGHT_POOL_MAX", "4")),
+    max_uses=int(os.getenv("PLAYWRIGHT_POOL_MAX_USES", "50")),
+    # Launch Chromium while warming up rather than on the first real navigation.
+    warmup_tool=("browser_navigate", {"url": "about:blank"}),
+    # Close the browser context between leases, so no cookies, storage or open
+    # tabs carry over from one memo to the next; the next navigation opens a
+    # fresh one.
+    reset_tool=("browser_close", {}),
+)
+
+_sequential_thinking_command, _sequential_thinking_args = resolve_server_command(
+    "mcp-sequential-thinking",
+    "mcp-sequential-thinking",
+    os.getenv("SEQUENTIAL_THINKING_MCP_VERSION", ""),
+)
+
+sequential_thinking_pool = McpServerPool(
+    name="sequential_thinking",
+    command=_sequential_thinking_command,
+    args=_sequential_thinking_args + MCP_TIMEOUT_ARGS,
+    working_dir=TARGET_FOLDER_PATH,
+    timeout=300,
+    min_size=int(os.getenv("SEQUENTIAL_THINKING_POOL_MIN", "0")),
+    max_size=int(os.getenv("SEQUENTIAL_THINKING_POOL_MAX", "2")),
+)
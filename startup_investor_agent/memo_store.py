@@ -0,0 +1,311 @@
+"""Section-level memo artifacts, for refreshing a memo without redoing all of it.
+
+Every run stores each specialist's output as an artifact of the startup, with
+its creation time and a hash of its inputs: the agent's prompt, the startup and
+any upstream outputs it reads. A run that names no startup website stores
+nothing. The finished memo is split into its nine sections (a reply without
+them, such as an answer to a follow-up question, is not stored), and each
+section is stored with the sources it is built from (``SECTION_SOURCES``) and
+those sources' timestamps.
+
+When a run sets the session state key ``memo_refresh`` to true, artifacts are
+reused instead of regenerated. A specialist reruns only if its stored output is
+older than the agent's maximum age, or if its inputs no longer hash to the same
+value. The memo synthesis reruns only if at least one of its inputs changed;
+otherwise the stored memo is returned without calling the model. Refreshes
+should also set ``research_cache`` to ``"refresh"`` (``REFRESH_STATE`` does),
+so a stale specialist is actually rerun instead of being answered from the
+research cache.
+
+The store lives in ``MEMO_STORE_PATH`` (default ``.data/memo_store.sqlite3``).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .research_cache import CACHE_MODE_STATE_KEY, prompt_version, startup_key_source
+
+logger = logging.getLogger(__name__)
+
+REFRESH_STATE_KEY = "memo_refresh"
+REFRESH_STATE = {REFRESH_STATE_KEY: True, CACHE_MODE_STATE_KEY: "refresh"}
+
+MEMO_OUTPUT_KEY = "investment_memo"
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE_PATH = os.path.join(BASE_DIR, ".data", "memo_store.sqlite3")
+
+# Memo section number -> the specialist outputs it is written from.
+SECTION_SOURCES = {
+    1: ("market_data_analysis_output", "final_product_and_tech_output", "final_risk_assessment_output"),
+    2: ("market_data_analysis_output", "final_product_and_tech_output"),
+    3: ("final_product_and_tech_output",),
+    4: ("market_data_analysis_output",),
+    5: ("market_data_analysis_output",),
+    6: ("market_data_analysis_output",),
+    7: ("market_data_analysis_output",),
+    8: ("final_risk_assessment_output",),
+    9: ("market_data_analysis_output", "final_product_and_tech_output", "final_risk_assessment_output"),
+}
+
+_SECTION_RE = re.compile(r"^[ \t]*(?:#+[ \t]*)?\*\*(\d)\.[ \t]*([^*\n]+?):?\*\*:?[ \t]*", re.MULTILINE)
+
+
+def content_hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def split_sections(memo: str) -> dict[int, tuple[str, str]]:
+    """``{number: (title, body)}`` for the numbered ``**N. Title:**`` sections of a memo."""
+    matches = list(_SECTION_RE.finditer(memo))
+    sections = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(memo)
+        title = re.sub(r"\s*\(Source:.*\)$", "", match.group(2)).strip()
+        sections[int(match.group(1))] = (title, memo[match.end():end].strip())
+    return sections
+
+
+class MemoStore:
+    """Stores per-startup artifacts in SQLite; one connection per operation."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " subject TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " input_hash TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (subject, name))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memo_sections ("
+                " subject TEXT NOT NULL,"
+                " number INTEGER NOT NULL,"
+                " title TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " input_hash TEXT NOT NULL,"
+                " sources TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (subject, number))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get_artifact(self, subject: str, name: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, input_hash, created_at FROM artifacts WHERE subject = ? AND name = ?",
+                (subject, name),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content": row[0], "input_hash": row[1], "created_at": row[2]}
+
+    def put_artifact(self, subject: str, name: str, content: str, input_hash: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (subject, name, content, input_hash, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (subject, name, content, input_hash, time.time()),
+            )
+
+    def put_memo(self, subject: str, memo: str, input_hash: str, sources: dict[str, str]) -> list[int]:
+        """Stores the memo and its sections; returns the numbers of sections whose sources changed.
+
+        ``sources`` maps each specialist output key to its current text.
+        """
+        self.put_artifact(subject, MEMO_OUTPUT_KEY, memo, input_hash)
+        created = {}
+        for name in sources:
+            artifact = self.get_artifact(subject, name)
+            created[name] = artifact["created_at"] if artifact else None
+
+        changed = []
+        now = time.time()
+        with self._connect() as conn:
+            previous = dict(
+                conn.execute("SELECT number, input_hash FROM memo_sections WHERE subject = ?", (subject,)).fetchall()
+            )
+            for number, (title, body) in split_sections(memo).items():
+                names = SECTION_SOURCES.get(number, tuple(sources))
+                section_hash = content_hash(*(sources.get(name, "") for name in names))
+                if previous.get(number) != section_hash:
+                    changed.append(number)
+                conn.execute(
+                    "INSERT OR REPLACE INTO memo_sections"
+                    " (subject, number, title, content, input_hash, sources, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        subject,
+                        number,
+                        title,
+                        body,
+                        section_hash,
+                        json.dumps({name: created.get(name) for name in names}),
+                        now,
+                    ),
+                )
+        return changed
+
+    def memo(self, subject: str) -> Optional[dict]:
+        """The stored memo with its sections and their source timestamps."""
+        memo = self.get_artifact(subject, MEMO_OUTPUT_KEY)
+        if memo is None:
+            return None
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT number, title, content, input_hash, sources, updated_at FROM memo_sections"
+                " WHERE subject = ? ORDER BY number",
+                (subject,),
+            ).fetchall()
+        return {
+            "subject": subject,
+            "memo": memo["content"],
+            "created_at": memo["created_at"],
+            "sections": [
+                {
+                    "number": number,
+                    "title": title,
+                    "content": content,
+                    "input_hash": section_hash,
+                    "sources": json.loads(sources),
+                    "updated_at": updated_at,
+                }
+                for number, title, content, section_hash, sources, updated_at in rows
+            ],
+        }
+
+    def expire(self, subject: str, name: Optional[str] = None) -> int:
+        """Forces the next refresh to rerun ``name`` (or every agent) for a startup."""
+        with self._connect() as conn:
+            if name is None:
+                return conn.execute("DELETE FROM artifacts WHERE subject = ?", (subject,)).rowcount
+            return conn.execute(
+                "DELETE FROM artifacts WHERE subject = ? AND name = ?", (subject, name)
+            ).rowcount
+
+
+_store: Optional[MemoStore] = None
+
+
+def get_memo_store() -> MemoStore:
+    global _store
+    if _store is None:
+        _store = MemoStore(os.getenv("MEMO_STORE_PATH", DEFAULT_STORE_PATH))
+    return _store
+
+
+def reset_memo_store() -> None:
+    """Forgets the process-wide store so the next ``get_memo_store`` re-reads the environment."""
+    global _store
+    _store = None
+
+
+def _refreshing(callback_context: CallbackContext) -> bool:
+    return bool(callback_context.state.get(REFRESH_STATE_KEY))
+
+
+def _inputs_hash(version: str, subject: str, callback_context: CallbackContext, depends_on: tuple[str, ...]) -> str:
+    return content_hash(version, subject, *(str(callback_context.state.get(key, "")) for key in depends_on))
+
+
+def section_callbacks(
+    prompt_text: str,
+    output_key: str,
+    max_age_days: float,
+    depends_on: tuple[str, ...] = (),
+) -> tuple[Callable, Callable]:
+    """Returns ``(before_agent_callback, after_agent_callback)`` storing ``output_key`` as an artifact.
+
+    On a refresh, the before callback answers from the stored artifact while it
+    is younger than ``max_age_days`` and its inputs (``depends_on`` state keys)
+    are unchanged.
+    """
+    version = prompt_version(prompt_text)
+
+    def reuse_if_fresh(callback_context: CallbackContext) -> Optional[types.Content]:
+        if not _refreshing(callback_context):
+            return None
+        subject = startup_key_source(callback_context)
+        stored = get_memo_store().get_artifact(subject, output_key) if subject is not None else None
+        if stored is None:
+            return None
+        if stored["input_hash"] != _inputs_hash(version, subject, callback_context, depends_on):
+            logger.info("Refresh: rerunning %s for %s (inputs changed)", callback_context.agent_name, subject)
+            return None
+        if time.time() - stored["created_at"] > max_age_days * 86400:
+            logger.info("Refresh: rerunning %s for %s (older than %g days)", callback_context.agent_name, subject, max_age_days)
+            return None
+        callback_context.state[output_key] = stored["content"]
+        return types.Content(role="model", parts=[types.Part(text=stored["content"])])
+
+    def store(callback_context: CallbackContext) -> None:
+        output = callback_context.state.get(output_key)
+        subject = startup_key_source(callback_context)
+        if subject is not None and isinstance(output, str) and output.strip():
+            get_memo_store().put_artifact(
+                subject, output_key, output, _inputs_hash(version, subject, callback_context, depends_on)
+            )
+        return None
+
+    return reuse_if_fresh, store
+
+
+def memo_callbacks(prompt_text: str, sources: tuple[str, ...]) -> tuple[Callable, Callable]:
+    """Returns ``(before_agent_callback, after_agent_callback)`` for an agent writing the memo.
+
+    The memo is stored section by section. On a refresh, the before callback
+    returns the stored memo when none of ``sources`` changed since it was written.
+    """
+    version = prompt_version(prompt_text)
+
+    def reuse_if_unchanged(callback_context: CallbackContext) -> Optional[types.Content]:
+        if not _refreshing(callback_context):
+            return None
+        subject = startup_key_source(callback_context)
+        stored = get_memo_store().get_artifact(subject, MEMO_OUTPUT_KEY) if subject is not None else None
+        if stored is None or stored["input_hash"] != _inputs_hash(version, subject, callback_context, sources):
+            return None
+        logger.info("Refresh: memo for %s is unchanged", subject)
+        callback_context.state[MEMO_OUTPUT_KEY] = stored["content"]
+        return types.Content(role="model", parts=[types.Part(text=stored["content"])])
+
+    def store(callback_context: CallbackContext) -> None:
+        memo = callback_context.state.get(MEMO_OUTPUT_KEY)
+        if not isinstance(memo, str) or not memo.strip():
+            return None
+        subject = startup_key_source(callback_context)
+        if subject is None:
+            logger.info("Not storing the memo: the request names no startup website")
+            return None
+        if not split_sections(memo):
+            # The root agent's output_key also captures follow-up replies; only
+            # a reply with the memo's sections replaces the stored memo.
+            logger.info("Not storing the reply for %s as its memo: it has no memo sections", subject)
+            return None
+        changed = get_memo_store().put_memo(
+            subject,
+            memo,
+            _inputs_hash(version, subject, callback_context, sources),
+            {key: str(callback_context.state.get(key, "")) for key in sources},
+        )
+        logger.info("Stored memo for %s; sections with new inputs: %s", subject, changed or "none")
+        return None
+
+    return reuse_if_unchanged, store
@@ -0,0 +1,273 @@
+"""Client-side scheduler shared by every model call in the package.
+
+All agents talk to Gemini through ``ScheduledGemini``, which waits for a
+``ModelScheduler`` slot before each call:
+
+- Token buckets cap requests per minute (``MODEL_RPM``) and tokens per minute
+  (``MODEL_TPM``). Token use is estimated up front and corrected from the
+  response's usage metadata.
+- Waiting calls are served by lane: ``interactive`` before ``batch``. The lane
+  comes from the ``priority_lane`` context, which the batch runner sets.
+- Identical requests issued while one is already in flight share its result.
+- A quota error (429 / RESOURCE_EXHAUSTED) pauses every lane for
+  ``MODEL_QUOTA_COOLDOWN_SECONDS`` instead of letting each caller retry at once.
+
+``get_scheduler().metrics()`` reports queue depth, throttle time and dedup hits.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+
+logger = logging.getLogger(__name__)
+
+LANES = {"interactive": 0, "batch": 1}
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("model_priority_lane", default="interactive")
+
+
+@contextlib.contextmanager
+def priority_lane(lane: str):
+    """Runs model calls made inside the block (and tasks it spawns) in ``lane``."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown priority lane {lane!r}; expected one of {sorted(LANES)}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken; 0 if it can be taken now."""
+        self._refill()
+        # A request larger than the whole bucket only has to wait for a full one.
+        needed = min(amount, self.capacity) - self.tokens
+        return max(needed, 0.0) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def adjust(self, amount: float) -> None:
+        """Gives back (or charges further) tokens once the real usage is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough prompt size: about four characters per token."""
+    chars = len(str(llm_request.config.system_instruction or ""))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_response or part.function_call:
+                chars += len(str(part.function_response or part.function_call))
+    return max(1, chars // 4)
+
+
+def request_key(llm_request: LlmRequest) -> Optional[str]:
+    try:
+        payload = llm_request.model_dump_json(include={"model", "contents", "config"})
+    except Exception:
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_quota_error(error: Exception) -> bool:
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+class ModelScheduler:
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        quota_cooldown_seconds: float = 30,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.quota_cooldown_seconds = quota_cooldown_seconds
+        self._cooldown_until = 0.0
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._stats = {
+            "calls": 0,
+            "dedup_hits": 0,
+            "throttled_calls": 0,
+            "throttle_seconds_total": 0.0,
+            "throttle_seconds_max": 0.0,
+            "quota_errors": 0,
+            "estimated_tokens": 0,
+            "actual_tokens": 0,
+        }
+        self._lane_stats = {lane: {"calls": 0, "throttle_seconds_total": 0.0} for lane in LANES}
+
+    def _pump(self) -> None:
+        """Admits waiters in priority order while both buckets have room."""
+        self._timer = None
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(
+                self._cooldown_until - time.monotonic(),
+                self.requests.delay_for(1),
+                self.tokens.delay_for(tokens),
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            future.set_result(None)
+
+    async def acquire(self, tokens: int, lane: str) -> float:
+        """Waits for a call slot; returns the seconds spent throttled."""
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (LANES[lane], next(self._sequence), tokens, future))
+        if self._timer is None:
+            self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if self._timer is None:
+                self._pump()
+            raise
+
+        waited = time.monotonic() - started
+        self._stats["calls"] += 1
+        self._stats["estimated_tokens"] += tokens
+        self._lane_stats[lane]["calls"] += 1
+        if waited > 0.001:
+            self._stats["throttled_calls"] += 1
+            self._stats["throttle_seconds_total"] += waited
+            self._stats["throttle_seconds_max"] = max(self._stats["throttle_seconds_max"], waited)
+            self._lane_stats[lane]["throttle_seconds_total"] += waited
+        return waited
+
+    def record_usage(self, estimated: int, actual: Optional[int]) -> None:
+        if actual is None:
+            return
+        self._stats["actual_tokens"] += actual
+        self.tokens.adjust(estimated - actual)
+
+    def record_quota_error(self) -> None:
+        self._stats["quota_errors"] += 1
+        self._cooldown_until = time.monotonic() + self.quota_cooldown_seconds
+        logger.warning("Model quota exceeded; pausing model calls for %.0fs", self.quota_cooldown_seconds)
+
+    async def generate(self, llm: "ScheduledGemini", llm_request: LlmRequest, stream: bool):
+        """Runs ``llm``'s call through the scheduler, sharing identical in-flight calls."""
+        key = None if stream else request_key(llm_request)
+        if key is not None and key in self._in_flight:
+            self._stats["dedup_hits"] += 1
+            for response in await asyncio.shield(self._in_flight[key]):
+                yield response
+            return
+
+        shared = None
+        if key is not None:
+            shared = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        responses = []
+        try:
+            estimated = estimate_tokens(llm_request)
+            await self.acquire(estimated, _lane.get())
+            usage = None
+            try:
+                async for response in llm._generate_unscheduled(llm_request, stream):
+                    if response.usage_metadata and response.usage_metadata.total_token_count:
+                        usage = response.usage_metadata.total_token_count
+                    responses.append(response)
+                    yield response
+            except Exception as e:
+                if _is_quota_error(e):
+                    self.record_quota_error()
+                raise
+            self.record_usage(estimated, usage)
+            if shared is not None:
+                shared.set_result(responses)
+        except BaseException as e:
+            if shared is not None and not shared.done():
+                shared.set_exception(e if isinstance(e, Exception) else RuntimeError("Model call cancelled"))
+                # Nobody else may be waiting on it; keep the loop quiet about that.
+                shared.exception()
+            raise
+        finally:
+            if key is not None and self._in_flight.get(key) is shared:
+                del self._in_flight[key]
+
+    def metrics(self) -> dict:
+        depth = {lane: 0 for lane in LANES}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                depth[next(lane for lane, p in LANES.items() if p == priority)] += 1
+        return {
+            "queue_depth": depth,
+            "in_flight_shared": len(self._in_flight),
+            "requests_available": round(self.requests.tokens, 1),
+            "tokens_available": round(self.tokens.tokens),
+            "cooling_down": self._cooldown_until > time.monotonic(),
+            **self._stats,
+            "lanes": self._lane_stats,
+        }
+
+
+_scheduler: Optional[ModelScheduler] = None
+
+
+def get_scheduler() -> ModelScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelScheduler(
+            requests_per_minute=float(os.getenv("MODEL_RPM", "1000")),
+            tokens_per_minute=float(os.getenv("MODEL_TPM", "1000000")),
+            quota_cooldown_seconds=float(os.getenv("MODEL_QUOTA_COOLDOWN_SECONDS", "30")),
+        )
+    return _scheduler
+
+
+class ScheduledGemini(Gemini):
+    """``Gemini`` whose calls go through the shared ``ModelScheduler``."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in get_scheduler().generate(self, llm_request, stream):
+            yield response
+
+    async def _generate_unscheduled(self, llm_request: LlmRequest, stream: bool):
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+def scheduled_model(model: str) -> ScheduledGemini:
+    return ScheduledGemini(model=model)
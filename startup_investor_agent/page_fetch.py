@@ -0,0 +1,405 @@
+"""Tiered page fetching for the agents that read web pages.
+
+``fetch_page`` returns a page's text, from the cheapest tier that has it:
+
+1. ``cache``: pages are kept on disk under ``PAGE_CACHE_DIR`` (default
+   ``.cache/pages``), stored by the hash of their text, with an index of URL,
+   validators and fetch time. A page fetched within
+   ``PAGE_CACHE_FRESH_SECONDS`` (default 3600) is served as is. An older one
+   is revalidated with ``If-None-Match`` / ``If-Modified-Since``, and served
+   from disk on a ``304`` (``revalidated``).
+2. ``http``: a plain GET, with the HTML reduced to text (scripts, styles and
+   markup dropped, block elements on their own lines).
+3. ``browser``: only when the HTML has scripts but almost no text, as a
+   client-rendered app does, or the site refuses plain clients with a 403,
+   the page is rendered by a pooled Playwright MCP server.
+
+At most ``PAGE_FETCH_PER_HOST`` (default 2) fetches to one host run at once.
+``metrics()`` counts the pages each tier served and their latency.
+
+``PAGE_FETCH=off`` gives the agents the Playwright tools directly, as before.
+"""
+
+import asyncio
+import collections
+import hashlib
+import html.parser
+import logging
+import os
+import re
+import sqlite3
+import time
+import urllib.parse
+from typing import Any, Optional
+
+import httpx
+from google.adk.tools import FunctionTool
+
+from .mcp_pool import McpServerPool
+from .research_cache import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "pages")
+USER_AGENT = "Mozilla/5.0 (compatible; startup-investor-agent/1.0)"
+
+# Pages with less visible text than this, and some scripts, are rendered in a browser.
+MIN_TEXT_CHARS = 200
+# Longer pages are cut to this many characters for the model.
+MAX_TEXT_CHARS = 20000
+MAX_DOWNLOAD_BYTES = 5_000_000
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "canvas", "head"}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "main", "aside", "nav", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "li", "ul", "ol", "tr", "table", "blockquote", "pre", "dt", "dd", "form",
+}
+
+
+def page_fetch_enabled() -> bool:
+    return os.getenv("PAGE_FETCH", "on").lower() not in ("off", "0", "false")
+
+
+class _TextExtractor(html.parser.HTMLParser):
+    """Visible text of an HTML page, one block element per line."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.scripts = 0
+        self._lines: list[str] = []
+        self._current: list[str] = []
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag == "script":
+            self.scripts += 1
+        if tag == "title":
+            self._in_title = True
+        if tag in _SKIP_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self._break("- " if tag == "li" else "")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        if tag in _SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        elif not self._skipping:
+            self._current.append(data)
+
+    def _break(self, prefix: str = "") -> None:
+        line = " ".join("".join(self._current).split())
+        if line and line != "-":
+            self._lines.append(line)
+        self._current = [prefix]
+
+    def text(self) -> str:
+        self._break()
+        return "\n".join(self._lines)
+
+
+def html_to_text(markup: str) -> tuple[str, str, int]:
+    """``(title, text, script count)`` of an HTML document."""
+    parser = _TextExtractor()
+    parser.feed(markup)
+    parser.close()
+    return " ".join(parser.title.split()), parser.text(), parser.scripts
+
+
+def _tool_failed(result: Any) -> bool:
+    # ``is_error`` in mcp 2, ``isError`` before.
+    return bool(getattr(result, "is_error", None) or getattr(result, "isError", None))
+
+
+def _tool_text(result: Any) -> str:
+    return "\n".join(item.text for item in result.content if getattr(item, "text", None))
+
+
+def _needs_browser(text: str, scripts: int) -> bool:
+    return scripts > 0 and len(text) < MIN_TEXT_CHARS
+
+
+class PageFetcher:
+    """Fetches pages through the cache, plain HTTP and a browser, in that order."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        browser_pool: Optional[McpServerPool] = None,
+        fresh_seconds: float = 3600,
+        per_host: int = 2,
+        timeout: float = 15.0,
+        browser_timeout: float = 60.0,
+        max_pages: int = 2000,
+    ):
+        self.cache_dir = cache_dir
+        self.browser_pool = browser_pool
+        self.fresh_seconds = fresh_seconds
+        self.per_host = per_host
+        self.timeout = timeout
+        self.browser_timeout = browser_timeout
+        self.max_pages = max_pages
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._stats: dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT PRIMARY KEY,"
+                " digest TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " rendered INTEGER NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite3"), timeout=10)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], digest + ".txt")
+
+    def _client_for_requests(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.timeout,
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9,*/*;q=0.5"},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    # Cache
+
+    def _cached(self, url: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT digest, title, etag, last_modified, rendered, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        digest, title, etag, last_modified, rendered, fetched_at = row
+        try:
+            with open(self._blob_path(digest), encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        return {
+            "title": title,
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "rendered": bool(rendered),
+            "age": time.time() - fetched_at,
+        }
+
+    def _store(self, url: str, title: str, text: str, etag: Optional[str], last_modified: Optional[str], rendered: bool) -> None:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(path + ".tmp", path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, digest, title, etag, last_modified, rendered, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, title, etag, last_modified, int(rendered), time.time()),
+            )
+            evicted = conn.execute(
+                "SELECT url, digest FROM pages ORDER BY fetched_at DESC LIMIT -1 OFFSET ?", (self.max_pages,)
+            ).fetchall()
+            for old_url, old_digest in evicted:
+                conn.execute("DELETE FROM pages WHERE url = ?", (old_url,))
+                # Identical pages share a blob; it goes with the last page using it.
+                if conn.execute("SELECT 1 FROM pages WHERE digest = ?", (old_digest,)).fetchone() is None:
+                    try:
+                        os.remove(self._blob_path(old_digest))
+                    except FileNotFoundError:
+                        pass
+
+    def _touch(self, url: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    # Tiers
+
+    async def _render(self, url: str) -> tuple[str, str]:
+        async with self.browser_pool.session() as session:
+            async with asyncio.timeout(self.browser_timeout):
+                for name, arguments in (("browser_navigate", {"url": url}), ("browser_snapshot", {})):
+                    result = await session.call_tool(name, arguments=arguments)
+                    # A failed navigation comes back as a result, not an exception;
+                    # its error text must not be cached as the page.
+                    if _tool_failed(result):
+                        raise RuntimeError(f"{name} failed: {_tool_text(result)[:200]}")
+        return "", _tool_text(result)
+
+    async def fetch(self, url: str) -> dict[str, Any]:
+        """The text of the page at ``url``, with the tier that served it."""
+        started = time.perf_counter()
+        page = await self._fetch(url)
+        self._record(page["tier"], time.perf_counter() - started)
+        text = page.get("text", "")
+        if len(text) > MAX_TEXT_CHARS:
+            page["text"] = text[:MAX_TEXT_CHARS]
+            page["truncated"] = True
+        return {"url": url, **page}
+
+    async def _fetch(self, url: str) -> dict[str, Any]:
+        if urllib.parse.urlsplit(url).scheme not in ("http", "https"):
+            return {"tier": "error", "error": "Only http and https URLs can be fetched."}
+        cached = self._cached(url)
+        if cached is not None and cached["age"] < self.fresh_seconds:
+            return {"tier": "cache", "title": cached["title"], "text": cached["text"]}
+
+        headers = {}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with self._host_limit(url):
+            try:
+                response = await self._get(url, headers)
+            except httpx.HTTPError as e:
+                logger.info("Fetching %s failed: %s", url, e)
+                if cached is not None:
+                    return {"tier": "cache", "title": cached["title"], "text": cached["text"], "stale": True}
+                return {"tier": "error", "error": f"Could not fetch the page: {e}"}
+
+            if response.status_code == 304 and cached is not None:
+                self._touch(url)
+                return {"tier": "revalidated", "title": cached["title"], "text": cached["text"]}
+
+            if response.status_code == 403 and self.browser_pool is not None:
+                return await self._browser_tier(url, None, None)
+            if response.status_code >= 400:
+                return {"tier": "error", "error": f"HTTP {response.status_code}"}
+
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type in ("text/html", "application/xhtml+xml", ""):
+                title, text, scripts = html_to_text(response.text)
+                if _needs_browser(text, scripts) and self.browser_pool is not None:
+                    return await self._browser_tier(url, etag, last_modified)
+            elif content_type.startswith("text/") or content_type.endswith(("json", "xml")):
+                title, text = "", response.text
+            else:
+                return {"tier": "error", "error": f"Unsupported content type: {content_type}"}
+
+        self._store(url, title, text, etag, last_modified, rendered=False)
+        return {"tier": "http", "title": title, "text": text}
+
+    async def _get(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        client = self._client_for_requests()
+        async with client.stream("GET", url, headers=headers) as response:
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > MAX_DOWNLOAD_BYTES:
+                    break
+        # aiter_bytes() has already decompressed the body, so the rebuilt
+        # response must not claim an encoding or decode it a second time.
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=bytes(body), request=response.request)
+
+    async def _browser_tier(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> dict[str, Any]:
+        try:
+            title, text = await self._render(url)
+        except Exception as e:
+            logger.warning("Rendering %s in the browser failed: %s", url, e)
+            return {"tier": "error", "error": f"Could not render the page: {e}"}
+        # A 304 on the next revalidation means the rendered text is still current.
+        self._store(url, title, text, etag, last_modified, rendered=True)
+        return {"tier": "browser", "title": title, "text": text}
+
+    def _record(self, tier: str, seconds: float) -> None:
+        stats = self._stats[tier]
+        stats["pages"] += 1
+        stats["seconds_total"] += seconds
+
+    def metrics(self) -> dict[str, Any]:
+        with self._connect() as conn:
+            cached = conn.execute("SELECT COUNT(*), COUNT(DISTINCT digest) FROM pages").fetchone()
+        return {
+            "tiers": {
+                tier: {
+                    "pages": stats["pages"],
+                    "seconds_avg": round(stats["seconds_total"] / stats["pages"], 4) if stats["pages"] else 0.0,
+                }
+                for tier, stats in self._stats.items()
+            },
+            "cached_pages": cached[0],
+            "cached_blobs": cached[1],
+        }
+
+
+_fetcher: Optional[PageFetcher] = None
+
+
+def get_page_fetcher() -> PageFetcher:
+    global _fetcher
+    if _fetcher is None:
+        from .mcp_servers import playwright_pool
+
+        _fetcher = PageFetcher(
+            cache_dir=os.getenv("PAGE_CACHE_DIR", DEFAULT_CACHE_DIR),
+            browser_pool=playwright_pool,
+            fresh_seconds=float(os.getenv("PAGE_CACHE_FRESH_SECONDS", "3600")),
+            per_host=int(os.getenv("PAGE_FETCH_PER_HOST", "2")),
+            timeout=float(os.getenv("PAGE_FETCH_TIMEOUT_SECONDS", "15")),
+            browser_timeout=float(os.getenv("BROWSER_FETCH_TIMEOUT_SECONDS", "60")),
+        )
+    return _fetcher
+
+
+async def close_page_fetcher() -> None:
+    global _fetcher
+    if _fetcher is not None:
+        await _fetcher.aclose()
+        _fetcher = None
+
+
+async def fetch_page(url: str) -> dict:
+    """Reads a web page and returns its title and text.
+
+    Use it to extract specific facts from a startup's website or an article.
+    Pages are cached, and only rendered in a browser when they need JavaScript.
+
+    Args:
+      url: The full URL of the page, starting with http:// or https://.
+    """
+    return await get_page_fetcher().fetch(url)
+
+
+fetch_page_tool = FunctionTool(fetch_page)
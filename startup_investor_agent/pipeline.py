@@ -0,0 +1,203 @@
+"""Parallel orchestration mode for the startup investor agent.
+
+Instead of letting the root LLM call the specialists one at a time through
+``AgentTool``, the pipeline fans out the data and product research
+concurrently, then joins their ``output_key`` results into the risk analyst
+and the memo synthesizer. Every stage is bounded by a timeout and its
+wall-clock time is written to session state under ``stage_timings``.
+"""
+
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from .risk_analyst.prompt import PARALLEL_RISK_CONTEXT
+
+logger = logging.getLogger(__name__)
+
+STAGE_TIMINGS_KEY = "stage_timings"
+
+
+def _timeout_state(agent: BaseAgent, timeout: Optional[float]) -> dict:
+    """State written in place of a timed-out agent's output so the join can proceed."""
+    output_key = getattr(agent, "output_key", None)
+    if not output_key:
+        return {}
+    limit = f"within {timeout:g}s" if timeout is not None else "in time"
+    return {output_key: f"[{agent.name} did not finish {limit}; no output available.]"}
+
+
+def _timings_event(
+    agent: BaseAgent, ctx: InvocationContext, timings: dict, extra_state: Optional[dict] = None
+) -> Event:
+    merged = dict(ctx.session.state.get(STAGE_TIMINGS_KEY) or {})
+    merged.update(timings)
+    state_delta = dict(extra_state or {})
+    state_delta[STAGE_TIMINGS_KEY] = merged
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=agent.name,
+        branch=ctx.branch,
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+async def _run_concurrently(
+    runs: list[tuple[str, BaseAgent, InvocationContext]],
+    timeout: Optional[float],
+    timings: dict,
+    fallback_state: dict,
+) -> AsyncGenerator[Event, None]:
+    """Runs each ``(timing_key, agent, ctx)`` in its own task and merges their events.
+
+    Each agent is driven from a single task for its whole run, bounded by
+    ``timeout``. A timed-out agent is recorded in ``timings`` and its
+    placeholder output added to ``fallback_state``; other errors, including a
+    ``TimeoutError`` raised inside the agent, are recorded as errors and propagate.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def run_one(timing_key: str, agent: BaseAgent, ctx: InvocationContext) -> None:
+        started = time.perf_counter()
+        status = "ok"
+        error = None
+        deadline = asyncio.timeout(timeout)
+        try:
+            async with deadline:
+                async for event in agent.run_async(ctx):
+                    resume = asyncio.Event()
+                    await queue.put((event, resume))
+                    # Wait until the runner has appended the event before producing more.
+                    await resume.wait()
+        except Exception as e:
+            # Only this stage's own deadline is a timeout; a TimeoutError from a
+            # tool or model call inside the agent is an error like any other.
+            if isinstance(e, TimeoutError) and deadline.expired():
+                status = "timeout"
+                fallback_state.update(_timeout_state(agent, timeout))
+                logger.warning("%s timed out after %gs", agent.name, timeout)
+            else:
+                status = "error"
+                error = e
+        finally:
+            timings[timing_key] = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "status": status,
+            }
+            await queue.put((done, error))
+
+    tasks = [asyncio.create_task(run_one(*run)) for run in runs]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event, payload = await queue.get()
+            if event is done:
+                remaining -= 1
+                if payload is not None:
+                    raise payload
+                continue
+            yield event
+            payload.set()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+class FanOutAgent(BaseAgent):
+    """Runs its sub-agents concurrently, each on its own branch.
+
+    A branch that exceeds ``branch_timeout`` seconds is cancelled and its
+    ``output_key`` is filled with a placeholder so downstream stages still run.
+    """
+
+    branch_timeout: Optional[float] = 300.0
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+
+        runs = []
+        for sub_agent in self.sub_agents:
+            branch_ctx = ctx.model_copy()
+            branch_ctx.branch = (
+                f"{ctx.branch}.{self.name}.{sub_agent.name}"
+                if ctx.branch
+                else f"{self.name}.{sub_agent.name}"
+            )
+            runs.append((f"{self.name}.{sub_agent.name}", sub_agent, branch_ctx))
+
+        timings = {}
+        fallback_state = {}
+        async for event in _run_concurrently(runs, self.branch_timeout, timings, fallback_state):
+            yield event
+        yield _timings_event(self, ctx, timings, fallback_state)
+
+
+class TimedSequentialAgent(BaseAgent):
+    """Runs its sub-agents in order, timing each one as a pipeline stage."""
+
+    stage_timeout: Optional[float] = 600.0
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        started = time.perf_counter()
+        for sub_agent in self.sub_agents:
+            timings = {}
+            fallback_state = {}
+            async for event in _run_concurrently(
+                [(sub_agent.name, sub_agent, ctx)], self.stage_timeout, timings, fallback_state
+            ):
+                yield event
+            logger.info(
+                "Stage %s finished in %.3fs (%s)",
+                sub_agent.name,
+                timings[sub_agent.name]["seconds"],
+                timings[sub_agent.name]["status"],
+            )
+            yield _timings_event(self, ctx, timings, fallback_state)
+
+        timings = {self.name: {"seconds": round(time.perf_counter() - started, 3), "status": "ok"}}
+        yield _timings_event(self, ctx, timings)
+
+
+def build_parallel_pipeline(
+    data_analyst: BaseAgent,
+    product_analyst: BaseAgent,
+    risk_analyst: BaseAgent,
+    synthesizer: BaseAgent,
+    name: str = "startup_investor_pipeline",
+    branch_timeout: Optional[float] = 300.0,
+    stage_timeout: Optional[float] = 600.0,
+    before_agent_callback: Optional[Callable] = None,
+    after_agent_callback: Optional[Callable] = None,
+) -> TimedSequentialAgent:
+    """Builds research fan-out -> risk assessment -> memo synthesis.
+
+    The given agents are cloned, so the originals stay usable as ``AgentTool``s.
+    The research outputs are appended to the risk analyst's instruction. The
+    callbacks wrap the whole pipeline.
+    """
+    research = FanOutAgent(
+        name="parallel_research",
+        description="Runs market and product research concurrently.",
+        branch_timeout=branch_timeout,
+        sub_agents=[data_analyst.clone(), product_analyst.clone()],
+    )
+    return TimedSequentialAgent(
+        name=name,
+        description="Parallel research, then risk assessment, then the investment memo.",
+        stage_timeout=stage_timeout,
+        before_agent_callback=before_agent_callback,
+        after_agent_callback=after_agent_callback,
+        sub_agents=[
+            research,
+            risk_analyst.clone(update={"instruction": risk_analyst.instruction + PARALLEL_RISK_CONTEXT}),
+            synthesizer.clone(),
+        ],
+    )
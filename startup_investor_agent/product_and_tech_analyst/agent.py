@@ -1,16 +1,48 @@
 
 from google.adk import Agent
-from dotenv import load_dotenv
-load_dotenv()
 from google.adk.tools import google_search, url_context
 from . import prompt
+from ..model_scheduler import scheduled_model
+from ..memo_store import section_callbacks
+from ..research_cache import cache_callbacks
+from ..structured import (
+    STRUCTURED_OUTPUT_INSTRUCTION,
+    ProductTechAnalysis,
+    compact_output,
+    search_tool,
+    structured_outputs_enabled,
+)
+from ..search_index import lookup_search, release_search, search_index_mode, store_search
 
 MODEL="gemini-2.5-flash"
 
+# STRUCTURED_OUTPUTS=on: return a compact ProductTechAnalysis record instead of Markdown.
+STRUCTURED = structured_outputs_enabled()
+INSTRUCTION = prompt.PRODUCT_AND_TECH_ANALYST_PROMPT + STRUCTURED_OUTPUT_INSTRUCTION if STRUCTURED else prompt.PRODUCT_AND_TECH_ANALYST_PROMPT
+# SEARCH_INDEX=run|shared: searches go through a tool call the shared search index can answer.
+INDEXED_SEARCH = search_index_mode() != "off"
+
+_read_cache, _write_cache = cache_callbacks(
+    INSTRUCTION,
+    output_key="final_product_and_tech_output",
+)
+
+_reuse_section, _store_section = section_callbacks(
+    INSTRUCTION,
+    output_key="final_product_and_tech_output",
+    max_age_days=90,
+)
+
 product_and_tech_analyst = Agent(
-    model=MODEL,
+    model=scheduled_model(MODEL),
     name="product_and_tech_analyst",
-    instruction=prompt.PRODUCT_AND_TECH_ANALYST_PROMPT,
+    instruction=INSTRUCTION,
     output_key="final_product_and_tech_output",
-    tools=[google_search],
+    output_schema=ProductTechAnalysis if STRUCTURED else None,
+    tools=[search_tool(scheduled_model(MODEL))] if STRUCTURED or INDEXED_SEARCH else [google_search],
+    before_agent_callback=[_reuse_section, _read_cache],
+    after_agent_callback=[compact_output("final_product_and_tech_output"), _write_cache, _store_section],
+    before_tool_callback=lookup_search,
+    after_tool_callback=store_search,
+    on_tool_error_callback=release_search,
 )
\ No newline at end of file
@@ -0,0 +1,333 @@
+"""Disk-backed cache for specialist agent outputs.
+
+Re-running the same startup should not redo every ``google_search`` and the
+full synthesis. Each specialist gets a ``before_agent_callback`` that answers
+from the cache and an ``after_agent_callback`` that stores the fresh output.
+
+Entries are keyed on the agent, a hash of its prompt (so editing a prompt
+invalidates old briefings) and the startup's subject: its normalized website or
+name. The subject comes from the session state key ``startup`` (``{"name": ...,
+"website": ...}``) when the caller sets it, as the batch runner does; otherwise
+the root agent takes the website from each turn's request and records it in
+state, so the specialists share it however the orchestrator words their
+requests. A turn that names no website has no subject and is not cached. Only
+an agent's first briefing on a startup in a session is cached; later calls,
+such as follow-up questions, run afresh. Entries expire after ``RESEARCH_CACHE_MAX_AGE_DAYS``, or sooner when the request sets a
+tighter ``max_data_age_days``, and the least recently used entries are evicted
+once the cache holds more than ``RESEARCH_CACHE_MAX_ENTRIES``.
+
+Per-request control goes through the session state key ``research_cache``:
+
+- ``"bypass"``: neither read nor write the cache.
+- ``"refresh"``: ignore any cached entry, rerun the agent and overwrite it.
+
+Set ``RESEARCH_CACHE=off`` to disable the cache entirely.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODE_STATE_KEY = "research_cache"
+STARTUP_STATE_KEY = "startup"
+STARTUP_SUBJECT_STATE_KEY = "startup_subject"
+# Prefix of the per-agent state keys recording the subject of its cached briefing.
+BRIEFED_STATE_PREFIX = "research_briefed_"
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "research_cache.sqlite3")
+
+_URL_RE = re.compile(r"\b(?:https?://|www\.)[^\s<>()\"']+", re.IGNORECASE)
+# A bare domain such as ``acme.io``; the top-level domains are those startups
+# commonly use, so ``Node.js`` or ``e.g.`` are not taken for a website.
+_DOMAIN_RE = re.compile(
+    r"(?<![@\w.-])(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+"
+    r"(?:com|io|ai|co|net|org|app|dev|tech|xyz|so|me|us|uk|de|fr|eu|in|vc|gg|sh|bio|health)(?![\w-])",
+    re.IGNORECASE,
+)
+_MAX_AGE_RE = re.compile(r"max_data_age_days\W+(\d+)", re.IGNORECASE)
+_COMPANY_SUFFIX_RE = re.compile(r"\b(inc|llc|ltd|corp|co|gmbh)\b\.?", re.IGNORECASE)
+
+# Links a request may carry that are about the startup but not its website.
+NON_COMPANY_HOSTS = (
+    "linkedin.com",
+    "crunchbase.com",
+    "pitchbook.com",
+    "dealroom.co",
+    "tracxn.com",
+    "cbinsights.com",
+    "angel.co",
+    "wellfound.com",
+    "producthunt.com",
+    "ycombinator.com",
+    "github.com",
+    "twitter.com",
+    "x.com",
+    "facebook.com",
+    "instagram.com",
+    "youtube.com",
+    "medium.com",
+    "substack.com",
+    "wikipedia.org",
+    "google.com",
+    "techcrunch.com",
+    "bloomberg.com",
+    "reuters.com",
+    "forbes.com",
+)
+
+
+def normalize_website(url: str) -> str:
+    """``https://www.Acme.io/about?x=1`` -> ``acme.io``."""
+    host = re.sub(r"^(?:https?://)?(?:www\.)?", "", url.strip().lower())
+    return re.split(r"[/?#:]", host, maxsplit=1)[0].rstrip(".")
+
+
+def normalize_name(name: str) -> str:
+    """``"Acme, Inc."`` -> ``"acme"``."""
+    name = _COMPANY_SUFFIX_RE.sub(" ", name.lower())
+    return " ".join(re.sub(r"[^\w\s]", " ", name).split())
+
+
+def subject_for(name: str = "", website: str = "") -> str:
+    """The subject of a startup given by name and/or website; the website wins."""
+    if website:
+        return "site:" + normalize_website(website)
+    return "name:" + normalize_name(name)
+
+
+def _company_site(text: str) -> Optional[str]:
+    links = [match.group(0) for match in _URL_RE.finditer(text)]
+    links += [match.group(0) for match in _DOMAIN_RE.finditer(_URL_RE.sub(" ", text))]
+    for link in links:
+        host = normalize_website(link)
+        if host and not any(host == h or host.endswith("." + h) for h in NON_COMPANY_HOSTS):
+            return host
+    return None
+
+
+def request_subject(text: str) -> Optional[str]:
+    """The subject a request names: its first company website or domain; ``None`` otherwise.
+
+    Company names are not guessed from the wording, since requests such as
+    "can you evaluate this startup" would all share one subject.
+    """
+    site = _company_site(text)
+    return "site:" + site if site else None
+
+
+def prompt_version(prompt_text: str) -> str:
+    return hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()[:12]
+
+
+def _content_text(content: Optional[types.Content]) -> str:
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text or "" for part in content.parts if not part.thought)
+
+
+class ResearchCache:
+    """A size-bounded LRU cache of agent outputs stored in a SQLite file.
+
+    A connection is opened per operation, so several server workers can share
+    one cache file.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500, max_age_days: float = 30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " agent TEXT NOT NULL,"
+                " subject TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def make_key(agent_name: str, version: str, subject: str) -> str:
+        return hashlib.sha256(f"{agent_name}|{version}|{subject}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, max_age_seconds: Optional[float] = None) -> Optional[str]:
+        max_age = self.max_age_seconds if max_age_seconds is None else min(max_age_seconds, self.max_age_seconds)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > max_age:
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def put(self, key: str, agent_name: str, subject: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, agent, subject, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent_name, subject, value, now, now),
+            )
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def invalidate(self, subject: str) -> int:
+        """Drops every agent's entry for a startup subject; returns the number removed."""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM entries WHERE subject = ?", (subject,)).rowcount
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            cutoff = time.time() - self.max_age_seconds
+            return conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,)).rowcount
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+_cache: Optional[ResearchCache] = None
+
+
+def get_cache() -> Optional[ResearchCache]:
+    """The process-wide cache, or ``None`` when disabled via ``RESEARCH_CACHE=off``."""
+    global _cache
+    if os.getenv("RESEARCH_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    if _cache is None:
+        _cache = ResearchCache(
+            path=os.getenv("RESEARCH_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "500")),
+            max_age_days=float(os.getenv("RESEARCH_CACHE_MAX_AGE_DAYS", "30")),
+        )
+    return _cache
+
+
+def reset_cache() -> None:
+    """Forgets the process-wide cache so the next ``get_cache`` re-reads the environment."""
+    global _cache
+    _cache = None
+
+
+def _explicit_subject(state) -> Optional[str]:
+    startup = state.get(STARTUP_STATE_KEY)
+    if isinstance(startup, dict) and (startup.get("name") or startup.get("website")):
+        return subject_for(str(startup.get("name") or ""), str(startup.get("website") or ""))
+    return None
+
+
+def record_startup_subject(callback_context: CallbackContext) -> None:
+    """Root ``before_agent_callback``: records which startup this turn is about.
+
+    The specialists' requests are written by the orchestrator, so they key on
+    the subject recorded here rather than on their own request text. It is
+    derived again every turn, so a follow-up that names no website has no
+    subject rather than the previous turn's.
+    """
+    state = callback_context.state
+    if _explicit_subject(state) is None:
+        state[STARTUP_SUBJECT_STATE_KEY] = request_subject(_content_text(callback_context.user_content))
+    return None
+
+
+def startup_key_source(callback_context: CallbackContext) -> Optional[str]:
+    """Keys an agent on the startup its run is about; ``None`` when that is not known."""
+    state = callback_context.state
+    subject = _explicit_subject(state)
+    if subject is not None:
+        return subject
+    if STARTUP_SUBJECT_STATE_KEY in state:
+        return state[STARTUP_SUBJECT_STATE_KEY]
+    # Run without the root agent, e.g. a specialist on its own.
+    return request_subject(_content_text(callback_context.user_content))
+
+
+def input_key_source(*state_keys: str) -> Callable[[CallbackContext], str]:
+    """Keys an agent on its whole request plus upstream outputs read from state.
+
+    Used by agents whose output depends on other agents' findings, so a refreshed
+    research briefing also misses the downstream entry.
+    """
+
+    def key_source(callback_context: CallbackContext) -> str:
+        parts = [_content_text(callback_context.user_content)]
+        parts.extend(str(callback_context.state.get(key, "")) for key in state_keys)
+        return "input:" + hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    return key_source
+
+
+def cache_callbacks(
+    prompt_text: str,
+    output_key: str,
+    key_source: Callable[[CallbackContext], Optional[str]] = startup_key_source,
+) -> tuple[Callable, Callable]:
+    """Returns ``(before_agent_callback, after_agent_callback)`` caching ``output_key``.
+
+    Nothing is cached when ``key_source`` returns ``None``, nor after the
+    agent's first briefing on the subject in the session: the cache key does
+    not include the request, so a follow-up answer must not replace the briefing.
+    """
+    version = prompt_version(prompt_text)
+
+    def _lookup(callback_context: CallbackContext) -> tuple[Optional[ResearchCache], str, str]:
+        cache = get_cache()
+        mode = callback_context.state.get(CACHE_MODE_STATE_KEY)
+        if cache is None or mode == "bypass":
+            return None, "", ""
+        subject = key_source(callback_context)
+        briefed = callback_context.state.get(BRIEFED_STATE_PREFIX + callback_context.agent_name)
+        if subject is None or briefed == subject:
+            return None, "", ""
+        return cache, subject, cache.make_key(callback_context.agent_name, version, subject)
+
+    def _mark_briefed(callback_context: CallbackContext, subject: str) -> None:
+        # One key per agent, so the parallel branches do not overwrite each other's.
+        callback_context.state[BRIEFED_STATE_PREFIX + callback_context.agent_name] = subject
+
+    def read_through(callback_context: CallbackContext) -> Optional[types.Content]:
+        cache, subject, key = _lookup(callback_context)
+        if cache is None or callback_context.state.get(CACHE_MODE_STATE_KEY) == "refresh":
+            return None
+        request = _content_text(callback_context.user_content)
+        max_age = _MAX_AGE_RE.search(request)
+        cached = cache.get(key, int(max_age.group(1)) * 86400 if max_age else None)
+        if cached is None:
+            return None
+        logger.info("Research cache hit for %s (%s)", callback_context.agent_name, subject)
+        _mark_briefed(callback_context, subject)
+        callback_context.state[output_key] = cached
+        return types.Content(role="model", parts=[types.Part(text=cached)])
+
+    def write_back(callback_context: CallbackContext) -> None:
+        cache, subject, key = _lookup(callback_context)
+        output = callback_context.state.get(output_key)
+        if cache is not None and isinstance(output, str) and output.strip():
+            cache.put(key, callback_context.agent_name, subject, output)
+            _mark_briefed(callback_context, subject)
+        return None
+
+    return read_through, write_back
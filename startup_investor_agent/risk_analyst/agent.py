@@ -2,17 +2,55 @@
 """Risk Analysis Agent for providing the final risk evaluation"""
 
 from google.adk import Agent
-from dotenv import load_dotenv
-load_dotenv()
 from google.adk.tools import google_search, url_context
 from . import prompt
+from ..model_scheduler import scheduled_model
+from ..memo_store import section_callbacks
+from ..research_cache import cache_callbacks, input_key_source
+from ..structured import (
+    STRUCTURED_OUTPUT_INSTRUCTION,
+    RiskAssessment,
+    compact_output,
+    search_tool,
+    structured_outputs_enabled,
+)
+from ..search_index import lookup_search, release_search, search_index_mode, store_search
 
 MODEL="gemini-2.5-flash"
 
+# STRUCTURED_OUTPUTS=on: return a compact RiskAssessment record instead of Markdown.
+STRUCTURED = structured_outputs_enabled()
+INSTRUCTION = prompt.RISK_ANALYST_PROMPT + STRUCTURED_OUTPUT_INSTRUCTION if STRUCTURED else prompt.RISK_ANALYST_PROMPT
+# SEARCH_INDEX=run|shared: searches go through a tool call the shared search index can answer.
+INDEXED_SEARCH = search_index_mode() != "off"
+
+_read_cache, _write_cache = cache_callbacks(
+    INSTRUCTION,
+    output_key="final_risk_assessment_output",
+    key_source=input_key_source("market_data_analysis_output", "final_product_and_tech_output"),
+)
+
+# Reruns on a refresh whenever either research output it reads has changed.
+_reuse_section, _store_section = section_callbacks(
+    INSTRUCTION,
+    output_key="final_risk_assessment_output",
+    max_age_days=30,
+    depends_on=("market_data_analysis_output", "final_product_and_tech_output"),
+)
+
 risk_analyst_agent = Agent(
-    model=MODEL,
+    model=scheduled_model(MODEL),
     name="risk_analyst_agent",
-    instruction=prompt.RISK_ANALYST_PROMPT,
+    instruction=INSTRUCTION,
     output_key="final_risk_assessment_output",
-    tools=[google_search],
+    output_schema=RiskAssessment if STRUCTURED else None,
+    tools=[search_tool(scheduled_model(MODEL))] if STRUCTURED or INDEXED_SEARCH else [google_search],
+    # Structured research arrives compacted in the request or the instruction;
+    # the specialists' turns would repeat it in full.
+    include_contents="none" if STRUCTURED else "default",
+    before_agent_callback=[_reuse_section, _read_cache],
+    after_agent_callback=[compact_output("final_risk_assessment_output"), _write_cache, _store_section],
+    before_tool_callback=lookup_search,
+    after_tool_callback=store_search,
+    on_tool_error_callback=release_search,
 )
\ No newline at end of file
@@ -66,4 +66,14 @@ Mandatory Process - Output Generation:
     *   **Severity:** [High/Medium/Low]
     *   **Assessment:** [1-2 sentence analysis of the risk]
     *   **Evidence:** [Supporting data point from the research briefing]
-"""
\ No newline at end of file
+"""
+
+PARALLEL_RISK_CONTEXT = """
+In this run the research has already been gathered concurrently by the other specialists. Treat the two outputs below together as the `startup_research_briefing`.
+
+**Research Briefing (from `data_analyst_agent`):**
+{market_data_analysis_output}
+
+**Product & Technology Analysis (from `product_and_tech_analyst`):**
+{final_product_and_tech_output}
+"""
@@ -0,0 +1,453 @@
+"""Shared store of web search results, so specialists reuse each other's searches.
+
+The specialists search independently, and for one startup they look up much
+the same things: founders, funding, competitors. With ``SEARCH_INDEX`` set,
+each specialist's tool callbacks route its searches through a SQLite store
+with a full-text index:
+
+- ``run``: searches are shared within one evaluation and dropped when it ends;
+- ``shared``: they are also reused by later evaluations of the same startup
+  for ``SEARCH_INDEX_MAX_AGE_HOURS`` (default 24), unless the request sets
+  ``research_cache`` to ``bypass`` or ``refresh``.
+
+A search is answered locally, without an external call, when the store has:
+
+1. the same query once normalized (case, punctuation and stop words are
+   ignored, word order is kept), or the same query waiting on its external
+   call;
+2. a near-identical query: ``SIMILAR_QUERY_THRESHOLD`` of its words in common,
+   the common words in the same order, and the same entity words (single
+   letters and words with digits, such as a funding round or a year);
+3. at least ``MIN_INDEX_RESULTS`` stored search results whose title, or whose
+   snippet, contains every word of the query. Answers given as text rather
+   than a list of results are not indexed.
+
+Results are stored once per normalized URL, ignoring scheme, ``www.``,
+tracking parameters and fragments. Each evaluation's hit rate and external
+calls saved go into session state under ``search_index``, and totals are
+reported by ``GET /debug/search_index``.
+
+The built-in ``google_search`` runs inside the model call, where it cannot be
+intercepted, so with ``SEARCH_INDEX`` on the specialists search through
+``GoogleSearchAgentTool``, as they do with structured outputs.
+"""
+
+import asyncio
+import collections
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from .research_cache import BASE_DIR, CACHE_MODE_STATE_KEY, startup_key_source
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_STATE_KEY = "search_index"
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, ".cache", "search_index.sqlite3")
+
+# google_search as a function (offline stand-in) and wrapped in GoogleSearchAgentTool.
+SEARCH_TOOL_NAMES = ("google_search", "google_search_agent")
+
+SIMILAR_QUERY_THRESHOLD = 0.9
+MIN_INDEX_RESULTS = 2
+MAX_INDEX_RESULTS = 5
+# How long a search waits for the same query already in flight before searching itself.
+IN_FLIGHT_WAIT_SECONDS = 60.0
+# Run-scoped entries left behind by runs that never finished.
+STALE_RUN_SECONDS = 86400
+
+_STOP_WORDS = frozenset(
+    "about an and are as at by for from how in is it its of on or the to vs what when where which who with".split()
+)
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|mc_cid|mc_eid|ref|ref_src)$")
+
+_current_run: contextvars.ContextVar[Optional["SearchRun"]] = contextvars.ContextVar("search_run", default=None)
+
+
+def search_index_mode() -> str:
+    mode = os.getenv("SEARCH_INDEX", "off").lower()
+    return mode if mode in ("run", "shared") else "off"
+
+
+def query_terms(query: str) -> list[str]:
+    """The query's words in order, without stop words. "a" is kept, as in "Series A"."""
+    return [word for word in re.findall(r"\w+", query.lower()) if word not in _STOP_WORDS]
+
+
+def normalize_query(query: str) -> str:
+    """``"Who are the founders of Acme?"`` -> ``"founders acme"``."""
+    return " ".join(query_terms(query))
+
+
+def _entity_terms(terms: list[str]) -> set[str]:
+    return {term for term in terms if len(term) == 1 or any(char.isdigit() for char in term)}
+
+
+def query_similarity(terms: list[str], other: list[str]) -> float:
+    """Share of words in common, or 0 when the common words are in a different
+    order (``"Beta acquired Acme"``) or the entity words differ (``"Series B"``)."""
+    if _entity_terms(terms) != _entity_terms(other):
+        return 0.0
+    common = set(terms) & set(other)
+    if [term for term in terms if term in common] != [term for term in other if term in common]:
+        return 0.0
+    return len(common) / len(set(terms) | set(other))
+
+
+def normalize_url(url: str) -> str:
+    """``https://www.Acme.io/news/?utm_source=x#top`` -> ``acme.io/news``."""
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    params = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(key)
+    )
+    query = urllib.parse.urlencode(params)
+    return host + parts.path.rstrip("/") + (f"?{query}" if query else "")
+
+
+def _results(response: Any) -> list[dict]:
+    """The results of a search response: its list of ``{title, url, snippet}``.
+
+    An answer in text, as ``GoogleSearchAgentTool`` gives, has no results of its
+    own; indexing it under the query's words would match any query with them.
+    """
+    if isinstance(response, dict) and isinstance(response.get("results"), list):
+        return [result for result in response["results"] if isinstance(result, dict)]
+    return []
+
+
+def _result_key(result: dict) -> str:
+    if result.get("url"):
+        return normalize_url(result["url"])
+    return "text:" + hashlib.sha256(str(result.get("snippet", "")).encode("utf-8")).hexdigest()[:32]
+
+
+class SearchIndex:
+    """Search responses by normalized query, and their results in a full-text index.
+
+    Entries belong to a scope: a run, or a startup subject. A connection is
+    opened per operation, like ``ResearchCache``, so server workers can share
+    the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.totals: collections.Counter = collections.Counter()
+        self.recent: collections.deque[dict] = collections.deque(maxlen=50)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS searches (
+                    scope TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (scope, query));
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    url_key TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    snippet TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    UNIQUE (scope, url_key));
+                CREATE INDEX IF NOT EXISTS results_created ON results (created_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(
+                    title, snippet, content='results', content_rowid='id', tokenize='porter unicode61');
+                CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN
+                    INSERT INTO results_fts (rowid, title, snippet) VALUES (new.id, new.title, new.snippet);
+                END;
+                CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN
+                    INSERT INTO results_fts (results_fts, rowid, title, snippet)
+                    VALUES ('delete', old.id, old.title, old.snippet);
+                END;
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def lookup(self, scope: str, query: str, max_age_seconds: float) -> Optional[tuple[str, Any]]:
+        """``(kind, response)`` for a search the store can answer, else ``None``."""
+        terms = query_terms(query)
+        if not terms:
+            return None
+        cutoff = time.time() - max_age_seconds
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM searches WHERE scope = ? AND query = ? AND created_at >= ?",
+                (scope, " ".join(terms), cutoff),
+            ).fetchone()
+            if row is not None:
+                return "exact", json.loads(row[0])
+
+            best, best_similarity = None, SIMILAR_QUERY_THRESHOLD
+            for stored, response in conn.execute(
+                "SELECT query, response FROM searches WHERE scope = ? AND created_at >= ?", (scope, cutoff)
+            ):
+                similarity = query_similarity(terms, stored.split())
+                if similarity >= best_similarity:
+                    best, best_similarity = response, similarity
+            if best is not None:
+                return "similar", json.loads(best)
+
+            # Every word in the title, or every word in the snippet.
+            match = " AND ".join(f'"{term}"' for term in terms)
+            rows = conn.execute(
+                "SELECT results.title, results.url, results.snippet FROM results_fts"
+                " JOIN results ON results.id = results_fts.rowid"
+                " WHERE results_fts MATCH ? AND results.scope = ? AND results.created_at >= ?"
+                " ORDER BY bm25(results_fts) LIMIT ?",
+                (f"title : ({match}) OR snippet : ({match})", scope, cutoff, MAX_INDEX_RESULTS),
+            ).fetchall()
+        if len(rows) < MIN_INDEX_RESULTS:
+            return None
+        results = [{"title": title, "url": url, "snippet": snippet} for title, url, snippet in rows]
+        return "index", {"query": query, "results": results, "source": "results of earlier searches"}
+
+    def store(self, scope: str, query: str, response: Any) -> int:
+        """Stores a search response and its results; returns how many results were already stored."""
+        try:
+            encoded = json.dumps(response)
+        except TypeError:
+            return 0
+        now = time.time()
+        duplicates = 0
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO searches (scope, query, response, created_at) VALUES (?, ?, ?, ?)",
+                (scope, normalize_query(query), encoded, now),
+            )
+            for result in _results(response):
+                key = _result_key(result)
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO results (scope, url_key, title, url, snippet, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (scope, key, str(result.get("title", "")), str(result.get("url", "")), str(result.get("snippet", "")), now),
+                ).rowcount
+                if not inserted:
+                    duplicates += 1
+                    conn.execute("UPDATE results SET created_at = ? WHERE scope = ? AND url_key = ?", (now, scope, key))
+        return duplicates
+
+    def drop(self, scope: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM searches WHERE scope = ?", (scope,))
+            conn.execute("DELETE FROM results WHERE scope = ?", (scope,))
+
+    def purge(self, max_age_seconds: float) -> int:
+        """Deletes entries older than ``max_age_seconds``, and leftovers of unfinished runs."""
+        now = time.time()
+        with self._connect() as conn:
+            removed = 0
+            for table in ("searches", "results"):
+                removed += conn.execute(
+                    f"DELETE FROM {table} WHERE created_at < ? OR (scope LIKE 'run:%' AND created_at < ?)",
+                    (now - max_age_seconds, now - STALE_RUN_SECONDS),
+                ).rowcount
+        return removed
+
+    def record(self, run: "SearchRun") -> dict:
+        summary = run.summary()
+        self.totals.update(
+            searches=summary["searches"], local=summary["local"], external=summary["external"], runs=1
+        )
+        self.recent.append({"run_id": run.id, "subject": run.subject, **summary})
+        return summary
+
+    def metrics(self) -> dict[str, Any]:
+        with self._connect() as conn:
+            searches = conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+            results = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        total = self.totals["searches"]
+        return {
+            "mode": search_index_mode(),
+            "runs": self.totals["runs"],
+            "searches": total,
+            "local": self.totals["local"],
+            "external": self.totals["external"],
+            "hit_rate": round(self.totals["local"] / total, 3) if total else 0.0,
+            "stored_searches": searches,
+            "stored_results": results,
+            "recent": list(self.recent),
+        }
+
+
+@dataclass
+class SearchRun:
+    """The searches of one evaluation, including those of agents run through ``AgentTool``."""
+
+    id: str
+    subject: Optional[str]
+    scope: str
+    max_age_seconds: float
+    searches: int = 0
+    external: int = 0
+    duplicate_results: int = 0
+    hits: collections.Counter = field(default_factory=collections.Counter)
+    # Normalized queries waiting on their external call.
+    in_flight: dict[str, asyncio.Future] = field(default_factory=dict)
+    # Function call ids answered locally, which the after-tool callback skips.
+    served: set[str] = field(default_factory=set)
+
+    def serve(self, tool_context: ToolContext, kind: str, response: Any) -> dict:
+        self.hits[kind] += 1
+        self.served.add(tool_context.function_call_id)
+        return response if isinstance(response, dict) else {"result": response}
+
+    def settle(self, query_key: str, response: Any) -> None:
+        future = self.in_flight.pop(query_key, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def summary(self) -> dict[str, Any]:
+        local = sum(self.hits.values())
+        return {
+            "searches": self.searches,
+            "local": local,
+            "external": self.external,
+            "hit_rate": round(local / self.searches, 3) if self.searches else 0.0,
+            "external_calls_saved": local,
+            "local_by_kind": dict(self.hits),
+            "duplicate_results": self.duplicate_results,
+        }
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """The process-wide index, or ``None`` unless ``SEARCH_INDEX`` is ``run`` or ``shared``."""
+    global _index
+    if search_index_mode() == "off":
+        return None
+    if _index is None:
+        _index = SearchIndex(os.getenv("SEARCH_INDEX_PATH", DEFAULT_INDEX_PATH))
+        _index.purge(_max_age_seconds())
+    return _index
+
+
+def reset_search_index() -> None:
+    """Forgets the process-wide index so the next ``get_search_index`` re-reads the environment."""
+    global _index
+    _index = None
+
+
+def _max_age_seconds() -> float:
+    return float(os.getenv("SEARCH_INDEX_MAX_AGE_HOURS", "24")) * 3600
+
+
+def search_run_callbacks() -> tuple[Callable, Callable]:
+    """``(before_agent_callback, after_agent_callback)`` for the root agent: one search run per evaluation."""
+
+    def begin(callback_context: CallbackContext) -> None:
+        if get_search_index() is None:
+            return None
+        subject = startup_key_source(callback_context)
+        # Without a known startup, results are shared only within the evaluation.
+        shared = (
+            subject is not None
+            and search_index_mode() == "shared"
+            and callback_context.state.get(CACHE_MODE_STATE_KEY) not in ("bypass", "refresh")
+        )
+        run_id = callback_context.invocation_id
+        _current_run.set(
+            SearchRun(
+                id=run_id,
+                subject=subject,
+                scope=f"subject:{subject}" if shared else f"run:{run_id}",
+                max_age_seconds=_max_age_seconds() if shared else STALE_RUN_SECONDS,
+            )
+        )
+        return None
+
+    def end(callback_context: CallbackContext) -> None:
+        run = _current_run.get()
+        index = get_search_index()
+        if run is None or index is None or run.id != callback_context.invocation_id:
+            return None
+        _current_run.set(None)
+        for key in list(run.in_flight):
+            run.settle(key, None)
+        if run.scope.startswith("run:"):
+            index.drop(run.scope)
+        summary = index.record(run)
+        logger.info(
+            "Search index: %d of %d searches answered locally for %s", summary["local"], summary["searches"], run.subject
+        )
+        callback_context.state[SEARCH_INDEX_STATE_KEY] = summary
+        return None
+
+    return begin, end
+
+
+def _search_query(tool: BaseTool, args: dict) -> Optional[str]:
+    if tool.name not in SEARCH_TOOL_NAMES:
+        return None
+    return str(args.get("query") or args.get("request") or "")
+
+
+async def lookup_search(tool: BaseTool, args: dict, tool_context: ToolContext) -> Optional[dict]:
+    """``before_tool_callback``: answers a search from the run's store when it can."""
+    run = _current_run.get()
+    index = get_search_index()
+    query = _search_query(tool, args)
+    if run is None or index is None or query is None:
+        return None
+    run.searches += 1
+    key = normalize_query(query)
+    pending = run.in_flight.get(key)
+    if pending is not None:
+        try:
+            response = await asyncio.wait_for(asyncio.shield(pending), IN_FLIGHT_WAIT_SECONDS)
+        except TimeoutError:
+            response = None
+        if response is not None:
+            return run.serve(tool_context, "in_flight", response)
+    hit = index.lookup(run.scope, query, run.max_age_seconds)
+    if hit is not None:
+        return run.serve(tool_context, *hit)
+    run.external += 1
+    run.in_flight.setdefault(key, asyncio.get_running_loop().create_future())
+    return None
+
+
+def store_search(tool: BaseTool, args: dict, tool_context: ToolContext, tool_response: Any) -> Optional[dict]:
+    """``after_tool_callback``: stores an external search's results for the rest of the run."""
+    run = _current_run.get()
+    index = get_search_index()
+    query = _search_query(tool, args)
+    if run is None or index is None or query is None:
+        return None
+    if tool_context.function_call_id in run.served:
+        run.served.discard(tool_context.function_call_id)
+        return None
+    run.settle(normalize_query(query), tool_response)
+    run.duplicate_results += index.store(run.scope, query, tool_response)
+    return None
+
+
+def release_search(tool: BaseTool, args: dict, tool_context: ToolContext, error: Exception) -> Optional[dict]:
+    """``on_tool_error_callback``: lets searches waiting on a failed one search for themselves."""
+    run = _current_run.get()
+    query = _search_query(tool, args)
+    if run is not None and query is not None:
+        run.settle(normalize_query(query), None)
+    return None
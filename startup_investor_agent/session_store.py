@@ -0,0 +1,289 @@
+"""Bounded session storage for the FastAPI app.
+
+ADK's default session services keep every event of every session for good.
+An evaluation's events include each specialist's full output, so a
+long-running server grows without limit. ``BoundedSessionService`` stores
+sessions in SQLite (a file by default, or an in-memory database) and bounds
+them in three ways:
+
+- sessions idle for longer than ``SESSION_IDLE_TTL_SECONDS`` are deleted by
+  ``sweep_idle_sessions``, which ``main.py`` runs in the background;
+- when a new turn starts, turns older than the last ``SESSION_MAX_TURNS`` are
+  compacted to the user's message and a trimmed copy of the final reply;
+- when a new turn starts, the oldest turns are dropped until the session's
+  events and state fit in ``SESSION_MAX_BYTES``.
+
+Session state (the specialists' ``output_key`` results) is never compacted,
+so agents that read it are unaffected. Sessions are only rewritten between
+turns, never while a run is appending events. ``drop_last_turn`` deletes a
+turn that a job left unfinished, before the job reruns.
+
+``SESSION_STORE`` selects the backend: ``sqlite`` (default, in
+``SESSION_STORE_PATH``), ``memory``, or any ADK session service URI, which
+is used as is and not bounded.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from google.adk.cli.service_registry import get_service_registry
+from google.adk.cli.utils.service_factory import create_session_service_from_options
+from google.adk.events import Event, EventActions
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.sqlite_session_service import SqliteSessionService
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+SCHEME = "bounded-sqlite"
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE_PATH = os.path.join(BASE_DIR, ".data", "sessions.sqlite3")
+
+# Final replies of compacted turns keep at most this many characters.
+COMPACTED_REPLY_CHARS = 2000
+COMPACTED_KEY = "compacted"
+
+
+def _is_turn_start(event: Event) -> bool:
+    return event.author == "user" and bool(event.content and any(part.text for part in event.content.parts or []))
+
+
+def _split_turns(events: list[Event]) -> list[list[Event]]:
+    """Groups events into turns, each starting with a user message."""
+    turns: list[list[Event]] = []
+    for event in events:
+        if _is_turn_start(event) or not turns:
+            turns.append([])
+        turns[-1].append(event)
+    return turns
+
+
+def _final_text(turn: list[Event]) -> Optional[Event]:
+    for event in reversed(turn):
+        if event.author != "user" and event.content and any(part.text for part in event.content.parts or []):
+            return event
+    return None
+
+
+def _compact_turn(turn: list[Event]) -> list[Event]:
+    """The user's message and the final reply, trimmed, without tool traffic or state deltas."""
+    if turn[0].custom_metadata and turn[0].custom_metadata.get(COMPACTED_KEY):
+        return turn
+    compacted = []
+    for event in (turn[0], _final_text(turn)):
+        if event is None or (compacted and event is compacted[0]):
+            continue
+        text = "".join(part.text or "" for part in event.content.parts)
+        if len(text) > COMPACTED_REPLY_CHARS:
+            text = text[:COMPACTED_REPLY_CHARS] + " [...]"
+        compacted.append(
+            event.model_copy(
+                update={
+                    "content": types.Content(role=event.content.role, parts=[types.Part(text=text)]),
+                    "actions": EventActions(),
+                    "custom_metadata": {**(event.custom_metadata or {}), COMPACTED_KEY: True},
+                    "grounding_metadata": None,
+                    "usage_metadata": None,
+                }
+            )
+        )
+    return compacted
+
+
+def _event_bytes(event: Event) -> int:
+    return len(event.model_dump_json(exclude_none=True).encode("utf-8"))
+
+
+def bound_events(events: list[Event], state: dict, max_turns: int, max_bytes: int) -> list[Event]:
+    """``events`` with old turns compacted and the oldest dropped to fit ``max_bytes``.
+
+    The latest turn is always kept whole.
+    """
+    turns = _split_turns(events)
+    keep_from = max(len(turns) - max_turns, 0)
+    turns = [_compact_turn(turn) for turn in turns[:keep_from]] + turns[keep_from:]
+
+    sizes = [sum(_event_bytes(event) for event in turn) for turn in turns]
+    total = sum(sizes) + len(json.dumps(state, default=str).encode("utf-8"))
+    while total > max_bytes and len(turns) > 1:
+        turns.pop(0)
+        total -= sizes.pop(0)
+    if total > max_bytes:
+        logger.warning("Session is %d bytes after compaction, over the %d byte cap", total, max_bytes)
+    return [event for turn in turns for event in turn]
+
+
+class BoundedSessionService(SqliteSessionService):
+    """``SqliteSessionService`` with idle eviction, turn compaction and a per-session byte cap."""
+
+    def __init__(self, db_path: str, max_turns: int = 10, max_bytes: int = 2_000_000, idle_ttl: float = 86400):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            # Concurrent runs append events at once; with the default rollback
+            # journal they fail with "database is locked".
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+        super().__init__(db_path)
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.compactions = 0
+        self.evictions = 0
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        if not event.partial and _is_turn_start(event):
+            await self._bound(session)
+        return event
+
+    async def _bound(self, session: Session) -> None:
+        events = bound_events(session.events, session.state, self.max_turns, self.max_bytes)
+        if len(events) == len(session.events) and all(a is b for a, b in zip(events, session.events)):
+            return
+        async with self._get_db_connection() as db:
+            await db.execute(
+                "DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=?",
+                (session.app_name, session.user_id, session.id),
+            )
+            await db.executemany(
+                "INSERT INTO events (id, app_name, user_id, session_id, invocation_id, timestamp, event_data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        e.id,
+                        session.app_name,
+                        session.user_id,
+                        session.id,
+                        e.invocation_id,
+                        e.timestamp,
+                        e.model_dump_json(exclude_none=True),
+                    )
+                    for e in events
+                ],
+            )
+            await db.commit()
+        # The runner reads the same session object for the turn that just started.
+        session.events[:] = events
+        self.compactions += 1
+
+    async def drop_last_turn(self, session: Session, message: types.Content, since: float) -> list[Event]:
+        """Deletes the last turn if it starts with ``message``, sent at or after ``since``.
+
+        Returns the deleted events. A job rerun after its worker stopped calls
+        this first, so the unfinished attempt is not followed by the same
+        message again. State deltas the attempt applied are kept.
+        """
+        turns = _split_turns(session.events)
+        if not turns or not _is_turn_start(turns[-1][0]):
+            return []
+        start = turns[-1][0]
+        parts = [part.model_dump(exclude_none=True) for part in start.content.parts or []]
+        if start.timestamp < since or parts != [part.model_dump(exclude_none=True) for part in message.parts or []]:
+            return []
+        dropped = turns[-1]
+        async with self._get_db_connection() as db:
+            await db.executemany(
+                "DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=? AND id=?",
+                [(session.app_name, session.user_id, session.id, event.id) for event in dropped],
+            )
+            await db.commit()
+        del session.events[-len(dropped):]
+        return dropped
+
+    async def evict_idle(self) -> int:
+        """Deletes sessions not updated for ``idle_ttl`` seconds; returns how many."""
+        cutoff = time.time() - self.idle_ttl
+        async with self._get_db_connection() as db:
+            cursor = await db.execute("DELETE FROM sessions WHERE update_time < ?", (cutoff,))
+            await db.commit()
+            evicted = cursor.rowcount
+        self.evictions += evicted
+        return evicted
+
+    async def metrics(self) -> dict[str, Any]:
+        async with self._get_db_connection() as db:
+            async with db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM sessions"
+            ) as cursor:
+                sessions, state_bytes = await cursor.fetchone()
+            async with db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(event_data)), 0) FROM events") as cursor:
+                events, event_bytes = await cursor.fetchone()
+        return {
+            "sessions": sessions,
+            "events": events,
+            "stored_bytes": state_bytes + event_bytes,
+            "max_turns": self.max_turns,
+            "max_bytes": self.max_bytes,
+            "idle_ttl": self.idle_ttl,
+            "compactions": self.compactions,
+            "evictions": self.evictions,
+        }
+
+
+_service: Optional[BoundedSessionService] = None
+
+
+def _create_service(uri: str, **kwargs: Any) -> BoundedSessionService:
+    """ADK service registry factory for ``bounded-sqlite:///<path>`` and ``bounded-sqlite:///:memory:``."""
+    global _service
+    path = urlparse(uri).path
+    _service = BoundedSessionService(
+        ":memory:" if path in ("", "/:memory:") else path,
+        max_turns=int(os.getenv("SESSION_MAX_TURNS", "10")),
+        max_bytes=int(os.getenv("SESSION_MAX_BYTES", "2000000")),
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL_SECONDS", "86400")),
+    )
+    return _service
+
+
+get_service_registry().register_session_service(SCHEME, _create_service)
+
+
+def session_service_uri() -> str:
+    """The ``session_service_uri`` for ``get_fast_api_app``, from ``SESSION_STORE``."""
+    store = os.getenv("SESSION_STORE", "sqlite")
+    if store == "sqlite":
+        return f"{SCHEME}://{os.path.abspath(os.getenv('SESSION_STORE_PATH', DEFAULT_STORE_PATH))}"
+    if store == "memory":
+        return f"{SCHEME}:///:memory:"
+    return store
+
+
+def get_session_service() -> Optional[BoundedSessionService]:
+    """The bounded service the app created, or ``None`` with another backend."""
+    return _service
+
+
+_other_service: Optional[BaseSessionService] = None
+
+
+def app_session_service() -> BaseSessionService:
+    """The app's session store, for runners that ``main.py`` drives itself."""
+    global _other_service
+    if _service is not None:
+        return _service
+    if _other_service is None:
+        _other_service = create_session_service_from_options(base_dir=BASE_DIR, session_service_uri=session_service_uri())
+    return _other_service
+
+
+async def sweep_idle_sessions(interval: float = 300.0) -> None:
+    """Evicts idle sessions every ``interval`` seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        if _service is None:
+            continue
+        try:
+            evicted = await _service.evict_idle()
+        except Exception:
+            logger.exception("Idle session sweep failed")
+            continue
+        if evicted:
+            logger.info("Evicted %d idle sessions", evicted)
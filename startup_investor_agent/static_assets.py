@@ -0,0 +1,160 @@
+"""In-memory static assets for the browser UI.
+
+``StaticAssets`` reads the UI directory once, at startup, and keeps every
+file in memory with:
+
+- a content-hash ETag, so browsers can revalidate with ``If-None-Match`` and
+  get a ``304 Not Modified``;
+- precompressed gzip and, when the optional ``brotli`` package is installed,
+  brotli copies, picked per request from ``Accept-Encoding``;
+- a fingerprinted URL (``/assets/chat.<hash>.js``) served with a year-long
+  ``immutable`` ``Cache-Control``. HTML pages are rewritten to reference
+  scripts, styles and icons by their fingerprinted URLs, and are themselves
+  served with ``no-cache``, so a deploy is picked up on the next page load.
+
+Serving a request looks up a dict and does no filesystem calls. Changes to
+the UI files need a restart.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Mapping, Optional
+
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+FINGERPRINT_PREFIX = "/assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Smaller files are not worth the Content-Encoding header.
+MIN_COMPRESS_BYTES = 512
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+_LOCAL_REF_RE = re.compile(r"""\b(src|href)=(["'])([^"'#?:]+)\2""")
+
+
+@dataclass
+class StaticAsset:
+    name: str
+    media_type: str
+    etag: str
+    url: str
+    encodings: dict[str, bytes] = field(default_factory=dict)
+
+    def etags(self) -> set[str]:
+        return {self.etag_for(encoding) for encoding in self.encodings}
+
+    def etag_for(self, encoding: str) -> str:
+        # Each encoding is a different representation and gets its own validator.
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+
+def _negotiate(accept_encoding: str, available: Mapping[str, bytes]) -> str:
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _not_modified(if_none_match: str, etags: set[str]) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return bool(candidates & etags)
+
+
+class StaticAssets:
+    """Every file under ``directory``, by relative path and by fingerprinted URL."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.by_name: dict[str, StaticAsset] = {}
+        self.by_url: dict[str, StaticAsset] = {}
+
+        files = {}
+        for root, _, names in os.walk(directory):
+            for filename in names:
+                path = os.path.join(root, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, directory).replace(os.sep, "/")] = f.read()
+
+        # Pages reference assets, so assets are fingerprinted first.
+        pages = [name for name in files if name.endswith(".html")]
+        for name in sorted(set(files) - set(pages)) + sorted(pages):
+            content = files[name]
+            if name in pages:
+                content = self._link_fingerprints(name, content)
+            self._add(name, content)
+
+    def _link_fingerprints(self, page: str, content: bytes) -> bytes:
+        base = os.path.dirname(page)
+
+        def replace(match: re.Match) -> str:
+            asset = self.by_name.get(os.path.normpath(os.path.join(base, match.group(3))).replace(os.sep, "/"))
+            # Links between pages keep their names; only subresources are fingerprinted.
+            if asset is None or asset.name.endswith(".html"):
+                return match.group(0)
+            return f"{match.group(1)}={match.group(2)}{asset.url}{match.group(2)}"
+
+        return _LOCAL_REF_RE.sub(replace, content.decode("utf-8")).encode("utf-8")
+
+    def _add(self, name: str, content: bytes) -> None:
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        stem, ext = os.path.splitext(name)
+        asset = StaticAsset(
+            name=name,
+            media_type=media_type,
+            etag=digest,
+            url=f"{FINGERPRINT_PREFIX}{stem}.{digest}{ext}",
+            encodings={"identity": content},
+        )
+        if len(content) >= MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE):
+            # mtime=0 keeps the gzip bytes, and so their ETag, stable across restarts.
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(content, quality=11)
+            asset.encodings.update((k, v) for k, v in compressed.items() if len(v) < len(content))
+        self.by_name[name] = asset
+        self.by_url[asset.url] = asset
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """The asset at a request path: a fingerprinted URL or a plain file name."""
+        if path.startswith(FINGERPRINT_PREFIX):
+            return self.by_url.get(path)
+        return self.by_name.get(path.lstrip("/"))
+
+    def response(self, asset: StaticAsset, headers: Mapping[str, str], immutable: bool = False) -> Response:
+        """``asset`` in the best encoding ``headers`` accept, or a 304 if the client's copy is current."""
+        encoding = _negotiate(headers.get("accept-encoding", ""), asset.encodings)
+        response_headers = {
+            "ETag": asset.etag_for(encoding),
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if _not_modified(headers.get("if-none-match", ""), asset.etags()):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(asset.encodings[encoding], media_type=asset.media_type, headers=response_headers)
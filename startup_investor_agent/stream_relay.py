@@ -0,0 +1,342 @@
+"""Resumable, incremental streaming of agent runs.
+
+ADK's ``/run_sse`` ties a run to its HTTP response: it forwards only the root
+runner's events (agents called through ``AgentTool`` stay silent until they
+return), and a client that disconnects aborts the run. ``StreamRelay`` runs
+each request as a background task instead, and publishes what happens to a
+per-run log of server-sent events:
+
+- ``text``: text as the model produces it. Partial events carry the new chunk;
+  the final event of a model turn carries its whole text. ``answer`` marks
+  the memo, as opposed to research text from the specialists;
+- ``agent``: an agent started or finished, including those run by ``AgentTool``;
+- ``tool``: a tool was called or returned;
+- ``error``, and ``end`` when the run is over.
+
+Every event has an ``id``. A client whose connection drops reconnects to
+``GET /run_stream/{run_id}`` with ``Last-Event-ID`` and continues where it
+left off, while the run carries on regardless.
+
+The log of each run is bounded by ``STREAM_BUFFER_EVENTS`` and
+``STREAM_BUFFER_BYTES``. The run never waits for a client, so a slow client
+cannot hold up a run or grow the buffer. A client that falls further behind
+than the buffer gets a ``gap`` event and continues from the oldest event
+still kept; the final ``text`` event of each turn has the full text again.
+Finished runs are kept for ``STREAM_RETENTION_SECONDS``.
+"""
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import Runner
+from google.genai import types
+
+from .mcp_pool import release_invocation
+from .memo_store import MEMO_OUTPUT_KEY
+
+logger = logging.getLogger(__name__)
+
+# Seconds between comment lines that keep an idle connection open.
+KEEPALIVE_SECONDS = 15.0
+
+_current_run: contextvars.ContextVar[Optional["RunStream"]] = contextvars.ContextVar(
+    "stream_relay_run", default=None
+)
+
+
+class RunConflict(Exception):
+    """The session already has a run in progress."""
+
+    def __init__(self, run_id: str):
+        super().__init__(f"Session already has run {run_id}")
+        self.run_id = run_id
+
+
+def sse_event(event_id: Optional[int], payload: dict) -> bytes:
+    """A server-sent event for ``payload``, with ``event`` set to its type."""
+    lines = [f"event: {payload['type']}", f"data: {json.dumps(payload, separators=(',', ':'))}"]
+    if event_id is not None:
+        lines.insert(0, f"id: {event_id}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class RunStream:
+    """One run's event log: a bounded buffer that any number of clients read from."""
+
+    def __init__(self, user_id: str, session_id: str, max_events: int, max_bytes: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.session_id = session_id
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.invocation_id: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.published = 0
+        self.dropped = 0
+        self._events: collections.deque[tuple[int, bytes]] = collections.deque()
+        self._bytes = 0
+        self._changed = asyncio.Event()
+
+    def publish(self, payload: dict) -> None:
+        self.published += 1
+        data = sse_event(self.published, payload)
+        self._events.append((self.published, data))
+        self._bytes += len(data)
+        while len(self._events) > 1 and (len(self._events) > self.max_events or self._bytes > self.max_bytes):
+            self._bytes -= len(self._events.popleft()[1])
+            self.dropped += 1
+        # Wake the readers waiting on the current event, and start a new one.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def finish(self) -> None:
+        self.publish({"type": "end"})
+        self.done = True
+        self.finished_at = time.time()
+
+    async def read(self, after: int = 0) -> AsyncIterator[bytes]:
+        """SSE bytes for the events after id ``after``, as they are published."""
+        cursor = after
+        while True:
+            changed = self._changed
+            first = self._events[0][0] if self._events else self.published + 1
+            if cursor + 1 < first:
+                # No id, so the client's Last-Event-ID stays where it was.
+                yield sse_event(None, {"type": "gap", "missed": first - cursor - 1})
+                cursor = first - 1
+                # More may have been dropped while the client read the gap.
+                continue
+            if cursor < self.published:
+                # Everything available goes out as one chunk, so a client that
+                # fell behind catches up in few writes.
+                chunk = list(itertools.islice(self._events, cursor + 1 - first, None))
+                cursor = chunk[-1][0]
+                yield b"".join(data for _, data in chunk)
+                continue
+            if self.done:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+            except TimeoutError:
+                yield b": keepalive\n\n"
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "run_id": self.id,
+            "session_id": self.session_id,
+            "done": self.done,
+            "events": self.published,
+            "buffered": len(self._events),
+            "buffered_bytes": self._bytes,
+            "dropped": self.dropped,
+        }
+
+
+def event_payloads(event: Event, answer: bool, nested: bool) -> list[dict]:
+    """What the relay forwards for an ADK event."""
+    parts = event.content.parts if event.content and event.content.parts else []
+    payloads = []
+    if not event.partial:
+        for part in parts:
+            if part.function_call:
+                payloads.append({"type": "tool", "author": event.author, "name": part.function_call.name, "status": "called"})
+            elif part.function_response:
+                payloads.append({"type": "tool", "author": event.author, "name": part.function_response.name, "status": "done"})
+    text = "".join(part.text for part in parts if part.text and not part.thought)
+    if text:
+        payloads.append(
+            {
+                "type": "text",
+                "author": event.author,
+                "partial": bool(event.partial),
+                "answer": answer and not nested,
+                "text": text,
+            }
+        )
+    if event.error_message:
+        payloads.append({"type": "error", "author": event.author, "message": event.error_message})
+    return payloads
+
+
+class StreamRelayPlugin(BasePlugin):
+    """Publishes the events of a relayed run, and of the ``AgentTool`` runs inside it."""
+
+    def __init__(self, name: str = "stream_relay"):
+        super().__init__(name=name)
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> Optional[types.Content]:
+        run = _current_run.get()
+        if run is not None and run.invocation_id is None:
+            run.invocation_id = invocation_context.invocation_id
+        return None
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> Optional[types.Content]:
+        run = _current_run.get()
+        if run is not None:
+            run.publish({"type": "agent", "author": agent.name, "status": "started"})
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> Optional[types.Content]:
+        run = _current_run.get()
+        if run is not None:
+            run.publish({"type": "agent", "author": agent.name, "status": "finished"})
+        return None
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        run = _current_run.get()
+        if run is not None:
+            answer = getattr(invocation_context.agent, "output_key", None) == MEMO_OUTPUT_KEY
+            nested = invocation_context.invocation_id != run.invocation_id
+            for payload in event_payloads(event, answer, nested):
+                run.publish(payload)
+        return None
+
+
+stream_relay_plugin = StreamRelayPlugin()
+
+
+def relay_events_to(sink: Any) -> None:
+    """Publishes the events of runs in the current task, and the tasks it starts, to ``sink``.
+
+    ``sink`` needs ``publish(payload)`` and an ``invocation_id`` attribute, as
+    ``RunStream`` has; the job queue records its runs this way.
+    """
+    _current_run.set(sink)
+
+
+class StreamRelay:
+    """Starts runs in the background and keeps their event logs for resuming."""
+
+    def __init__(
+        self,
+        max_events: int = 5000,
+        max_bytes: int = 2_000_000,
+        retention: float = 600.0,
+        max_runs: int = 200,
+    ):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.max_runs = max_runs
+        self._runs: dict[str, RunStream] = {}
+
+    def get(self, run_id: str) -> Optional[RunStream]:
+        self._expire()
+        return self._runs.get(run_id)
+
+    def active_run(self, user_id: str, session_id: str) -> Optional[RunStream]:
+        for run in self._runs.values():
+            if not run.done and run.user_id == user_id and run.session_id == session_id:
+                return run
+        return None
+
+    def start(
+        self,
+        runner: Runner,
+        user_id: str,
+        session_id: str,
+        new_message: Optional[types.Content],
+        state_delta: Optional[dict[str, Any]] = None,
+        busy: Optional[Callable[[], Optional[str]]] = None,
+    ) -> RunStream:
+        """Starts a run, or raises ``RunConflict`` if the session has one in progress.
+
+        ``busy`` returns the id of a run the session has elsewhere, such as a
+        queued job. The checks and the start happen without yielding to the
+        event loop, so two requests for one session cannot both start a run.
+        """
+        self._expire()
+        active = self.active_run(user_id, session_id)
+        active_id = active.id if active is not None else busy() if busy is not None else None
+        if active_id is not None:
+            raise RunConflict(active_id)
+        run = RunStream(user_id, session_id, self.max_events, self.max_bytes)
+        run.publish({"type": "run", "run_id": run.id, "session_id": session_id})
+        self._runs[run.id] = run
+        run.task = asyncio.create_task(self._drive(run, runner, new_message, state_delta))
+        return run
+
+    async def _drive(
+        self,
+        run: RunStream,
+        runner: Runner,
+        new_message: Optional[types.Content],
+        state_delta: Optional[dict[str, Any]],
+    ) -> None:
+        relay_events_to(run)
+        try:
+            async with contextlib.aclosing(
+                runner.run_async(
+                    user_id=run.user_id,
+                    session_id=run.session_id,
+                    new_message=new_message,
+                    state_delta=state_delta,
+                    run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+                )
+            ) as events:
+                async for _ in events:
+                    pass
+        except asyncio.CancelledError:
+            run.publish({"type": "error", "message": "Run cancelled"})
+        except Exception as e:
+            logger.exception("Relayed run %s failed", run.id)
+            run.publish({"type": "error", "message": str(e)})
+        finally:
+            # A cancelled run skips the plugins' after-run callbacks.
+            if run.invocation_id is not None:
+                await release_invocation(run.invocation_id)
+            run.finish()
+
+    def cancel(self, run_id: str) -> bool:
+        run = self._runs.get(run_id)
+        if run is None or run.done or run.task is None:
+            return False
+        run.task.cancel()
+        return True
+
+    def _expire(self) -> None:
+        now = time.time()
+        finished = sorted((run for run in self._runs.values() if run.done), key=lambda run: run.finished_at)
+        for run in finished:
+            if now - run.finished_at > self.retention or len(self._runs) > self.max_runs:
+                del self._runs[run.id]
+
+    def metrics(self) -> dict[str, Any]:
+        self._expire()
+        return {
+            "runs": len(self._runs),
+            "active": sum(not run.done for run in self._runs.values()),
+            "buffered_bytes": sum(run.status()["buffered_bytes"] for run in self._runs.values()),
+            "dropped_events": sum(run.dropped for run in self._runs.values()),
+        }
+
+
+_relay: Optional[StreamRelay] = None
+
+
+def get_stream_relay() -> StreamRelay:
+    global _relay
+    if _relay is None:
+        _relay = StreamRelay(
+            max_events=int(os.getenv("STREAM_BUFFER_EVENTS", "5000")),
+            max_bytes=int(os.getenv("STREAM_BUFFER_BYTES", "2000000")),
+            retention=float(os.getenv("STREAM_RETENTION_SECONDS", "600")),
+        )
+    return _relay
@@ -0,0 +1,252 @@
+"""Optional structured outputs for the specialist agents.
+
+With ``STRUCTURED_OUTPUTS=on`` each specialist returns a schema-validated
+record (``MarketDataBriefing``, ``ProductTechAnalysis``, ``RiskAssessment``)
+instead of its Markdown template. The record is compacted to minimal JSON
+before it is stored in session state, so the risk analyst, the memo
+synthesis, the research cache and the memo store all get the compact form.
+``render_markdown`` turns a stored record back into the original template
+when a person needs to read it.
+
+Gemini 2.x cannot combine a response schema with the built-in Google Search
+tool, so in this mode search runs through ADK's ``GoogleSearchAgentTool`` and
+the record is returned through ADK's ``set_model_response`` tool.
+"""
+
+import json
+import os
+from enum import Enum
+from typing import Any, Callable, Optional, Union
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import BaseLlm
+from google.adk.tools.google_search_agent_tool import GoogleSearchAgentTool, create_google_search_agent
+from pydantic import BaseModel, Field, ValidationError
+
+STRUCTURED_OUTPUT_INSTRUCTION = """
+
+Structured output mode: instead of the Markdown template above, return the same
+findings as the structured record defined by the response schema. Keep every
+field terse (short phrases, no filler words), give amounts in millions of USD,
+and leave out fields you found no evidence for.
+"""
+
+
+def structured_outputs_enabled() -> bool:
+    return os.getenv("STRUCTURED_OUTPUTS", "off").lower() in ("on", "1", "true")
+
+
+def search_tool(model: Union[str, BaseLlm]) -> GoogleSearchAgentTool:
+    """Google Search wrapped in an agent, so it can sit next to ``set_model_response``."""
+    return GoogleSearchAgentTool(create_google_search_agent(model))
+
+
+class Severity(str, Enum):
+    LOW = "Low"
+    MEDIUM = "Medium"
+    HIGH = "High"
+
+
+class Person(BaseModel):
+    name: str
+    role: Optional[str] = None
+    background: str
+    source: Optional[str] = None
+
+
+class FundingRound(BaseModel):
+    round: str
+    date: Optional[str] = None
+    amount_usd_m: Optional[float] = None
+    leads: list[str] = []
+
+
+class MarketDataBriefing(BaseModel):
+    company: str
+    description: str
+    website: Optional[str] = None
+    team: list[Person] = []
+    total_raised_usd_m: Optional[float] = None
+    rounds: list[FundingRound] = []
+    investors: list[str] = []
+    target_market: str
+    competitors: list[str] = []
+    product: str
+    traction: list[str] = []
+    sources: list[str] = Field(default=[], description="Top reference URLs.")
+
+    def to_markdown(self) -> str:
+        rounds = "; ".join(
+            ", ".join(
+                filter(None, [r.round, r.date, _usd(r.amount_usd_m), f"led by {' and '.join(r.leads)}" if r.leads else ""])
+            )
+            for r in self.rounds
+        )
+        lines = [
+            f"**Research Briefing for: {self.company}**",
+            "",
+            "**1. Company Overview:**",
+            f"   *   **Description:** {self.description}",
+            f"   *   **Website:** {self.website or 'Not found'}",
+            "",
+            "**2. Founders & Key Team Members:**",
+            *[
+                f"   *   {p.name}{f' ({p.role})' if p.role else ''}: {p.background}{f' Source: {p.source}' if p.source else ''}"
+                for p in self.team
+            ],
+            "",
+            "**3. Funding Status:**",
+            f"   *   **Total Raised:** {_usd(self.total_raised_usd_m) or 'Not disclosed'}.",
+            f"   *   **Recent Rounds:** {rounds or 'Not disclosed'}.",
+            f"   *   **Key Investors:** {', '.join(self.investors) or 'Not disclosed'}.",
+            "",
+            "**4. Market & Competition:**",
+            f"   *   **Target Market:** {self.target_market}",
+            f"   *   **Key Competitors:** {', '.join(self.competitors) or 'None identified'}.",
+            "",
+            "**5. Product & Traction:**",
+            f"   *   **Product Summary:** {self.product}",
+            "   *   **Noteworthy Traction/News:**",
+            *[f"       *   {item}" for item in self.traction],
+            "",
+            "**6. Key Reference URLs:**",
+            *[f"   *   {url}" for url in self.sources],
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class FeatureRow(BaseModel):
+    feature: str
+    startup: bool
+    competitor: bool
+
+
+class ProductTechAnalysis(BaseModel):
+    product: str
+    ux: str
+    stack: list[str] = []
+    stack_assessment: Optional[str] = None
+    startup: str
+    competitor: str = Field(description="The closest competitor, compared in features.")
+    features: list[FeatureRow] = []
+    moat: str
+
+    def to_markdown(self) -> str:
+        stack = ", ".join(self.stack) or "Not identified"
+        lines = [
+            "**Product & Technology Deep Dive**",
+            "",
+            f"*   **Product Summary:** {self.product}",
+            f"*   **UX/UI Assessment:** {self.ux}",
+            f"*   **Technology Stack:** {stack}.{f' {self.stack_assessment}' if self.stack_assessment else ''}",
+            "",
+            "**Competitive Landscape**",
+            "",
+            "*   **Competitive Feature Matrix:**",
+            f"| Feature | {self.startup} | {self.competitor} |",
+            "| :--- | :---: | :---: |",
+            *[f"| **{row.feature}** | {_yes(row.startup)} | {_yes(row.competitor)} |" for row in self.features],
+            "",
+            f"*   **Assessment of Defensibility (\"Moat\"):** {self.moat}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class RiskCategory(str, Enum):
+    TEAM = "team"
+    PRODUCT_MARKET_FIT = "product_market_fit"
+    GO_TO_MARKET = "go_to_market"
+    COMPETITIVE = "competitive"
+    TECHNOLOGY = "technology"
+    FUNDING = "funding"
+    REPUTATION = "reputation"
+
+
+RISK_TITLES = {
+    RiskCategory.TEAM: "Team Risk",
+    RiskCategory.PRODUCT_MARKET_FIT: "Product-Market Fit Risk",
+    RiskCategory.GO_TO_MARKET: "Go-to-Market (GTM) Risk",
+    RiskCategory.COMPETITIVE: "Competitive Risk",
+    RiskCategory.TECHNOLOGY: "Technology & Product Risk",
+    RiskCategory.FUNDING: "Funding & Financial Risk",
+    RiskCategory.REPUTATION: "Reputation & Red Flags",
+}
+
+
+class RiskItem(BaseModel):
+    category: RiskCategory
+    severity: Severity
+    assessment: str
+    evidence: str
+
+
+class RiskAssessment(BaseModel):
+    overall: Severity
+    risks: list[RiskItem]
+
+    def to_markdown(self) -> str:
+        lines = ["**Detailed Risk Analysis**", "", f"*   **Overall Risk Profile:** {self.overall.value}"]
+        order = list(RiskCategory)
+        for number, risk in enumerate(sorted(self.risks, key=lambda r: order.index(r.category)), start=1):
+            lines += [
+                "",
+                f"**{number}. {RISK_TITLES[risk.category]}:**",
+                f"    *   **Severity:** {risk.severity.value}",
+                f"    *   **Assessment:** {risk.assessment}",
+                f"    *   **Evidence:** {risk.evidence}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+SCHEMAS: dict[str, type[BaseModel]] = {
+    "market_data_analysis_output": MarketDataBriefing,
+    "final_product_and_tech_output": ProductTechAnalysis,
+    "final_risk_assessment_output": RiskAssessment,
+}
+
+
+def _usd(millions: Optional[float]) -> str:
+    return f"${millions:g}M" if millions is not None else ""
+
+
+def _yes(value: bool) -> str:
+    return "Yes" if value else "No"
+
+
+def _prune(value: Any) -> Any:
+    """Drops ``None``, empty strings and empty collections, recursively."""
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_prune(item) for item in value if item not in (None, "", [], {})]
+    return value
+
+
+def compact(record: Union[BaseModel, dict]) -> str:
+    if isinstance(record, BaseModel):
+        record = record.model_dump(mode="json")
+    return json.dumps(_prune(record), separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_output(output_key: str) -> Callable[[CallbackContext], None]:
+    """``after_agent_callback`` replacing a structured record in state with its compact JSON."""
+
+    def compact_state(callback_context: CallbackContext) -> None:
+        value = callback_context.state.get(output_key)
+        if isinstance(value, (dict, BaseModel)):
+            callback_context.state[output_key] = compact(value)
+        return None
+
+    return compact_state
+
+
+def render_markdown(output_key: str, value: str) -> str:
+    """The Markdown template for a stored output; Markdown outputs are returned unchanged."""
+    schema = SCHEMAS.get(output_key)
+    if schema is None:
+        return value
+    try:
+        return schema.model_validate_json(value).to_markdown()
+    except ValidationError:
+        return value
@@ -0,0 +1,380 @@
+"""Span tracing for agent runs.
+
+``TracingPlugin`` records a span around every agent invocation, tool call
+(``AgentTool`` and MCP tools included) and model call. Spans carry durations,
+token counts and request/response sizes in bytes. A run's spans, including
+those of agents called through ``AgentTool``, form one trace. Finished traces
+are kept in a ring buffer of the last ``TRACE_BUFFER_SIZE`` traces (default
+50), and are appended as JSON lines to ``TRACE_EXPORT_PATH`` when it is set.
+
+Each finished trace gets a summary that shows where the time went:
+
+- ``breakdown``: self time per span name, i.e. time not covered by child spans;
+- ``hot_path``: the chain of slowest children from the root down.
+
+``main.py`` serves these at ``/debug/traces``.
+"""
+
+import collections
+import contextvars
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import BaseTool, ToolContext
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# The tool span a nested AgentTool run was started from.
+_tool_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("tracing_tool_span", default=None)
+
+
+def _content_bytes(contents: list[types.Content]) -> int:
+    size = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                size += len(part.text.encode("utf-8"))
+            elif part.function_call or part.function_response:
+                size += len(str(part.function_call or part.function_response).encode("utf-8"))
+    return size
+
+
+def _is_mcp_tool(tool: BaseTool) -> bool:
+    # McpTool is not imported here: the MCP client libraries load with the first
+    # MCP server (see mcp_pool), and until then no tool can be one.
+    module = sys.modules.get("google.adk.tools.mcp_tool.mcp_tool")
+    return module is not None and isinstance(tool, module.McpTool)
+
+
+def _json_bytes(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+class Span:
+    _ids = itertools.count(1)
+
+    def __init__(self, trace: "Trace", kind: str, name: str, parent: Optional["Span"], **attributes):
+        self.id = next(self._ids)
+        self.trace = trace
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.status = "running"
+
+    def end(self, status: str = "ok", **attributes) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        self.status = status
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "parent_id": self.parent.id if self.parent else None,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": round(self.started_at, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    def __init__(self, trace_id: str, user_id: str, session_id: str):
+        self.id = trace_id
+        self.user_id = user_id
+        self.session_id = session_id
+        self.spans: list[Span] = []
+        self.started_at = time.time()
+        self.status = "running"
+
+    def close(self, status: str) -> None:
+        """Ends spans left open (cancelled or failed runs) and marks the trace done."""
+        for span in self.spans:
+            if span.duration is None:
+                span.end(status="incomplete")
+        self.status = status
+
+    def summary(self) -> dict:
+        children = collections.defaultdict(list)
+        for span in self.spans:
+            children[span.parent.id if span.parent else None].append(span)
+
+        breakdown = collections.defaultdict(lambda: {"count": 0, "total_ms": 0.0, "self_ms": 0.0})
+        tokens = {"prompt": 0, "output": 0, "total": 0}
+        for span in self.spans:
+            entry = breakdown[f"{span.kind}:{span.name}"]
+            child_time = sum(child.duration or 0 for child in children[span.id])
+            entry["count"] += 1
+            entry["total_ms"] += (span.duration or 0) * 1000
+            # Parallel children can add up to more than their parent.
+            entry["self_ms"] += max((span.duration or 0) - child_time, 0) * 1000
+            if span.kind == "model":
+                tokens["prompt"] += span.attributes.get("prompt_tokens") or 0
+                tokens["output"] += span.attributes.get("output_tokens") or 0
+                tokens["total"] += span.attributes.get("total_tokens") or 0
+
+        hot_path = []
+        level = children[None]
+        while level:
+            slowest = max(level, key=lambda span: span.duration or 0)
+            hot_path.append(
+                {"kind": slowest.kind, "name": slowest.name, "duration_ms": round((slowest.duration or 0) * 1000, 3)}
+            )
+            level = children[slowest.id]
+
+        roots = children[None]
+        return {
+            "trace_id": self.id,
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "started_at": round(self.started_at, 6),
+            "duration_ms": round(sum(span.duration or 0 for span in roots) * 1000, 3),
+            "status": self.status,
+            "spans": len(self.spans),
+            "model_calls": sum(1 for span in self.spans if span.kind == "model"),
+            "tool_calls": sum(1 for span in self.spans if span.kind in ("tool", "agent_tool", "mcp_tool")),
+            "tokens": tokens,
+            "breakdown": {
+                name: {key: round(value, 3) for key, value in entry.items()}
+                for name, entry in sorted(breakdown.items(), key=lambda item: -item[1]["self_ms"])
+            },
+            "hot_path": hot_path,
+        }
+
+    def to_dict(self) -> dict:
+        return {**self.summary(), "span_list": [span.to_dict() for span in self.spans]}
+
+
+class TracingPlugin(BasePlugin):
+    def __init__(
+        self,
+        name: str = "tracing",
+        buffer_size: int = 50,
+        export_path: Optional[str] = None,
+        max_open_traces: int = 1000,
+    ):
+        super().__init__(name=name)
+        self.export_path = export_path
+        self.max_open_traces = max_open_traces
+        self._finished: collections.deque[Trace] = collections.deque(maxlen=buffer_size)
+        self._open: dict[str, Trace] = {}
+        self._invocations: dict[str, tuple[Trace, Optional[Span]]] = {}
+        self._agent_spans: dict[tuple[str, str], Span] = {}
+        self._model_spans: dict[tuple[str, str], Span] = {}
+        self._tool_spans: dict[str, Span] = {}
+
+    # Runs
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        invocation_id = invocation_context.invocation_id
+        parent = _tool_span.get()
+        if parent is not None and parent.duration is None:
+            # A nested run started by an AgentTool belongs to the caller's trace.
+            self._invocations[invocation_id] = (parent.trace, parent)
+            return None
+        trace = Trace(invocation_id, invocation_context.user_id, invocation_context.session.id)
+        self._open[invocation_id] = trace
+        self._invocations[invocation_id] = (trace, None)
+        while len(self._open) > self.max_open_traces:
+            oldest = next(iter(self._open))
+            self._finish(oldest, "abandoned")
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._end_invocation(invocation_context.invocation_id, "ok")
+
+    async def on_run_error_callback(self, *, invocation_context: InvocationContext, error: Exception) -> None:
+        self._end_invocation(invocation_context.invocation_id, "error")
+
+    def _end_invocation(self, invocation_id: str, status: str) -> None:
+        self._invocations.pop(invocation_id, None)
+        for key in [key for key in self._agent_spans if key[0] == invocation_id]:
+            self._agent_spans.pop(key).end(status="incomplete")
+        if invocation_id in self._open:
+            self._finish(invocation_id, status)
+
+    def _finish(self, trace_id: str, status: str) -> None:
+        trace = self._open.pop(trace_id)
+        trace.close(status)
+        self._finished.append(trace)
+        if self.export_path:
+            self._export(trace)
+
+    def _export(self, trace: Trace) -> None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.export_path)), exist_ok=True)
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+        except OSError as e:
+            logger.warning("Could not export trace %s: %s", trace.id, e)
+
+    def _start(self, invocation_id: str, kind: str, name: str, parent: Optional[Span], **attributes) -> Optional[Span]:
+        entry = self._invocations.get(invocation_id)
+        if entry is None:
+            return None
+        trace, invocation_parent = entry
+        span = Span(trace, kind, name, parent or invocation_parent, **attributes)
+        trace.spans.append(span)
+        return span
+
+    # Agents
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> None:
+        invocation_id = callback_context.invocation_id
+        parent = None
+        if agent.parent_agent is not None:
+            parent = self._agent_spans.get((invocation_id, agent.parent_agent.name))
+        span = self._start(invocation_id, "agent", agent.name, parent)
+        if span is not None:
+            self._agent_spans[(invocation_id, agent.name)] = span
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> None:
+        span = self._agent_spans.pop((callback_context.invocation_id, agent.name), None)
+        if span is not None:
+            output_key = getattr(agent, "output_key", None)
+            if output_key and callback_context.state.get(output_key) is not None:
+                span.end(output_bytes=_json_bytes(callback_context.state.get(output_key)))
+            else:
+                span.end()
+        return None
+
+    async def on_agent_error_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext, error: Exception
+    ) -> None:
+        span = self._agent_spans.pop((callback_context.invocation_id, agent.name), None)
+        if span is not None:
+            span.end(status="error", error=f"{type(error).__name__}: {error}")
+
+    # Model calls
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        invocation_id = callback_context.invocation_id
+        key = (invocation_id, callback_context.agent_name)
+        span = self._start(
+            invocation_id,
+            "model",
+            llm_request.model or "model",
+            self._agent_spans.get(key),
+            agent=callback_context.agent_name,
+            request_bytes=_content_bytes(llm_request.contents),
+            response_bytes=0,
+        )
+        if span is not None:
+            self._model_spans[key] = span
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        span = self._model_spans.get(key)
+        if span is None:
+            return None
+        if llm_response.content:
+            span.attributes["response_bytes"] += _content_bytes([llm_response.content])
+        if llm_response.partial:
+            return None
+        del self._model_spans[key]
+        usage = llm_response.usage_metadata
+        span.end(
+            status="error" if llm_response.error_code else "ok",
+            prompt_tokens=usage.prompt_token_count if usage else None,
+            output_tokens=usage.candidates_token_count if usage else None,
+            total_tokens=usage.total_token_count if usage else None,
+        )
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> None:
+        span = self._model_spans.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if span is not None:
+            span.end(status="error", error=f"{type(error).__name__}: {error}")
+        return None
+
+    # Tool calls
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> None:
+        if isinstance(tool, AgentTool):
+            kind = "agent_tool"
+        elif _is_mcp_tool(tool):
+            kind = "mcp_tool"
+        else:
+            kind = "tool"
+        span = self._start(
+            tool_context.invocation_id,
+            kind,
+            tool.name,
+            self._agent_spans.get((tool_context.invocation_id, tool_context.agent_name)),
+            args_bytes=_json_bytes(tool_args),
+        )
+        if span is not None:
+            self._tool_spans[tool_context.function_call_id] = span
+            # Each tool call runs in its own task or finishes before the next
+            # starts, so this only reaches runs started by this call.
+            _tool_span.set(span)
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> None:
+        span = self._tool_spans.pop(tool_context.function_call_id, None)
+        if span is not None:
+            span.end(result_bytes=_json_bytes(result))
+            _tool_span.set(None)
+        return None
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> None:
+        span = self._tool_spans.pop(tool_context.function_call_id, None)
+        if span is not None:
+            span.end(status="error", error=f"{type(error).__name__}: {error}")
+        return None
+
+    # Reading
+
+    def recent(self, limit: int = 20) -> list[dict]:
+        """Summaries of the most recent traces, newest first; running ones included."""
+        traces = list(self._open.values()) + list(reversed(self._finished))
+        traces.sort(key=lambda trace: trace.started_at, reverse=True)
+        return [trace.summary() for trace in traces[:limit]]
+
+    def get(self, trace_id: str) -> Optional[dict]:
+        for trace in itertools.chain(self._open.values(), self._finished):
+            if trace.id == trace_id:
+                return trace.to_dict()
+        return None
+
+
+tracing_plugin = TracingPlugin(
+    buffer_size=int(os.getenv("TRACE_BUFFER_SIZE", "50")),
+    export_path=os.getenv("TRACE_EXPORT_PATH") or None,
+)
@@ -1,6 +1,7 @@
 // Align behavior with ADK browser: send inlineData; avoid extra client logic by default
 const ENABLE_DOCX_EXTRACTION = true; // set true to include client-side DOCX->text
 const ADD_GUIDANCE_PARTS = false; // set true to inject helper guidance parts
+const STREAM_RESUME_ATTEMPTS = 6; // reconnects to a run without receiving anything new
 
 class ChatInterface {
   constructor() {
@@ -133,10 +134,6 @@ class ChatInterface {
     const existingWelcome = this.chatMessages.querySelector('.welcome-message');
     if (existingWelcome) existingWelcome.remove();
 
-    // Remove welcome section on first interaction
-    const existingWelcome = this.chatMessages.querySelector('.welcome-message');
-    if (existingWelcome) existingWelcome.remove();
-
     // Fail fast if user tried to upload unsupported/failed files with no text
     if (!message && !hasFiles) {
       if (this.failedFiles.length > 0) {
@@ -295,140 +292,222 @@ class ChatInterface {
 
     console.log("Sending message:", payload);
 
-    try {
-      // Try streaming first
-      const response = await fetch("/run_sse", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify(payload),
-      });
+    // /run_stream runs the agent in the background on the server. If the
+    // connection drops, we reconnect to the same run from the last event we
+    // saw instead of starting the evaluation over.
+    const view = {
+      runId: null,
+      lastEventId: 0,
+      ended: false,
+      answer: null,
+      texts: {},
+      progress: null,
+      agents: {},
+    };
+
+    let response = await fetch("/run_stream", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify(payload),
+    });
 
-      if (!response.ok) {
-        const errText = await response.text().catch(() => "");
-        throw new Error(
-          `HTTP ${response.status}: ${errText || "streaming endpoint error"}`
+    let queued = false;
+    if (response.status === 409) {
+      // This session already has a run in progress, e.g. from another tab:
+      // follow it, then send this message once it is over.
+      const body = await response.json().catch(() => ({}));
+      view.runId = body.detail?.run_id;
+      response = null;
+      if (!view.runId) {
+        this.addStatusMessage(
+          "An evaluation is already running in this session. Please send your message again when it finishes."
         );
+        throw new Error("A run is already in progress for this session");
       }
+      queued = true;
+      this.addStatusMessage(
+        "An evaluation is already running in this session. Your message will be sent when it finishes."
+      );
+    } else if (!response.ok) {
+      const errText = await response.text().catch(() => "");
+      this.addStatusMessage(
+        `Server error: ${response.status} — ${errText || "unknown error"}`
+      );
+      throw new Error(`HTTP ${response.status}: ${errText || "stream error"}`);
+    } else {
+      view.runId = response.headers.get("X-Run-Id");
+    }
 
-      // Handle Server-Sent Events
-      const reader = response.body.getReader();
-      const decoder = new TextDecoder();
-      let buffer = "";
-      let assistantMessage = "";
-      let messageElement = null;
-
-      while (true) {
-        const { done, value } = await reader.read();
-        if (done) break;
-
-        buffer += decoder.decode(value, { stream: true });
-        const lines = buffer.split("\n");
-        buffer = lines.pop(); // Keep incomplete line in buffer
-
-        for (const line of lines) {
-          if (line.startsWith("data: ")) {
-            try {
-              const data = JSON.parse(line.slice(6));
-              console.log("Received SSE data:", data);
-
-              if (data.content && data.content.parts) {
-                for (const part of data.content.parts) {
-                  if (part.text) {
-                    assistantMessage += part.text;
-                    if (!messageElement) {
-                      messageElement = this.addMessage("", "assistant");
-                    }
-                    messageElement.textContent = assistantMessage;
-                    this.scrollToBottom();
-                  }
-                }
-              }
-            } catch (e) {
-              console.log("Could not parse SSE data:", line);
-            }
+    let failures = 0;
+    while (!view.ended) {
+      try {
+        if (!response) {
+          response = await fetch(
+            `/run_stream/${view.runId}?after=${view.lastEventId}`
+          );
+          if (response.status === 404) {
+            this.addStatusMessage(
+              "The evaluation is no longer available. Please send your message again."
+            );
+            break;
           }
+          if (!response.ok) throw new Error(`HTTP ${response.status}`);
         }
+        const seen = view.lastEventId;
+        await this.readRunStream(response, view);
+        if (view.lastEventId > seen) failures = 0;
+      } catch (error) {
+        console.warn("Run stream interrupted:", error);
       }
-
-      if (!assistantMessage && !messageElement) {
-        console.log("No streaming response, trying non-streaming API...");
-        throw new Error("No streaming response received");
+      response = null;
+      if (!view.ended) {
+        failures += 1;
+        if (failures > STREAM_RESUME_ATTEMPTS) {
+          throw new Error("Lost the connection to the evaluation");
+        }
+        const delay = Math.min(500 * 2 ** (failures - 1), 8000);
+        console.log(`Resuming run ${view.runId} in ${delay} ms`);
+        await new Promise((resolve) => setTimeout(resolve, delay));
       }
-    } catch (error) {
-      console.error("Streaming error:", error);
-
-      // Fallback to non-streaming API
-      try {
-        const fallbackPayload = { ...payload, streaming: false };
-        console.log("Trying non-streaming API with payload:", fallbackPayload);
+    }
 
-        const fallbackResponse = await fetch("/run", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify(fallbackPayload),
-        });
+    if (view.progress) {
+      view.progress.summary.textContent = "Research steps";
+    }
+    if (queued) {
+      return this.sendMessage(messageData);
+    }
+    if (!view.answer && !view.error) {
+      throw new Error("No response received");
+    }
+  }
 
-        if (fallbackResponse.ok) {
-          const result = await fallbackResponse.json();
-          console.log("Non-streaming API response:", result);
-
-          let responseText = "";
-
-          if (result.content && result.content.parts) {
-            responseText = result.content.parts
-              .filter((part) => part.text)
-              .map((part) => part.text)
-              .join("");
-          } else if (result.candidates && result.candidates.length > 0) {
-            // Handle Gemini API format
-            const candidate = result.candidates[0];
-            if (candidate.content && candidate.content.parts) {
-              responseText = candidate.content.parts
-                .filter((part) => part.text)
-                .map((part) => part.text)
-                .join("");
-            }
-          } else if (typeof result === "string") {
-            responseText = result;
-          } else {
-            console.log("Unexpected response format:", result);
-            responseText =
-              "I received your message but the response format was unexpected. Please try again.";
-          }
+  // Reads server-sent events from a /run_stream response until it ends.
+  async readRunStream(response, view) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const blocks = buffer.split("\n\n");
+      buffer = blocks.pop(); // Keep the incomplete event in the buffer
+
+      for (const block of blocks) {
+        let id = null;
+        let type = "message";
+        const data = [];
+        for (const line of block.split("\n")) {
+          if (line.startsWith("id: ")) id = Number(line.slice(4));
+          else if (line.startsWith("event: ")) type = line.slice(7);
+          else if (line.startsWith("data: ")) data.push(line.slice(6));
+        }
+        if (!data.length) continue; // keepalive comment
+        try {
+          this.handleRunEvent(view, type, JSON.parse(data.join("\n")));
+        } catch (e) {
+          console.log("Could not handle stream event:", block, e);
+        }
+        if (id !== null) view.lastEventId = id;
+      }
+    }
+  }
 
-          if (responseText) {
-            this.addMessage(responseText, "assistant");
+  handleRunEvent(view, type, data) {
+    switch (type) {
+      case "text": {
+        if (data.answer && !view.answer) {
+          view.answer = this.addMessage("", "assistant");
+          view.answerEntry = this.chatHistory[this.chatHistory.length - 1];
+        }
+        const key = data.answer ? "answer" : data.author;
+        let entry = view.texts[key];
+        if (!entry || entry.closed) {
+          const node = document.createTextNode("");
+          if (data.answer) {
+            view.answer.querySelector(".message-text").appendChild(node);
           } else {
-            this.addMessage(
-              "I received your message but couldn't generate a proper response. Please try again.",
-              "error"
-            );
+            this.runProgress(view).research(data.author, node);
           }
+          entry = view.texts[key] = { node, closed: false };
+        }
+        if (data.partial) {
+          entry.node.appendData(data.text);
         } else {
-          const errorText = await fallbackResponse.text();
-          console.error(
-            "Fallback API error:",
-            fallbackResponse.status,
-            errorText
-          );
-          this.addStatusMessage(
-            `Server error: ${fallbackResponse.status} — ${
-              errorText || "unknown error"
-            }`
-          );
-          throw new Error(`API error: ${fallbackResponse.status}`);
+          // The final event of a model turn has its whole text.
+          entry.node.data = data.text;
+          entry.closed = true;
+          if (data.answer) view.answerEntry.messageData = data.text;
         }
-      } catch (fallbackError) {
-        console.error("Fallback error:", fallbackError);
-        throw fallbackError;
+        this.scrollToBottom();
+        break;
       }
+      case "agent":
+        this.runProgress(view).step(data.author, data.status === "started" ? "working…" : "done");
+        break;
+      case "tool":
+        this.runProgress(view).step(
+          data.author,
+          data.status === "called" ? `calling ${data.name}…` : `${data.name} returned`
+        );
+        break;
+      case "gap":
+        // We fell too far behind; the final text of each turn makes up for it.
+        console.warn(`Skipped ${data.missed} stream events`);
+        break;
+      case "error":
+        view.error = true;
+        this.addStatusMessage(`Error: ${data.message}`);
+        break;
+      case "end":
+        view.ended = true;
+        break;
     }
   }
 
+  // The collapsible list of agent steps and research text shown above the memo.
+  runProgress(view) {
+    if (view.progress) return view.progress;
+    const details = document.createElement("details");
+    details.className = "message assistant run-progress";
+    const summary = document.createElement("summary");
+    summary.textContent = "Researching…";
+    const list = document.createElement("ul");
+    details.append(summary, list);
+    this.chatMessages.appendChild(details);
+
+    const row = (author) => {
+      if (!view.agents[author]) {
+        const item = document.createElement("li");
+        const label = document.createElement("span");
+        item.appendChild(label);
+        list.appendChild(item);
+        view.agents[author] = { item, label };
+      }
+      return view.agents[author];
+    };
+    view.progress = {
+      summary,
+      step: (author, status) => {
+        row(author).label.textContent = `${author}: ${status}`;
+        summary.textContent = `Researching… ${author}: ${status}`;
+      },
+      research: (author, node) => {
+        const text = document.createElement("div");
+        text.className = "run-progress-text";
+        text.appendChild(node);
+        row(author).item.appendChild(text);
+      },
+    };
+    this.scrollToBottom();
+    return view.progress;
+  }
+
   addMessage(messageData, type) {
     const messageDiv = document.createElement("div");
     messageDiv.className = `message ${type}`;
@@ -436,6 +515,7 @@ class ChatInterface {
     // Handle different message formats
     let text = "";
     let files = [];
+    let textDiv = null;
 
     if (typeof messageData === "string") {
       text = messageData;
@@ -453,14 +533,17 @@ class ChatInterface {
             `;
       messageDiv.appendChild(actionsDiv);
 
-      // Add copy functionality
+      // Add copy functionality; streamed messages are copied as they are at the time
       const copyBtn = actionsDiv.querySelector(".copy-btn");
-      copyBtn.addEventListener("click", () => this.copyMessage(text));
+      copyBtn.addEventListener("click", () =>
+        this.copyMessage(textDiv ? textDiv.textContent : text)
+      );
     }
 
-    // Add text content
-    if (text) {
-      const textDiv = document.createElement("div");
+    // Add text content; assistant messages always get it, as streamed text is appended there
+    if (text || type === "assistant") {
+      textDiv = document.createElement("div");
+      textDiv.className = "message-text";
       textDiv.textContent = text;
       messageDiv.appendChild(textDiv);
     }